@@ -1,4 +1,5 @@
-from app import create_app
+from app import create_app, db
+from app.logic.calculation_cache import calculation_cache
 from flask import render_template, send_from_directory
 import os
 
@@ -38,9 +39,24 @@ def health_check():
     """Endpoint para verificar el estado de la API"""
     return {
         'status': 'healthy',
-        'service': 'NominaPlus API'
+        'service': 'NominaPlus API',
+        'database': {
+            'dialect': db.engine.dialect.name,
+            'pool': pool_stats(db.engine.pool)
+        },
+        'calculation_cache': calculation_cache.stats()
     }
 
+
+def pool_stats(pool):
+    """Uso del pool de conexiones (sin tomar una conexión)"""
+    stats = {'class': type(pool).__name__}
+    for name in ('size', 'checkedin', 'checkedout', 'overflow'):
+        # SQLite en memoria usa pools sin estas métricas
+        if hasattr(pool, name):
+            stats[name] = getattr(pool, name)()
+    return stats
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
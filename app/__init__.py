@@ -1,16 +1,18 @@
 from flask import Flask, send_from_directory
 import os
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
-from config import config
+from config import config, engine_options
 
 db = SQLAlchemy()
-migrate = Migrate()
 
 
-def create_app(config_name='default'):
-    """Factory function para crear la aplicación Flask"""
+def create_app(config_name='default', config_overrides=None):
+    """
+    Factory function para crear la aplicación Flask
+    config_overrides reemplaza valores de la configuración antes de inicializar
+    las extensiones (por ejemplo, la URL de la base en procesos de cálculo)
+    """
     # Configurar rutas para archivos estáticos y templates
     base_dir = os.path.abspath(os.path.dirname(__file__))
     template_dir = os.path.join(base_dir, '..', 'frontend')
@@ -21,22 +23,53 @@ def create_app(config_name='default'):
                 static_folder=static_dir,
                 static_url_path='/static')
     app.config.from_object(config[config_name])
+    app.config['CONFIG_NAME'] = config_name
+    if config_overrides:
+        app.config.update(config_overrides)
+        # Las opciones del pool dependen de la URL: recalcularlas si cambió y no se indicaron
+        if ('SQLALCHEMY_DATABASE_URI' in config_overrides
+                and 'SQLALCHEMY_ENGINE_OPTIONS' not in config_overrides):
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
     
     # Inicializar extensiones
     db.init_app(app)
-    migrate.init_app(app, db)
+    # Flask-Migrate (Alembic) se inicializa al usar `flask db` (ver app.commands)
     CORS(app, origins=app.config['CORS_ORIGINS'])
     
     # Importar modelos para que SQLAlchemy los registre
     from app import models
     
+    # Mantener period_summary al escribir asistencias, nóminas y empleados
+    from app.logic.summary import register_summary_listeners
+    register_summary_listeners()
+    
+    # Marcar las nóminas a recalcular al escribir asistencias
+    from app.logic.incremental import register_dirty_listeners
+    register_dirty_listeners()
+    
     # Registrar blueprints
     from app.routes import api_bp
     app.register_blueprint(api_bp, url_prefix='/api')
     
-    # Crear tablas en el contexto de la aplicación
-    with app.app_context():
-        db.create_all()
+    # Compresión negociada de respuestas (se registra antes que la instrumentación
+    # para ejecutarse después de ella y comprimir el cuerpo final)
+    from app.compression import init_compression
+    init_compression(app)
+    
+    # Instrumentación opcional (INSTRUMENTATION_ENABLED)
+    if app.config.get('INSTRUMENTATION_ENABLED'):
+        from app.instrumentation import init_instrumentation
+        init_instrumentation(app)
+    
+    # Registrar comandos de CLI
+    from app.commands import register_commands
+    register_commands(app)
+    
+    # Crear tablas al iniciar solo si AUTO_CREATE_SCHEMA está activo (desarrollo y
+    # testing); en producción el esquema se crea con `flask init-db` o migraciones
+    if app.config.get('AUTO_CREATE_SCHEMA'):
+        with app.app_context():
+            db.create_all()
     
     return app
 
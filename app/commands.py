@@ -0,0 +1,203 @@
+"""
+Comandos de línea de comandos (flask <comando>)
+"""
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+
+summary_cli = AppGroup('summary', help='Mantenimiento de la tabla period_summary')
+
+
+@summary_cli.command('rebuild')
+@click.option('--period', 'periods', multiple=True, help='Período YYYY-MM a recalcular (se puede repetir)')
+def rebuild_summary(periods):
+    """Reconstruye el resumen por período desde las tablas base (backfill)"""
+    from app.logic.summary import GLOBAL_PERIOD, rebuild_period_summaries
+    
+    count = rebuild_period_summaries(list(periods) + [GLOBAL_PERIOD] if periods else None)
+    click.echo(f'✓ {count} filas de resumen recalculadas')
+
+
+payroll_cli = AppGroup('payroll', help='Cálculo de nóminas')
+
+
+@payroll_cli.command('calculate')
+@click.option('--period', required=True, help='Período YYYY-MM')
+@click.option('--country', 'country_code', help='Solo empleados de este país')
+@click.option('--engine', type=click.Choice(['decimal', 'vectorized', 'aggregate']), default='decimal')
+@click.option('--workers', type=int, help='Procesos de cálculo (por defecto PAYROLL_WORKERS o CPUs)')
+def calculate_payroll(period, country_code, engine, workers):
+    """Calcula la nómina del período en paralelo con varios procesos"""
+    from app.logic.parallel import calculate_period_parallel
+    
+    result = calculate_period_parallel(period, country_code=country_code, engine=engine, workers=workers)
+    click.echo(
+        f"✓ {result['employees']} nóminas ({result['created']} nuevas, {result['updated']} actualizadas, "
+        f"{result['skipped']['paid']} pagadas sin cambios) "
+        f"con {result['workers']} procesos en {result['timing']['total_ms'] / 1000:.2f}s"
+    )
+
+
+@payroll_cli.command('recalculate-dirty')
+@click.option('--period', help='Solo este período YYYY-MM')
+@click.option('--limit', type=int, help='Máximo de nóminas a recalcular')
+@click.option('--engine', type=click.Choice(['decimal', 'vectorized', 'aggregate']), default='decimal')
+def recalculate_dirty_payrolls(period, limit, engine):
+    """Recalcula solo las nóminas cuyas asistencias cambiaron"""
+    from app.logic.incremental import recalculate_dirty
+    
+    result = recalculate_dirty(period=period, limit=limit, engine=engine)
+    skipped = result['skipped']
+    click.echo(
+        f"✓ {result['recalculated']} nóminas recalculadas en {result['total_ms'] / 1000:.2f}s "
+        f"({skipped['paid']} pagadas, {skipped['missing']} sin nómina, {skipped['inactive']} inactivos; "
+        f"{result['remaining']} pendientes)"
+    )
+
+
+jobs_cli = AppGroup('jobs', help='Trabajos en segundo plano')
+
+
+@jobs_cli.command('worker')
+@click.option('--processes', type=int, default=1, help='Procesos worker independientes')
+@click.option('--once', is_flag=True, help='Terminar cuando la cola quede vacía')
+@click.option('--poll-interval', type=float, help='Segundos entre consultas (por defecto JOB_POLL_INTERVAL)')
+def jobs_worker(processes, once, poll_interval):
+    """Ejecuta los trabajos encolados en /api/jobs"""
+    from app.logic.jobs import run_worker, run_worker_processes
+    
+    if processes > 1:
+        click.echo(f'Iniciando {processes} workers...')
+        run_worker_processes(processes, once=once, poll_interval=poll_interval)
+        return
+    processed = run_worker(once=once, poll_interval=poll_interval)
+    click.echo(f'✓ {processed} trabajos ejecutados')
+
+
+export_cli = AppGroup('export', help='Exportación del historial a Parquet/Arrow')
+
+
+@export_cli.command('history')
+@click.option('--dataset', 'datasets', multiple=True, type=click.Choice(['payrolls', 'attendances']),
+              help='Conjunto a exportar (por defecto todos; se puede repetir)')
+@click.option('--format', 'fmt', type=click.Choice(['parquet', 'arrow']), default='parquet')
+@click.option('--output', help='Directorio de destino (por defecto EXPORT_DIR)')
+@click.option('--period', 'periods', multiple=True, help='Solo estos períodos YYYY-MM (se puede repetir)')
+@click.option('--full', is_flag=True, help='Reescribir todos los períodos aunque no hayan cambiado')
+def export_history(datasets, fmt, output, periods, full):
+    """Exporta nóminas y asistencias particionadas por período"""
+    from app.logic.export import DATASETS, export_dataset
+    
+    for name in datasets or DATASETS:
+        result = export_dataset(
+            name,
+            output or current_app.config['EXPORT_DIR'],
+            fmt=fmt,
+            incremental=not full,
+            periods=periods or None,
+            batch_size=current_app.config['EXPORT_BATCH_SIZE'],
+        )
+        click.echo(
+            f"✓ {name}: {len(result['exported'])} períodos exportados ({result['rows']} filas), "
+            f"{result['skipped']} sin cambios, {len(result['removed'])} eliminados -> {result['path']}"
+        )
+
+
+payments_cli = AppGroup('payments', help='Lotes de pago y archivos de transferencias bancarias')
+
+
+@payments_cli.command('pay')
+@click.option('--period', required=True, help='Período YYYY-MM')
+@click.option('--country', 'country_code', required=True, help='País del formato bancario (GT, AR, ES)')
+@click.option('--date', 'payment_date', type=click.DateTime(formats=['%Y-%m-%d']), help='Fecha de pago (por defecto hoy)')
+@click.option('--output', help='Directorio de destino (por defecto PAYMENTS_DIR)')
+def pay_payrolls(period, country_code, payment_date, output):
+    """Genera el archivo de transferencias y marca como pagadas las nóminas confirmadas"""
+    from app.logic.payments import prepare_batch, write_payment_file
+    
+    batch = prepare_batch(period, country_code, payment_date.date() if payment_date else None)
+    result = write_payment_file(
+        batch,
+        output or current_app.config['PAYMENTS_DIR'],
+        current_app.config['PAYMENT_CHUNK_SIZE'],
+    )
+    click.echo(f"✓ Lote {result['batch_id']}: {result['count']} nóminas pagadas ({result['total']:.2f}) -> {result['path']}")
+
+
+punches_cli = AppGroup('punches', help='Marcaciones del servicio de relojes')
+
+
+@punches_cli.command('replay')
+@click.option('--file', 'path', help='Archivo de marcaciones no escritas (por defecto PUNCH_DEAD_LETTER_PATH)')
+def replay_punches(path):
+    """Vuelve a aplicar las marcaciones que el servicio no pudo escribir"""
+    import json
+    import os
+    from datetime import datetime
+    from app.logic.punches import apply_punches, parse_punch
+    
+    path = path or current_app.config['PUNCH_DEAD_LETTER_PATH']
+    if not os.path.exists(path):
+        click.echo(f'✓ No hay marcaciones pendientes ({path})')
+        return
+    with open(path, encoding='utf-8') as f:
+        punches = [parse_punch(json.loads(line)['punch']) for line in f if line.strip()]
+    
+    batch_size = current_app.config['PUNCH_BATCH_SIZE']
+    written, errors = 0, []
+    for start in range(0, len(punches), batch_size):
+        result = apply_punches(punches[start:start + batch_size])
+        written += result['written']
+        errors.extend(result['errors'])
+    # Aplicado todo: el archivo se conserva renombrado como registro
+    os.replace(path, f"{path}.{datetime.utcnow():%Y%m%d%H%M%S}.done")
+    click.echo(f'✓ {len(punches)} marcaciones aplicadas ({written} asistencias escritas, {len(errors)} descartadas)')
+    for error in errors:
+        click.echo(f"  - {error['punch']}: {error['error']}")
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db():
+    """Crea las tablas e índices que falten (reemplaza el create_all al iniciar)"""
+    from app import db
+    
+    db.create_all()
+    click.echo('✓ Esquema de la base de datos creado')
+
+
+class LazyMigrateGroup(click.Group):
+    """
+    Grupo `flask db` que importa Flask-Migrate (y Alembic) solo al usarse,
+    para no cargarlos cada vez que arranca un worker
+    """
+
+    def _db_group(self):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_cli
+        from app import db
+        
+        if 'migrate' not in current_app.extensions:
+            Migrate(current_app, db)
+        return db_cli
+
+    def list_commands(self, ctx):
+        return self._db_group().list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._db_group().get_command(ctx, name)
+
+
+migrate_cli = LazyMigrateGroup('db', help='Migraciones de la base de datos (Flask-Migrate)')
+
+
+def register_commands(app):
+    """Registra los comandos en la aplicación"""
+    app.cli.add_command(summary_cli)
+    app.cli.add_command(payroll_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(payments_cli)
+    app.cli.add_command(punches_cli)
+    app.cli.add_command(init_db)
+    app.cli.add_command(migrate_cli)
@@ -0,0 +1,129 @@
+"""
+Compresión negociada de respuestas (gzip, y br / zstd si están instalados)
+
+Se comprimen las respuestas de tipos de texto (JSON, NDJSON, CSV...) según el
+Accept-Encoding de la petición:
+
+    - respuestas completas: solo si superan COMPRESSION_MIN_SIZE bytes
+    - respuestas en streaming (stream_query): se comprimen a medida que se
+      generan; cada fragmento comprimido se envía en cuanto el compresor lo
+      produce, sin esperar al final ni guardar todo el cuerpo en memoria
+
+No se tocan las respuestas que ya traen Content-Encoding (como los paquetes
+de /api/locale), los archivos enviados con send_file ni los 204/304.
+"""
+import gzip
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'application/xml', 'text/csv', 'text/plain', 'text/html', 'text/css',
+}
+
+
+def available_encodings():
+    """Codificaciones soportadas en orden de preferencia del servidor"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append('zstd')
+    if brotli is not None:
+        encodings.append('br')
+    encodings.append('gzip')
+    return encodings
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    config = current_app.config
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=config['COMPRESSION_ZSTD_LEVEL']).compress(body)
+    if encoding == 'br':
+        return brotli.compress(body, quality=config['COMPRESSION_BROTLI_QUALITY'])
+    return gzip.compress(body, compresslevel=config['COMPRESSION_GZIP_LEVEL'])
+
+
+class _StreamCompressor:
+    """Interfaz común (compress / finish) de los compresores incrementales"""
+
+    def __init__(self, encoding: str):
+        config = current_app.config
+        if encoding == 'zstd':
+            self._compressor = zstandard.ZstdCompressor(level=config['COMPRESSION_ZSTD_LEVEL']).compressobj()
+            self.compress, self.finish = self._compressor.compress, self._compressor.flush
+        elif encoding == 'br':
+            self._compressor = brotli.Compressor(quality=config['COMPRESSION_BROTLI_QUALITY'])
+            self.compress, self.finish = self._compressor.process, self._compressor.finish
+        else:
+            # wbits=31: formato gzip (cabecera y CRC)
+            self._compressor = zlib.compressobj(config['COMPRESSION_GZIP_LEVEL'], zlib.DEFLATED, 31)
+            self.compress, self.finish = self._compressor.compress, self._compressor.flush
+
+
+def _compress_stream(chunks: Iterable, compressor: _StreamCompressor) -> Iterator[bytes]:
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def _negotiate(response: Response) -> Optional[str]:
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return None
+    return request.accept_encodings.best_match(available_encodings())
+
+
+def _compress_response(response: Response) -> Response:
+    if not current_app.config.get('COMPRESSION_ENABLED'):
+        return response
+
+    encoding = _negotiate(response)
+    # Aunque no se comprima, la respuesta depende de Accept-Encoding
+    if response.mimetype in COMPRESSIBLE_MIMETYPES:
+        response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        # El compresor se crea aquí: el generador corre después de after_request
+        response.response = _compress_stream(response.response, _StreamCompressor(encoding))
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config['COMPRESSION_MIN_SIZE']:
+            return response
+        response.set_data(_compress(body, encoding))
+
+    response.content_encoding = encoding
+    # Un ETag fuerte identifica bytes exactos: distinguir cada codificación
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    return response
+
+
+def init_compression(app) -> None:
+    """Registra la compresión de respuestas (COMPRESSION_ENABLED)"""
+    app.after_request(_compress_response)
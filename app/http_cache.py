@@ -0,0 +1,73 @@
+"""
+Peticiones condicionales (ETag / Last-Modified) para los listados
+
+La versión de un listado es la cantidad de filas y el máximo updated_at de
+las filas que devuelve la consulta con sus filtros (una consulta agregada).
+El ETag combina esa versión con la URL y el Accept de la petición; si el
+cliente envía un If-None-Match que coincide se responde 304 sin consultar ni
+serializar las filas.
+
+Last-Modified no refleja las eliminaciones (solo cambia la cantidad), por lo
+que If-Modified-Since solo se usa cuando la petición no trae If-None-Match.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, Tuple
+
+from flask import Response, request
+from sqlalchemy import func
+
+
+def collection_version(query, *updated_columns) -> Tuple[int, Optional[datetime]]:
+    """Cantidad de filas de la consulta y el mayor valor de las columnas updated_at"""
+    row = query.with_entities(
+        func.count(), *[func.max(column) for column in updated_columns]
+    ).order_by(None).one()
+    timestamps = [value for value in row[1:] if value is not None]
+    return row[0], max(timestamps) if timestamps else None
+
+
+def _etag(version: Tuple[Any, ...]) -> str:
+    key = repr((request.full_path, request.headers.get('Accept'), version))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _http_date(value: Optional[datetime]) -> Optional[datetime]:
+    # updated_at se guarda en UTC sin zona; HTTP usa precisión de segundos
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _is_not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional_response(version: Tuple[int, Optional[datetime]],
+                         build: Callable[[], Response]) -> Response:
+    """
+    Responde 304 si el cliente ya tiene la versión actual; si no, construye la
+    respuesta con build() y le agrega ETag, Last-Modified y Cache-Control
+    """
+    etag = _etag(version)
+    last_modified = _http_date(version[1])
+
+    if _is_not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = build()
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    # El navegador puede guardar la respuesta pero debe revalidarla en cada uso
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept')
+    return response
+
@@ -0,0 +1,302 @@
+"""
+Instrumentación opcional por petición (INSTRUMENTATION_ENABLED=true)
+
+Por cada petición registra el tiempo total, la cantidad y el tiempo de las
+sentencias SQL, las filas cargadas (objetos del ORM o filas de los listados de
+app.serializers) y el tiempo de serialización JSON.
+Los valores se envían en la cabecera Server-Timing y se acumulan por endpoint
+en /metrics (formato de texto de Prometheus). Opcionalmente perfila con cProfile
+una fracción de las peticiones y guarda el perfil de las que resultan lentas.
+
+Las métricas son por proceso: con varios workers cada uno expone las suyas.
+En respuestas en streaming solo se cuenta lo ocurrido antes de enviar las cabeceras.
+"""
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Tuple
+
+from flask import Response, current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+from app import db
+
+# Límites (en segundos) del histograma de duración de peticiones
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestMetrics:
+    """Métricas de una petición (se guarda en flask.g)"""
+
+    __slots__ = ('start', 'sql_count', 'sql_time', 'rows', 'serialization_time', 'profiler')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.serialization_time = 0.0
+        self.profiler = None
+
+
+def _current_metrics():
+    if has_request_context():
+        return g.get('_request_metrics')
+    return None
+
+
+class MetricsRegistry:
+    """Acumula las métricas por (método, endpoint, estado) de forma segura entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.requests = defaultdict(int)
+        self.duration_sum = defaultdict(float)
+        self.duration_buckets = defaultdict(lambda: [0] * len(DURATION_BUCKETS))
+        self.sql_count = defaultdict(int)
+        self.sql_time = defaultdict(float)
+        self.rows = defaultdict(int)
+        self.serialization_time = defaultdict(float)
+        self.slow_requests = defaultdict(int)
+
+    def record(self, labels: Tuple[str, str, str], duration: float, metrics: RequestMetrics, slow: bool):
+        endpoint_labels = labels[:2]
+        with self._lock:
+            self.requests[labels] += 1
+            self.duration_sum[endpoint_labels] += duration
+            buckets = self.duration_buckets[endpoint_labels]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    buckets[index] += 1
+            self.sql_count[endpoint_labels] += metrics.sql_count
+            self.sql_time[endpoint_labels] += metrics.sql_time
+            self.rows[endpoint_labels] += metrics.rows
+            self.serialization_time[endpoint_labels] += metrics.serialization_time
+            if slow:
+                self.slow_requests[endpoint_labels] += 1
+
+    def render(self) -> str:
+        """Exposición en formato de texto de Prometheus"""
+        def label_text(labels: Tuple[str, ...], names=('method', 'endpoint', 'status'), extra: str = '') -> str:
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, labels)]
+            if extra:
+                pairs.append(extra)
+            return '{' + ','.join(pairs) + '}'
+
+        lines = []
+
+        def family(name: str, kind: str, help_text: str, values: Dict, fmt=repr):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(values.items()):
+                lines.append(f'{name}{label_text(labels)} {fmt(value)}')
+
+        with self._lock:
+            family('nominaplus_http_requests_total', 'counter',
+                   'Peticiones HTTP atendidas', self.requests, str)
+
+            lines.append('# HELP nominaplus_http_request_duration_seconds Duración de las peticiones HTTP')
+            lines.append('# TYPE nominaplus_http_request_duration_seconds histogram')
+            for labels, buckets in sorted(self.duration_buckets.items()):
+                for bound, count in zip(DURATION_BUCKETS, buckets):
+                    bucket_labels = label_text(labels, extra='le="%s"' % bound)
+                    lines.append(f'nominaplus_http_request_duration_seconds_bucket{bucket_labels} {count}')
+                total = sum(count for key, count in self.requests.items() if key[:2] == labels)
+                bucket_labels = label_text(labels, extra='le="+Inf"')
+                lines.append(f'nominaplus_http_request_duration_seconds_bucket{bucket_labels} {total}')
+                lines.append(f'nominaplus_http_request_duration_seconds_sum{label_text(labels)} '
+                             f'{self.duration_sum[labels]!r}')
+                lines.append(f'nominaplus_http_request_duration_seconds_count{label_text(labels)} {total}')
+
+            family('nominaplus_sql_statements_total', 'counter',
+                   'Sentencias SQL ejecutadas durante peticiones', self.sql_count, str)
+            family('nominaplus_sql_duration_seconds_total', 'counter',
+                   'Tiempo en sentencias SQL durante peticiones', self.sql_time)
+            family('nominaplus_orm_rows_loaded_total', 'counter',
+                   'Filas cargadas durante peticiones (objetos del ORM y filas de los listados)', self.rows, str)
+            family('nominaplus_serialization_seconds_total', 'counter',
+                   'Tiempo de serialización JSON durante peticiones', self.serialization_time)
+            family('nominaplus_slow_requests_total', 'counter',
+                   'Peticiones que superaron INSTRUMENTATION_SLOW_MS', self.slow_requests, str)
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+# ==================== EVENTOS DE SQLALCHEMY ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_metrics() is not None:
+        context._instrumentation_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current_metrics()
+    if metrics is None:
+        return
+    metrics.sql_count += 1
+    start = getattr(context, '_instrumentation_start', None)
+    if start is not None:
+        metrics.sql_time += time.perf_counter() - start
+
+
+def _on_load(target, context):
+    metrics = _current_metrics()
+    if metrics is not None:
+        metrics.rows += 1
+
+
+def _listen_once(target, name, fn, **kwargs):
+    if not event.contains(target, name, fn):
+        event.listen(target, name, fn, **kwargs)
+
+
+# ==================== SERIALIZACIÓN ====================
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Proveedor JSON de Flask que suma el tiempo de dumps a la petición actual"""
+
+    def dumps(self, obj, **kwargs):
+        metrics = _current_metrics()
+        if metrics is None:
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            metrics.serialization_time += time.perf_counter() - start
+
+
+@contextmanager
+def track_serialization(rows: int = 0):
+    """
+    Suma a la petición actual el tiempo del bloque y las filas que serializa
+    (para app.serializers, que lee tuplas sin crear objetos del ORM y arma el
+    JSON sin pasar por app.json)
+    """
+    metrics = _current_metrics()
+    if metrics is None:
+        yield
+        return
+    metrics.rows += rows
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialization_time += time.perf_counter() - start
+
+
+# ==================== HOOKS DE FLASK ====================
+
+def _before_request():
+    metrics = RequestMetrics()
+    g._request_metrics = metrics
+
+    sample_rate = current_app.config['INSTRUMENTATION_PROFILE_SAMPLE_RATE']
+    if sample_rate and random.random() < sample_rate:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Ya hay otro perfilador activo en este hilo
+            return
+        metrics.profiler = profiler
+
+
+def _endpoint_label() -> str:
+    if request.url_rule is not None:
+        return request.url_rule.rule
+    return 'unmatched'
+
+
+def _dump_profile(profiler: cProfile.Profile, endpoint: str, duration: float):
+    """Guarda el perfil de una petición lenta (se abre con pstats o snakeviz)"""
+    directory = current_app.config['INSTRUMENTATION_PROFILE_DIR']
+    os.makedirs(directory, exist_ok=True)
+    name = re.sub(r'[^A-Za-z0-9]+', '_', f'{request.method}{endpoint}').strip('_')
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    path = os.path.join(directory, f'{stamp}-{name}-{duration * 1000:.0f}ms.prof')
+    profiler.dump_stats(path)
+    return path
+
+
+def _after_request(response: Response) -> Response:
+    metrics = g.pop('_request_metrics', None)
+    if metrics is None:
+        return response
+
+    duration = time.perf_counter() - metrics.start
+    if metrics.profiler is not None:
+        metrics.profiler.disable()
+
+    endpoint = _endpoint_label()
+    slow = duration * 1000 >= current_app.config['INSTRUMENTATION_SLOW_MS']
+    registry.record((request.method, endpoint, str(response.status_code)), duration, metrics, slow)
+
+    response.headers.add(
+        'Server-Timing',
+        f'app;dur={duration * 1000:.2f}, '
+        f'sql;dur={metrics.sql_time * 1000:.2f};desc="{metrics.sql_count} queries", '
+        f'rows;desc="{metrics.rows}", '
+        f'ser;dur={metrics.serialization_time * 1000:.2f}'
+    )
+
+    if slow:
+        profile_path = None
+        if metrics.profiler is not None:
+            profile_path = _dump_profile(metrics.profiler, endpoint, duration)
+        current_app.logger.warning(
+            'Petición lenta %s %s: %.1f ms, %d SQL (%.1f ms), %d filas, serialización %.1f ms%s',
+            request.method, request.path, duration * 1000, metrics.sql_count, metrics.sql_time * 1000,
+            metrics.rows, metrics.serialization_time * 1000,
+            f', perfil en {profile_path}' if profile_path else ''
+        )
+    return response
+
+
+def _teardown_request(exc):
+    # Si after_request no llegó a ejecutarse, detener el perfilador igualmente
+    metrics = g.pop('_request_metrics', None)
+    if metrics is not None and metrics.profiler is not None:
+        metrics.profiler.disable()
+
+
+def metrics_view():
+    """Métricas acumuladas de este proceso en formato de texto de Prometheus"""
+    return Response(registry.render(), content_type=PROMETHEUS_MIMETYPE)
+
+
+def init_instrumentation(app) -> bool:
+    """Activa la instrumentación si INSTRUMENTATION_ENABLED está activo"""
+    if not app.config.get('INSTRUMENTATION_ENABLED'):
+        return False
+
+    app.json = TimedJSONProvider(app)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    with app.app_context():
+        _listen_once(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        _listen_once(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    _listen_once(db.Model, 'load', _on_load, propagate=True)
+    return True
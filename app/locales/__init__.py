@@ -1,7 +1,13 @@
 """
 Sistema de localización (i18n) para NominaPlus
-"""
-from app.locales.translations import get_translations, get_currency_info
 
+Las traducciones se importan al primer uso (no al crear la aplicación).
+"""
 __all__ = ['get_translations', 'get_currency_info']
 
+
+def __getattr__(name):
+    if name in __all__:
+        from app.locales import translations
+        return getattr(translations, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
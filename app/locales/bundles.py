@@ -0,0 +1,113 @@
+"""
+Paquetes de localización precalculados para /api/locale
+
+Para cada país se serializa una sola vez por proceso (en la primera petición,
+para no cargar las traducciones al arrancar) la misma respuesta que producía
+jsonify, junto con sus versiones comprimidas con gzip y, si el paquete
+`brotli` está instalado, con br. El hash del contenido es la versión del
+paquete: /api/locale/<país>/<versión> se sirve como inmutable y
+/api/locale lista la URL vigente de cada país.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+# Un año: el contenido de una URL versionada no cambia nunca
+IMMUTABLE_MAX_AGE = 31536000
+
+
+@dataclass(frozen=True)
+class LocaleBundle:
+    """Respuesta serializada de un país y sus variantes comprimidas"""
+    country_code: str
+    version: str
+    body: bytes
+    encoded: Dict[str, bytes]
+
+
+_bundles: Optional[Dict[str, LocaleBundle]] = None
+_lock = threading.Lock()
+
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    encoded = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(body, quality=11)
+    return encoded
+
+
+def build_bundles() -> Dict[str, LocaleBundle]:
+    """Serializa y comprime el paquete de cada país con traducciones"""
+    from app.locales.translations import TRANSLATIONS, get_currency_info, get_translations
+
+    bundles = {}
+    for country_code in sorted(TRANSLATIONS):
+        payload = {
+            'success': True,
+            'data': {
+                'translations': get_translations(country_code),
+                'currency': get_currency_info(country_code),
+            }
+        }
+        # Mismos bytes que jsonify fuera de modo debug
+        body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+        bundles[country_code] = LocaleBundle(
+            country_code=country_code,
+            version=hashlib.sha256(body).hexdigest()[:16],
+            body=body,
+            encoded=_compress(body),
+        )
+    return bundles
+
+
+def get_bundles() -> Dict[str, LocaleBundle]:
+    global _bundles
+    if _bundles is None:
+        with _lock:
+            if _bundles is None:
+                _bundles = build_bundles()
+    return _bundles
+
+
+def get_bundle(country_code: str) -> LocaleBundle:
+    """Paquete del país (el de GT para países sin traducciones, como get_translations)"""
+    bundles = get_bundles()
+    return bundles.get(country_code.upper(), bundles['GT'])
+
+
+def bundle_response(bundle: LocaleBundle, immutable: bool = False) -> Response:
+    """
+    Respuesta con la mejor codificación aceptada por el cliente y ETag por
+    representación; 304 si el cliente ya la tiene
+    """
+    encoding = None
+    for candidate in ('br', 'gzip'):
+        if candidate in bundle.encoded and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+    etag = bundle.version if encoding is None else f'{bundle.version}-{encoding}'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(bundle.encoded[encoding] if encoding else bundle.body, mimetype='application/json')
+        if encoding:
+            response.content_encoding = encoding
+
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if immutable:
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = f"public, max-age={current_app.config['LOCALE_CACHE_MAX_AGE']}"
+    return response
@@ -116,18 +116,21 @@ COUNTRY_CONFIG: Dict[str, Dict[str, Any]] = {
         'obra_social_rate': 0.03,  # 3%
         'pami_rate': 0.03,  # 3%
         'total_aportes_rate': 0.17,  # 17% total
+        'timezone': 'America/Argentina/Buenos_Aires',
     },
     'GT': {
         'legal_workday_hours': 8,
         'legal_workweek_hours': 48,
         'overtime_weekday_multiplier': 1.5,
         'overtime_weekend_multiplier': 2.0,
+        'timezone': 'America/Guatemala',
     },
     'ES': {
         'legal_workday_hours': 8,
         'legal_workweek_hours': 40,
         'overtime_weekday_multiplier': 1.5,
         'overtime_weekend_multiplier': 2.0,
+        'timezone': 'Europe/Madrid',
     },
 }
 
@@ -153,10 +156,22 @@ def get_country_config(country_code: str = 'GT') -> Dict[str, Any]:
     return COUNTRY_CONFIG.get(country_code.upper(), COUNTRY_CONFIG['GT'])
 
 
+# Traducciones de cada país completadas con las de GT: una sola búsqueda por clave
+MERGED_TRANSLATIONS: Dict[str, Dict[str, str]] = {
+    country_code: {**TRANSLATIONS['GT'], **translations}
+    for country_code, translations in TRANSLATIONS.items()
+}
+# Mismas tablas con el código tal como llega en minúsculas (evita upper() en cada llamada)
+MERGED_TRANSLATIONS.update({country_code.lower(): table for country_code, table in list(MERGED_TRANSLATIONS.items())})
+
+
 def translate(key: str, country_code: str = 'GT', default: str = None) -> str:
     """
-    Traduce una clave según el país
+    Traduce una clave según el país; si el país no la define se usa la de GT
     """
-    translations = get_translations(country_code)
-    return translations.get(key, default or key)
+    translations = MERGED_TRANSLATIONS.get(country_code)
+    if translations is None:
+        translations = MERGED_TRANSLATIONS.get(country_code.upper(), MERGED_TRANSLATIONS['GT'])
+    value = translations.get(key)
+    return value if value is not None else (default or key)
 
@@ -1,7 +1,13 @@
 """
 Lógica de negocio y calculadoras por país
+
+Las calculadoras se importan al primer uso (no al crear la aplicación).
 """
-from app.logic.calculators import BaseCalculator, get_calculator
+__all__ = ['BaseCalculator', 'CountryRules', 'get_calculator', 'get_country_rules']
 
-__all__ = ['BaseCalculator', 'get_calculator']
 
+def __getattr__(name):
+    if name in __all__:
+        from app.logic import calculators
+        return getattr(calculators, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
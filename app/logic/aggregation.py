@@ -0,0 +1,71 @@
+"""
+Agregación de horas en la base de datos para el cálculo de nómina
+
+En lugar de traer cada asistencia a Python, la base de datos suma por empleado
+las horas regulares (topadas por la jornada legal de su país) y las horas
+extras separadas en días hábiles y fines de semana/feriados.
+"""
+from decimal import Decimal
+from typing import Dict, List, Any
+
+from sqlalchemy import Numeric, and_, case, extract, func, literal, not_, or_, type_coerce
+
+from app import db
+from app.models import Employee, Attendance
+from app.logic.calculators import HoursAggregate, get_legal_hours_by_country
+from app.utils import get_period_dates
+
+HOURS_QUANTUM = Decimal('0.01')
+
+
+def _hours(value) -> Decimal:
+    """
+    Normaliza una suma de horas a 2 decimales (en SQLite las sumas de NUMERIC
+    se hacen en coma flotante; las horas se guardan con 2 decimales)
+    """
+    return Decimal(str(value or 0)).quantize(HOURS_QUANTUM)
+
+
+def aggregate_period_hours(period: str, filters: List[Any]) -> Dict[int, HoursAggregate]:
+    """
+    Suma con GROUP BY las horas del período de los empleados que cumplen los filtros
+
+    Devuelve un HoursAggregate por empleado con asistencias; el resultado es
+    el mismo que aggregate_hours de la calculadora sobre las filas del período.
+    """
+    start_date, end_date = get_period_dates(period)
+    legal_hours_by_country = get_legal_hours_by_country()
+
+    hours_type = Numeric(12, 2)
+    legal_hours = case(
+        {country_code: literal(hours, hours_type) for country_code, hours in legal_hours_by_country.items()},
+        value=func.upper(Employee.country_code),
+        else_=literal(legal_hours_by_country['GT'], hours_type)
+    )
+    hours = func.coalesce(Attendance.hours_worked, 0)
+    # extract(dow): 0 = domingo, 6 = sábado (PostgreSQL y SQLite)
+    is_weekend = or_(extract('dow', Attendance.date).in_([0, 6]), Attendance.is_holiday)
+    is_overtime = hours > legal_hours
+
+    def total(expression):
+        return type_coerce(func.sum(expression), hours_type)
+
+    rows = db.session.query(
+        Attendance.employee_id,
+        total(hours),
+        total(case((is_overtime, legal_hours), else_=hours)),
+        total(case((and_(is_overtime, not_(is_weekend)), hours - legal_hours), else_=0)),
+        total(case((and_(is_overtime, is_weekend), hours - legal_hours), else_=0)),
+    ).join(Employee).filter(
+        *filters,
+        Attendance.date >= start_date,
+        Attendance.date <= end_date,
+        ~Attendance.is_vacation  # Excluir vacaciones
+    ).group_by(Attendance.employee_id).all()
+
+    return {
+        employee_id: HoursAggregate(
+            _hours(total_hours), _hours(regular_hours), _hours(overtime_weekday), _hours(overtime_weekend)
+        )
+        for employee_id, total_hours, regular_hours, overtime_weekday, overtime_weekend in rows
+    }
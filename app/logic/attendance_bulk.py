@@ -0,0 +1,218 @@
+"""
+Ingesta masiva de asistencias (exportaciones de relojes biométricos)
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time
+from typing import Dict, List, Any, Tuple
+
+from sqlalchemy import insert
+
+from app import db
+from app.models import Employee, Attendance
+from app.logic.incremental import mark_payrolls_dirty
+from app.logic.summary import refresh_period_summaries
+
+# Filas por ejecución del INSERT (executemany; con psycopg2 SQLAlchemy las agrupa
+# en sentencias INSERT multi-fila)
+INSERT_CHUNK_SIZE = 1000
+
+# IDs por consulta IN (límite de parámetros de SQLite)
+IN_CHUNK_SIZE = 900
+
+UPSERT_COLUMNS = ('in_time', 'out_time', 'hours_worked', 'is_holiday', 'is_vacation', 'notes', 'updated_at')
+
+TRUE_VALUES = ('1', 'true', 't', 'yes', 'y', 'si', 'sí')
+
+
+def parse_records(body: bytes, content_type: str) -> List[Dict[str, Any]]:
+    """
+    Convierte el cuerpo de la petición en una lista de registros
+
+    Soporta un arreglo JSON (o {"records": [...]}), CSV con encabezados y NDJSON.
+    Lanza ValueError si el cuerpo no se puede interpretar.
+    """
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    text = body.decode('utf-8-sig')
+
+    if content_type == 'text/csv':
+        return [dict(row) for row in csv.DictReader(io.StringIO(text))]
+
+    if content_type in ('application/x-ndjson', 'application/jsonl'):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get('records')
+    if not isinstance(data, list):
+        raise ValueError('Se esperaba un arreglo de registros')
+    return data
+
+
+def _parse_bool(value: Any) -> bool:
+    """Interpreta booleanos de JSON o de texto (CSV)"""
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def _parse_time(value: Any, field: str) -> time:
+    """Hora HH:MM:SS como en create_attendance (sin fracciones de segundo ni zona horaria)"""
+    try:
+        return datetime.strptime(str(value), '%H:%M:%S').time()
+    except ValueError:
+        raise ValueError(f'{field} debe tener el formato HH:MM:SS (sin fracciones ni zona horaria): {value}') from None
+
+
+def _parse_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida y normaliza un registro de asistencia
+    Lanza ValueError con el motivo si el registro no es válido
+    """
+    if not isinstance(record, dict):
+        raise ValueError('El registro debe ser un objeto')
+    if not record.get('employee_id') or not record.get('date') or not record.get('in_time'):
+        raise ValueError('Faltan campos requeridos: employee_id, date, in_time')
+
+    try:
+        attendance_date = datetime.strptime(str(record['date']), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"date debe tener el formato YYYY-MM-DD: {record['date']}") from None
+    in_time = _parse_time(record['in_time'], 'in_time')
+    out_time = _parse_time(record['out_time'], 'out_time') if record.get('out_time') else None
+
+    return {
+        'employee_id': int(record['employee_id']),
+        'date': attendance_date,
+        'in_time': in_time,
+        'out_time': out_time,
+        'hours_worked': Attendance.compute_hours(attendance_date, in_time, out_time),
+        'is_holiday': _parse_bool(record.get('is_holiday', False)),
+        'is_vacation': _parse_bool(record.get('is_vacation', False)),
+        'notes': record.get('notes') or None,
+    }
+
+
+def existing_employee_ids(employee_ids: List[int]) -> set:
+    """Verifica la existencia de los empleados con consultas IN por bloques"""
+    existing = set()
+    for start in range(0, len(employee_ids), IN_CHUNK_SIZE):
+        chunk = employee_ids[start:start + IN_CHUNK_SIZE]
+        existing.update(
+            employee_id for (employee_id,) in
+            db.session.query(Employee.id).filter(Employee.id.in_(chunk))
+        )
+    return existing
+
+
+def _upsert_statement():
+    """
+    INSERT con ON CONFLICT (employee_id, date) DO UPDATE para PostgreSQL y SQLite
+    (se compila una sola vez y se ejecuta con todas las filas del bloque)
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    stmt = dialect_insert(Attendance.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=['employee_id', 'date'],
+        set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS}
+    )
+
+
+def _generic_upsert(rows: List[Dict[str, Any]]) -> None:
+    """Alternativa portable: actualiza las filas existentes e inserta el resto"""
+    keys = [(row['employee_id'], row['date']) for row in rows]
+    existing = dict(
+        ((employee_id, attendance_date), attendance_id)
+        for attendance_id, employee_id, attendance_date in
+        db.session.query(Attendance.id, Attendance.employee_id, Attendance.date).filter(
+            Attendance.employee_id.in_({key[0] for key in keys}),
+            Attendance.date.in_({key[1] for key in keys})
+        )
+    )
+    updates = []
+    inserts = []
+    for key, row in zip(keys, rows):
+        if key in existing:
+            updates.append({'id': existing[key], **{column: row[column] for column in UPSERT_COLUMNS}})
+        else:
+            inserts.append(row)
+    if updates:
+        db.session.bulk_update_mappings(Attendance, updates)
+    if inserts:
+        db.session.connection().execute(insert(Attendance.__table__), inserts)
+
+
+def upsert_attendance_rows(rows: List[Dict[str, Any]]) -> None:
+    """
+    Inserta o actualiza filas completas de asistencia por bloques, recalcula
+    period_summary de los períodos afectados y marca sus nóminas para
+    recálculo (no hace commit)
+    """
+    stmt = _upsert_statement()
+    connection = db.session.connection()
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + INSERT_CHUNK_SIZE]
+        if stmt is not None:
+            connection.execute(stmt, chunk)
+        else:
+            _generic_upsert(chunk)
+
+    # El INSERT masivo no pasa por el ORM: recalcular los períodos afectados
+    # y marcar las nóminas de cada empleado para el recálculo incremental
+    refresh_period_summaries({row['date'].strftime('%Y-%m') for row in rows})
+    mark_payrolls_dirty((row['employee_id'], row['date'].strftime('%Y-%m')) for row in rows)
+
+
+def ingest_attendances(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Valida e inserta (o actualiza) un lote de asistencias en una sola transacción
+
+    Los registros inválidos o de empleados inexistentes se reportan por fila sin
+    abortar el lote. Si un mismo empleado y fecha aparece varias veces, se
+    conserva la última ocurrencia.
+    """
+    errors = []
+    parsed: Dict[Tuple[int, date], Tuple[int, Dict[str, Any]]] = {}
+    duplicates = 0
+
+    for index, record in enumerate(records):
+        try:
+            row = _parse_record(record)
+        except (ValueError, TypeError) as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        key = (row['employee_id'], row['date'])
+        if key in parsed:
+            duplicates += 1
+        parsed[key] = (index, row)
+
+    # Validar todos los empleados del lote con consultas IN
+    existing = existing_employee_ids(sorted({key[0] for key in parsed}))
+    now = datetime.utcnow()
+    rows = []
+    for (employee_id, _), (index, row) in parsed.items():
+        if employee_id not in existing:
+            errors.append({'index': index, 'error': f'Empleado {employee_id} no encontrado'})
+            continue
+        row['created_at'] = now
+        row['updated_at'] = now
+        rows.append(row)
+
+    upsert_attendance_rows(rows)
+    db.session.commit()
+
+    errors.sort(key=lambda error: error['index'])
+    return {
+        'received': len(records),
+        'upserted': len(rows),
+        'duplicates': duplicates,
+        'errors': errors,
+    }
@@ -0,0 +1,105 @@
+"""
+Caché LRU en memoria de los cálculos de nómina por empleado y período
+
+La clave incluye todo lo que determina el resultado: empleado, período, tarifa
+por hora, país, motor, bonificaciones, descuentos y la versión de las
+asistencias del período (cantidad y máximo updated_at). La versión se obtiene
+con una consulta agregada sobre el índice (employee_id, date), en lugar de
+traer y sumar cada asistencia, y hace que la caché siga siendo correcta
+aunque otro proceso escriba asistencias. Además, los endpoints de escritura
+de asistencias y empleados invalidan explícitamente las entradas del empleado.
+
+El tamaño se configura con PAYROLL_CACHE_SIZE (0 desactiva la caché). Cada
+proceso tiene su propia caché; los resultados no deben modificarse.
+"""
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import Attendance, Employee
+
+
+def attendance_version(employee_id: int, start_date, end_date) -> Tuple[int, Any]:
+    """Cantidad y último updated_at de las asistencias del empleado en el rango"""
+    count, last_updated = db.session.query(func.count(Attendance.id), func.max(Attendance.updated_at)).filter(
+        Attendance.employee_id == employee_id,
+        Attendance.date >= start_date,
+        Attendance.date <= end_date,
+    ).one()
+    return count, last_updated
+
+
+def calculation_key(employee: Employee, period: str, version: Tuple[int, Any], engine: str,
+                    bonuses: Decimal, deductions: Decimal) -> Tuple[Hashable, ...]:
+    """Clave de caché de un cálculo (los Decimal se normalizan: 10 == 10.00)"""
+    return (
+        employee.id, period, Decimal(employee.hourly_rate).normalize(), (employee.country_code or 'GT').upper(),
+        version, engine, Decimal(bonuses).normalize(), Decimal(deductions).normalize(),
+    )
+
+
+class CalculationCache:
+    """LRU con bloqueo (los hilos del servidor comparten la instancia)"""
+
+    def __init__(self):
+        self._entries: 'OrderedDict[Tuple[Hashable, ...], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _maxsize() -> int:
+        return current_app.config.get('PAYROLL_CACHE_SIZE', 0)
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def set(self, key: Tuple[Hashable, ...], result: Dict[str, Any]) -> None:
+        maxsize = self._maxsize()
+        if maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_employees(self, employee_ids: Iterable[int]) -> int:
+        """Elimina todas las entradas de los empleados; devuelve cuántas"""
+        employee_ids = set(employee_ids)
+        with self._lock:
+            keys = [key for key in self._entries if key[0] in employee_ids]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self._maxsize(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+calculation_cache = CalculationCache()
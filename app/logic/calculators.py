@@ -2,28 +2,148 @@
 Calculadoras de nómina por país usando Strategy Pattern
 """
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from decimal import Decimal
 from datetime import date, datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 from app.models import Employee, Attendance
-from app.locales.translations import get_country_config, get_currency_info
+from app.locales.translations import COUNTRY_CONFIG, get_country_config, get_currency_info
+
+
+@dataclass(frozen=True)
+class CountryRules:
+    """Reglas de cálculo de un país con las tasas ya convertidas a Decimal"""
+    country_code: str
+    legal_workday_hours: Decimal
+    legal_workweek_hours: Optional[Decimal]
+    overtime_weekday_multiplier: Decimal
+    overtime_weekend_multiplier: Decimal
+    # Aportes de ley del empleado: ((nombre, tasa), ...)
+    aportes: Tuple[Tuple[str, Decimal], ...]
+    config: Mapping[str, Any]
+    currency_info: Mapping[str, Any]
+
+
+def _to_decimal(value: Any) -> Decimal:
+    """Convierte un valor de configuración a Decimal (igual que Decimal(str(...)))"""
+    return Decimal(str(value))
+
+
+@lru_cache(maxsize=None)
+def _build_country_rules(country_code: str) -> CountryRules:
+    config = get_country_config(country_code)
+    aportes = tuple(
+        (name, _to_decimal(config[f'{name}_rate']))
+        for name in ('jubilacion', 'obra_social', 'pami')
+        if f'{name}_rate' in config
+    )
+    return CountryRules(
+        country_code=country_code,
+        legal_workday_hours=_to_decimal(config['legal_workday_hours']),
+        legal_workweek_hours=(_to_decimal(config['legal_workweek_hours'])
+                              if 'legal_workweek_hours' in config else None),
+        overtime_weekday_multiplier=_to_decimal(config['overtime_weekday_multiplier']),
+        overtime_weekend_multiplier=_to_decimal(config['overtime_weekend_multiplier']),
+        aportes=aportes,
+        config=MappingProxyType(dict(config)),
+        currency_info=MappingProxyType(dict(get_currency_info(country_code))),
+    )
+
+
+def get_country_rules(country_code: str = 'GT') -> CountryRules:
+    """
+    Obtiene las reglas precompiladas (inmutables y compartidas) de un país
+    Los países sin configuración usan las reglas de Guatemala
+    """
+    country_code = (country_code or 'GT').upper()
+    if country_code not in COUNTRY_CONFIG:
+        country_code = 'GT'
+    return _build_country_rules(country_code)
+
+
+@dataclass(frozen=True)
+class HoursAggregate:
+    """
+    Horas de un empleado en un período, ya sumadas por tipo de día
+    (las horas regulares están topadas por la jornada legal de cada día)
+    """
+    total_hours: Decimal = Decimal('0')
+    regular_hours: Decimal = Decimal('0')
+    overtime_hours_weekday: Decimal = Decimal('0')
+    overtime_hours_weekend: Decimal = Decimal('0')
 
 
 class BaseCalculator(ABC):
-    """Clase base para calculadoras de nómina"""
+    """
+    Clase base para calculadoras de nómina
+
+    Las calculadoras no guardan estado por empleado: hay una instancia por país
+    (ver get_calculator) y el empleado se recibe en cada cálculo.
+    """
     
-    def __init__(self, employee: Employee):
-        self.employee = employee
-        self.country_code = employee.country_code or 'GT'
-        self.config = get_country_config(self.country_code)
-        self.currency_info = get_currency_info(self.country_code)
+    def __init__(self, country_code: str = 'GT'):
+        self.rules = get_country_rules(country_code)
+        self.country_code = self.rules.country_code
+        self.config = self.rules.config
+        self.currency_info = self.rules.currency_info
     
-    @abstractmethod
-    def calculate_payroll(self, attendances: List[Attendance], period: str, 
+    @property
+    def legal_hours(self) -> Decimal:
+        """Jornada diaria a partir de la cual se cuentan horas extras"""
+        return self.rules.legal_workday_hours
+    
+    def aggregate_hours(self, attendances: List[Attendance]) -> HoursAggregate:
+        """
+        Suma las horas de las asistencias separando horas regulares y horas
+        extras en días hábiles y en fines de semana/feriados (sin vacaciones)
+        """
+        total_hours = Decimal('0')
+        overtime_hours_weekday = Decimal('0')
+        overtime_hours_weekend = Decimal('0')
+        regular_hours = Decimal('0')
+        
+        legal_hours = self.legal_hours
+        
+        for att in attendances:
+            if att.hours_worked and not att.is_vacation:
+                hours = Decimal(str(att.hours_worked))
+                total_hours += hours
+                
+                # Determinar si es fin de semana o feriado
+                is_weekend = att.date.weekday() >= 5 or att.is_holiday
+                
+                if hours > legal_hours:
+                    regular_hours += legal_hours
+                    overtime = hours - legal_hours
+                    
+                    if is_weekend:
+                        overtime_hours_weekend += overtime
+                    else:
+                        overtime_hours_weekday += overtime
+                else:
+                    regular_hours += hours
+        
+        return HoursAggregate(total_hours, regular_hours, overtime_hours_weekday, overtime_hours_weekend)
+    
+    def calculate_payroll(self, employee: Employee, attendances: List[Attendance], period: str,
                          bonuses: Decimal = Decimal('0'), 
                          deductions: Decimal = Decimal('0')) -> Dict[str, Any]:
         """
-        Calcula la nómina basándose en las asistencias
+        Calcula la nómina de un empleado basándose en las asistencias
+        """
+        return self.calculate_from_aggregate(
+            employee, self.aggregate_hours(attendances), period, bonuses, deductions
+        )
+    
+    @abstractmethod
+    def calculate_from_aggregate(self, employee: Employee, hours: HoursAggregate, period: str,
+                                 bonuses: Decimal = Decimal('0'),
+                                 deductions: Decimal = Decimal('0')) -> Dict[str, Any]:
+        """
+        Calcula la nómina a partir de las horas ya sumadas del período
+        (por ejemplo, agregadas en la base de datos)
         """
         pass
     
@@ -31,55 +151,50 @@ class BaseCalculator(ABC):
         """
         Calcula las horas extras según el tipo de día
         """
-        multiplier = (self.config['overtime_weekend_multiplier'] 
+        multiplier = (self.rules.overtime_weekend_multiplier
                      if is_weekend 
-                     else self.config['overtime_weekday_multiplier'])
+                     else self.rules.overtime_weekday_multiplier)
         return hours * multiplier
     
     def get_regular_hours(self, total_hours: Decimal) -> Decimal:
         """
         Obtiene las horas regulares (hasta el límite legal)
         """
-        legal_hours = Decimal(str(self.config['legal_workday_hours']))
-        return min(total_hours, legal_hours)
+        return min(total_hours, self.rules.legal_workday_hours)
     
     def get_overtime_hours(self, total_hours: Decimal) -> Decimal:
         """
         Obtiene las horas extras (por encima del límite legal)
         """
-        legal_hours = Decimal(str(self.config['legal_workday_hours']))
-        return max(Decimal('0'), total_hours - legal_hours)
+        return max(Decimal('0'), total_hours - self.rules.legal_workday_hours)
 
 
 class GuatemalaCalculator(BaseCalculator):
     """Calculadora para Guatemala (lógica original)"""
     
-    def calculate_payroll(self, attendances: List[Attendance], period: str,
-                         bonuses: Decimal = Decimal('0'),
-                         deductions: Decimal = Decimal('0')) -> Dict[str, Any]:
+    # Jornada y recargo fijos de la lógica original
+    REGULAR_HOURS = Decimal('8')
+    OVERTIME_MULTIPLIER = Decimal('1.5')  # 50% extra
+    
+    @property
+    def legal_hours(self) -> Decimal:
+        """Horas extras a partir de 8 horas por día"""
+        return self.REGULAR_HOURS
+    
+    def calculate_from_aggregate(self, employee: Employee, hours: HoursAggregate, period: str,
+                                 bonuses: Decimal = Decimal('0'),
+                                 deductions: Decimal = Decimal('0')) -> Dict[str, Any]:
         """
         Calcula la nómina para Guatemala
+        (todas las horas extras con el mismo recargo)
         """
-        total_hours = Decimal('0')
-        overtime_hours = Decimal('0')
-        regular_hours = Decimal('0')
-        
-        for att in attendances:
-            if att.hours_worked:
-                hours = Decimal(str(att.hours_worked))
-                total_hours += hours
-                
-                # Considerar horas extras (más de 8 horas por día)
-                if hours > 8:
-                    regular_hours += Decimal('8')
-                    overtime_hours += (hours - Decimal('8'))
-                else:
-                    regular_hours += hours
+        regular_hours = hours.regular_hours
+        overtime_hours = hours.overtime_hours_weekday + hours.overtime_hours_weekend
         
         # Calcular salarios
-        hourly_rate = Decimal(str(self.employee.hourly_rate))
+        hourly_rate = Decimal(str(employee.hourly_rate))
         base_salary = regular_hours * hourly_rate
-        overtime_rate = hourly_rate * Decimal('1.5')  # 50% extra
+        overtime_rate = hourly_rate * self.OVERTIME_MULTIPLIER
         overtime_pay = overtime_hours * overtime_rate
         
         total_amount = base_salary + overtime_pay + bonuses - deductions
@@ -93,7 +208,7 @@ class GuatemalaCalculator(BaseCalculator):
             'deductions': deductions,
             'total_amount': total_amount,
             'summary': {
-                'total_hours': float(total_hours),
+                'total_hours': float(hours.total_hours),
                 'regular_hours': float(regular_hours),
                 'overtime_hours': float(overtime_hours),
             }
@@ -103,46 +218,24 @@ class GuatemalaCalculator(BaseCalculator):
 class ArgentinaCalculator(BaseCalculator):
     """Calculadora para Argentina con aportes de ley"""
     
-    def calculate_payroll(self, attendances: List[Attendance], period: str,
-                         bonuses: Decimal = Decimal('0'),
-                         deductions: Decimal = Decimal('0')) -> Dict[str, Any]:
+    def calculate_from_aggregate(self, employee: Employee, hours: HoursAggregate, period: str,
+                                 bonuses: Decimal = Decimal('0'),
+                                 deductions: Decimal = Decimal('0')) -> Dict[str, Any]:
         """
         Calcula la liquidación de sueldos para Argentina
         Incluye aportes de ley: Jubilación (11%), Obra Social (3%), PAMI (3%)
         """
-        total_hours = Decimal('0')
-        overtime_hours_weekday = Decimal('0')
-        overtime_hours_weekend = Decimal('0')
-        regular_hours = Decimal('0')
-        
-        legal_hours = Decimal(str(self.config['legal_workday_hours']))
-        
-        for att in attendances:
-            if att.hours_worked and not att.is_vacation:
-                hours = Decimal(str(att.hours_worked))
-                total_hours += hours
-                
-                # Determinar si es fin de semana o feriado
-                is_weekend = att.date.weekday() >= 5 or att.is_holiday
-                
-                if hours > legal_hours:
-                    regular_hours += legal_hours
-                    overtime = hours - legal_hours
-                    
-                    if is_weekend:
-                        overtime_hours_weekend += overtime
-                    else:
-                        overtime_hours_weekday += overtime
-                else:
-                    regular_hours += hours
+        regular_hours = hours.regular_hours
+        overtime_hours_weekday = hours.overtime_hours_weekday
+        overtime_hours_weekend = hours.overtime_hours_weekend
         
         # Calcular salarios
-        hourly_rate = Decimal(str(self.employee.hourly_rate))
+        hourly_rate = Decimal(str(employee.hourly_rate))
         base_salary = regular_hours * hourly_rate
         
         # Horas extras: días hábiles 50%, fines de semana/feriados 100%
-        overtime_rate_weekday = hourly_rate * Decimal(str(self.config['overtime_weekday_multiplier']))
-        overtime_rate_weekend = hourly_rate * Decimal(str(self.config['overtime_weekend_multiplier']))
+        overtime_rate_weekday = hourly_rate * self.rules.overtime_weekday_multiplier
+        overtime_rate_weekend = hourly_rate * self.rules.overtime_weekend_multiplier
         
         overtime_pay = (overtime_hours_weekday * overtime_rate_weekday +
                         overtime_hours_weekend * overtime_rate_weekend)
@@ -151,9 +244,10 @@ class ArgentinaCalculator(BaseCalculator):
         gross_salary = base_salary + overtime_pay + bonuses
         
         # Aportes de ley (del empleado)
-        jubilacion = gross_salary * Decimal(str(self.config['jubilacion_rate']))
-        obra_social = gross_salary * Decimal(str(self.config['obra_social_rate']))
-        pami = gross_salary * Decimal(str(self.config['pami_rate']))
+        aportes = {name: gross_salary * rate for name, rate in self.rules.aportes}
+        jubilacion = aportes['jubilacion']
+        obra_social = aportes['obra_social']
+        pami = aportes['pami']
         total_aportes = jubilacion + obra_social + pami
         
         # Total neto (después de aportes y otros descuentos)
@@ -173,7 +267,7 @@ class ArgentinaCalculator(BaseCalculator):
             'total_aportes': total_aportes,
             'total_amount': total_amount,
             'summary': {
-                'total_hours': float(total_hours),
+                'total_hours': float(hours.total_hours),
                 'regular_hours': float(regular_hours),
                 'overtime_hours_weekday': float(overtime_hours_weekday),
                 'overtime_hours_weekend': float(overtime_hours_weekend),
@@ -183,18 +277,19 @@ class ArgentinaCalculator(BaseCalculator):
         }
 
 
-class SpainCalculator(BaseCalculator):
-    """Calculadora para España"""
-    
-    def calculate_payroll(self, attendances: List[Attendance], period: str,
-                         bonuses: Decimal = Decimal('0'),
-                         deductions: Decimal = Decimal('0')) -> Dict[str, Any]:
-        """
-        Calcula la nómina para España
-        (Similar a Guatemala por ahora, se puede personalizar)
-        """
-        calculator = GuatemalaCalculator(self.employee)
-        return calculator.calculate_payroll(attendances, period, bonuses, deductions)
+class SpainCalculator(GuatemalaCalculator):
+    """
+    Calculadora para España
+    (Similar a Guatemala por ahora, se puede personalizar)
+    """
+
+
+# Una instancia por país, compartida por todos los cálculos
+_CALCULATORS: Dict[str, BaseCalculator] = {
+    'AR': ArgentinaCalculator('AR'),
+    'GT': GuatemalaCalculator('GT'),
+    'ES': SpainCalculator('ES'),
+}
 
 
 def get_calculator(employee: Employee) -> BaseCalculator:
@@ -202,13 +297,12 @@ def get_calculator(employee: Employee) -> BaseCalculator:
     Factory function para obtener la calculadora apropiada según el país del empleado
     """
     country_code = employee.country_code or 'GT'
-    
-    calculators = {
-        'AR': ArgentinaCalculator,
-        'GT': GuatemalaCalculator,
-        'ES': SpainCalculator,
-    }
-    
-    calculator_class = calculators.get(country_code.upper(), GuatemalaCalculator)
-    return calculator_class(employee)
+    return _CALCULATORS.get(country_code.upper(), _CALCULATORS['GT'])
 
+
+def get_legal_hours_by_country() -> Dict[str, Decimal]:
+    """
+    Jornada diaria que aplica cada calculadora (para agregaciones en SQL);
+    los países sin calculadora propia usan la de Guatemala
+    """
+    return {country_code: calculator.legal_hours for country_code, calculator in _CALCULATORS.items()}
@@ -0,0 +1,285 @@
+"""
+Exportación del historial de nóminas y asistencias a Parquet o Arrow IPC
+
+Cada conjunto (payrolls, attendances) se exporta con los datos del empleado
+(nombre, país, puesto) en un archivo por período, con particiones al estilo
+Hive que leen directamente pandas, pyarrow, DuckDB o Spark:
+
+    <destino>/payrolls/period=2024-01/data.parquet
+    <destino>/attendances/period=2024-01/data.parquet
+
+El período solo está en la ruta (columna de partición): los archivos no lo
+repiten como columna, porque los lectores no pueden combinar ambas.
+
+Las filas se leen con un cursor del lado del servidor (yield_per) y se
+escriben por lotes (RecordBatch) de EXPORT_BATCH_SIZE filas, de modo que la
+memoria no depende del tamaño del período. Cada archivo se escribe con otro
+nombre y se renombra al terminar.
+
+En modo incremental se comparan la cantidad de filas y el último updated_at
+(de las filas y de sus empleados) de cada período con los guardados en
+<destino>/<conjunto>/_export_state.json y solo se reescriben los períodos que
+cambiaron; los que ya no tienen filas se eliminan.
+
+Requiere pyarrow (dependencia opcional: pip install pyarrow).
+"""
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models import Employee, Attendance, Payroll
+from app.utils import get_period_dates
+
+FORMATS = {'parquet': 'parquet', 'arrow': 'arrow'}
+STATE_FILE = '_export_state.json'
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """Columnas exportadas (nombre, expresión SQL, tipo Arrow) de un conjunto"""
+    name: str
+    model: Any
+    columns: Tuple[Tuple[str, Any, Any], ...]
+    order_by: Tuple[Any, ...]
+
+
+DATASETS = {
+    'payrolls': ExportDataset('payrolls', Payroll, (
+        ('id', Payroll.id, 'int64'),
+        ('employee_id', Payroll.employee_id, 'int64'),
+        ('employee_name', Employee.name, 'string'),
+        ('country_code', Employee.country_code, 'string'),
+        ('position', Employee.position, 'string'),
+        ('base_salary', Payroll.base_salary, ('decimal', 10, 2)),
+        ('hours_worked', Payroll.hours_worked, ('decimal', 6, 2)),
+        ('overtime_hours', Payroll.overtime_hours, ('decimal', 6, 2)),
+        ('overtime_pay', Payroll.overtime_pay, ('decimal', 10, 2)),
+        ('bonuses', Payroll.bonuses, ('decimal', 10, 2)),
+        ('deductions', Payroll.deductions, ('decimal', 10, 2)),
+        ('total_amount', Payroll.total_amount, ('decimal', 10, 2)),
+        ('status', Payroll.status, 'string'),
+        ('payment_date', Payroll.payment_date, 'date'),
+        ('bank_transfer_id', Payroll.bank_transfer_id, 'string'),
+        ('created_at', Payroll.created_at, 'timestamp'),
+        ('updated_at', Payroll.updated_at, 'timestamp'),
+    ), (Payroll.employee_id,)),
+    'attendances': ExportDataset('attendances', Attendance, (
+        ('id', Attendance.id, 'int64'),
+        ('employee_id', Attendance.employee_id, 'int64'),
+        ('employee_name', Employee.name, 'string'),
+        ('country_code', Employee.country_code, 'string'),
+        ('position', Employee.position, 'string'),
+        ('date', Attendance.date, 'date'),
+        ('in_time', Attendance.in_time, 'time'),
+        ('out_time', Attendance.out_time, 'time'),
+        ('hours_worked', Attendance.hours_worked, ('decimal', 5, 2)),
+        ('is_holiday', Attendance.is_holiday, 'bool'),
+        ('is_vacation', Attendance.is_vacation, 'bool'),
+        ('notes', Attendance.notes, 'string'),
+        ('created_at', Attendance.created_at, 'timestamp'),
+        ('updated_at', Attendance.updated_at, 'timestamp'),
+    ), (Attendance.date, Attendance.employee_id)),
+}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('La exportación requiere pyarrow: pip install pyarrow') from None
+    return pyarrow
+
+
+def _arrow_schema(pa, dataset: ExportDataset):
+    types = {
+        'int64': pa.int64(), 'string': pa.string(), 'bool': pa.bool_(), 'date': pa.date32(),
+        'time': pa.time64('us'), 'timestamp': pa.timestamp('us'),
+    }
+    fields = []
+    for name, _, arrow_type in dataset.columns:
+        if isinstance(arrow_type, tuple):
+            _, precision, scale = arrow_type
+            fields.append(pa.field(name, pa.decimal128(precision, scale)))
+        else:
+            fields.append(pa.field(name, types[arrow_type]))
+    return pa.schema(fields)
+
+
+def _period_filter(dataset: ExportDataset, period: str) -> List[Any]:
+    if dataset.model is Payroll:
+        return [Payroll.period == period]
+    start_date, end_date = get_period_dates(period)
+    return [Attendance.date >= start_date, Attendance.date <= end_date]
+
+
+def _attendance_periods() -> List[str]:
+    first_date, last_date = db.session.query(func.min(Attendance.date), func.max(Attendance.date)).one()
+    periods = []
+    if first_date:
+        year, month = first_date.year, first_date.month
+        while (year, month) <= (last_date.year, last_date.month):
+            periods.append(f'{year}-{month:02d}')
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
+
+
+def period_versions(dataset: ExportDataset, periods: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Cantidad de filas y último updated_at (filas y empleados) de cada período
+    con datos; sin periods se recorren todos
+    """
+    table = dataset.model
+    version_columns = (func.count(), func.max(table.updated_at), func.max(Employee.updated_at))
+    versions = {}
+
+    if table is Payroll:
+        query = db.session.query(Payroll.period, *version_columns).join(Employee)
+        if periods is not None:
+            query = query.filter(Payroll.period.in_(list(periods)))
+        rows = query.group_by(Payroll.period).all()
+    else:
+        # Un rango de fechas por período (usa el índice por fecha, sin funciones de fecha del motor)
+        rows = []
+        for period in (periods if periods is not None else _attendance_periods()):
+            count, last_row, last_employee = db.session.query(*version_columns).select_from(Attendance).join(
+                Employee
+            ).filter(*_period_filter(dataset, period)).one()
+            rows.append((period, count, last_row, last_employee))
+
+    for period, count, last_row, last_employee in rows:
+        if count:
+            versions[period] = {
+                'rows': count,
+                'updated_at': max(value for value in (last_row, last_employee) if value is not None).isoformat(),
+            }
+    return versions
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_state(path: str, state: Dict[str, Any]) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def write_period(dataset: ExportDataset, period: str, path: str, fmt: str, batch_size: int) -> int:
+    """Escribe un período por lotes desde un cursor del servidor; devuelve las filas"""
+    pa = _pyarrow()
+    schema = _arrow_schema(pa, dataset)
+    stmt = (
+        select(*[column for _, column, _ in dataset.columns])
+        .select_from(dataset.model)
+        .join(Employee)
+        .where(*_period_filter(dataset, period))
+        .order_by(*dataset.order_by)
+    )
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    if fmt == 'parquet':
+        writer = pa.parquet.ParquetWriter(tmp_path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(tmp_path, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+    rows_written = 0
+    try:
+        result = db.session.execute(stmt, execution_options={'yield_per': batch_size})
+        for rows in result.partitions():
+            columns = list(zip(*rows))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            rows_written += len(rows)
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return rows_written
+
+
+def export_dataset(name: str, output_dir: str, fmt: str = 'parquet', incremental: bool = True,
+                   periods: Optional[Iterable[str]] = None, batch_size: int = 50000,
+                   progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Exporta un conjunto por período (solo los cambiados si incremental=True)
+
+    Devuelve los períodos exportados, omitidos (sin cambios) y eliminados y
+    la cantidad de filas escritas. progress(hechos, total) se llama tras cada período.
+    """
+    if name not in DATASETS:
+        raise ValueError(f'Conjunto no soportado: {name}. Disponibles: {", ".join(DATASETS)}')
+    if fmt not in FORMATS:
+        raise ValueError(f'Formato no soportado: {fmt}. Disponibles: {", ".join(FORMATS)}')
+    _pyarrow()
+
+    dataset = DATASETS[name]
+    dataset_dir = os.path.join(output_dir, name)
+    state_path = os.path.join(dataset_dir, STATE_FILE)
+    state = _load_state(state_path)
+    columns = [column_name for column_name, _, _ in dataset.columns]
+    if state.get('format') != fmt or state.get('columns') != columns:
+        # Otro formato u otras columnas (o primera exportación): se eliminan los
+        # archivos anteriores y se exporta todo
+        for period in state.get('periods', {}):
+            shutil.rmtree(os.path.join(dataset_dir, f'period={period}'), ignore_errors=True)
+        state = {'format': fmt, 'columns': columns, 'periods': {}}
+    exported_state = state['periods']
+
+    versions = period_versions(dataset, periods)
+    # Períodos que quedaron sin filas (solo al recorrer todos)
+    removed = [] if periods is not None else sorted(set(exported_state) - set(versions))
+
+    pending = []
+    for period, version in sorted(versions.items()):
+        previous = exported_state.get(period)
+        path = os.path.join(dataset_dir, f'period={period}', f'data.{FORMATS[fmt]}')
+        unchanged = (previous is not None and os.path.exists(path)
+                     and previous['rows'] == version['rows'] and previous['updated_at'] == version['updated_at'])
+        if not incremental or not unchanged:
+            pending.append((period, version, path))
+
+    rows_written = 0
+    for done, (period, version, path) in enumerate(pending, 1):
+        rows_written += write_period(dataset, period, path, fmt, batch_size)
+        exported_state[period] = {**version, 'exported_at': datetime.utcnow().isoformat(timespec='seconds')}
+        # Guardar después de cada período: una exportación interrumpida retoma desde ahí
+        _save_state(state_path, state)
+        if progress is not None:
+            progress(done, len(pending))
+
+    for period in removed:
+        shutil.rmtree(os.path.join(dataset_dir, f'period={period}'), ignore_errors=True)
+        del exported_state[period]
+    if removed or not os.path.exists(state_path):
+        os.makedirs(dataset_dir, exist_ok=True)
+        _save_state(state_path, state)
+
+    # Liberar la conexión (las lecturas no modifican nada)
+    db.session.rollback()
+    return {
+        'dataset': name,
+        'format': fmt,
+        'path': dataset_dir,
+        'exported': [period for period, _, _ in pending],
+        'skipped': len(versions) - len(pending),
+        'removed': removed,
+        'rows': rows_written,
+    }
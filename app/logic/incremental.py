@@ -0,0 +1,228 @@
+"""
+Recálculo incremental de nóminas
+
+Cada escritura de asistencias marca en payroll_dirty el par (empleado, período)
+afectado, dentro de la misma transacción:
+
+    - por el ORM (create/update/delete de asistencias): listener after_flush; si
+      una asistencia cambia de fecha o de empleado se marcan ambos pares
+    - por escrituras masivas (ingesta en bloque, marcaciones): mark_payrolls_dirty
+
+recalculate_dirty recalcula solo las nóminas marcadas (una consulta por bloque
+de empleados del período) conservando sus bonificaciones y descuentos, de modo
+que corregir una marcación cuesta un empleado y no el mes completo. El cálculo
+del período completo (por lotes o en paralelo) quita las marcas de las nóminas
+que recalcula con clear_payrolls_dirty.
+"""
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, event, func, inspect
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Attendance, Payroll, PayrollDirty
+from app.logic.summary import _dialect_insert
+
+# Empleados por consulta al recalcular (límite de parámetros de SQLite)
+RECALC_CHUNK_SIZE = 900
+
+
+def _period(attendance_date) -> str:
+    return attendance_date.strftime('%Y-%m')
+
+
+def mark_payrolls_dirty(pairs: Iterable[Tuple[int, str]], connection=None) -> None:
+    """
+    Marca los pares (employee_id, período) para recálculo; si ya estaban
+    marcados se actualiza marked_at (no hace commit)
+    """
+    now = datetime.utcnow()
+    rows = [
+        {'employee_id': employee_id, 'period': period, 'marked_at': now}
+        for employee_id, period in sorted(set(pairs))
+    ]
+    if not rows:
+        return
+
+    connection = connection if connection is not None else db.session.connection()
+    table = PayrollDirty.__table__
+    insert = _dialect_insert(connection)
+    if insert is None:
+        connection.execute(table.delete().where(
+            table.c.employee_id == bindparam('b_employee_id'), table.c.period == bindparam('b_period')
+        ), [{'b_employee_id': row['employee_id'], 'b_period': row['period']} for row in rows])
+        connection.execute(table.insert(), rows)
+        return
+
+    stmt = insert(table)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=['employee_id', 'period'],
+        set_={'marked_at': stmt.excluded.marked_at}
+    ), rows)
+
+
+def _old_value(obj, attribute: str):
+    """Valor anterior de un atributo modificado (None si no se cargó)"""
+    history = inspect(obj).attrs[attribute].history
+    return history.deleted[0] if history.deleted else None
+
+
+def _collect_dirty(session: Session):
+    pairs = set()
+
+    def add(employee_id, attendance_date):
+        if employee_id is not None and attendance_date is not None:
+            pairs.add((employee_id, _period(attendance_date)))
+
+    for obj in session.new:
+        if isinstance(obj, Attendance):
+            add(obj.employee_id, obj.date)
+
+    for obj in session.deleted:
+        if isinstance(obj, Attendance):
+            add(obj.employee_id, obj.date)
+
+    for obj in session.dirty:
+        if isinstance(obj, Attendance) and session.is_modified(obj, include_collections=False):
+            add(obj.employee_id, obj.date)
+            old_employee_id = _old_value(obj, 'employee_id')
+            old_date = _old_value(obj, 'date')
+            if old_employee_id is not None or old_date is not None:
+                add(old_employee_id or obj.employee_id, old_date or obj.date)
+
+    return pairs
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Marca los pares afectados por el flush en la misma transacción"""
+    pairs = _collect_dirty(session)
+    if pairs:
+        mark_payrolls_dirty(pairs, session.connection())
+
+
+def register_dirty_listeners() -> None:
+    """Registra el marcado de nóminas a recalcular (idempotente)"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+
+
+def pending_dirty(period: Optional[str] = None) -> Dict[str, int]:
+    """Cantidad de nóminas marcadas por período"""
+    query = db.session.query(PayrollDirty.period, func.count()).group_by(PayrollDirty.period)
+    if period:
+        query = query.filter(PayrollDirty.period == period)
+    return {row_period: count for row_period, count in query.order_by(PayrollDirty.period)}
+
+def clear_payrolls_dirty(period: str, employee_ids: Iterable[int], marked_before: datetime,
+                         connection=None) -> None:
+    """
+    Quita las marcas del período de nóminas recién recalculadas, salvo las
+    posteriores a marked_before (cambios que el cálculo pudo no ver); no hace commit
+    """
+    employee_ids = sorted(set(employee_ids))
+    connection = connection if connection is not None else db.session.connection()
+    table = PayrollDirty.__table__
+    for start in range(0, len(employee_ids), RECALC_CHUNK_SIZE):
+        connection.execute(table.delete().where(
+            table.c.period == period,
+            table.c.employee_id.in_(employee_ids[start:start + RECALC_CHUNK_SIZE]),
+            table.c.marked_at <= marked_before,
+        ))
+
+
+def _clear_marks(marks: Dict[Tuple[int, str], datetime]) -> None:
+    """
+    Quita las marcas procesadas salvo las que se volvieron a marcar durante
+    el recálculo (marked_at posterior al leído)
+    """
+    if not marks:
+        return
+    table = PayrollDirty.__table__
+    db.session.connection().execute(
+        table.delete().where(
+            table.c.employee_id == bindparam('b_employee_id'),
+            table.c.period == bindparam('b_period'),
+            table.c.marked_at <= bindparam('b_marked_at'),
+        ),
+        [{'b_employee_id': employee_id, 'b_period': period, 'b_marked_at': marked_at}
+         for (employee_id, period), marked_at in marks.items()]
+    )
+
+
+def recalculate_dirty(period: Optional[str] = None, limit: Optional[int] = None,
+                      engine: str = 'decimal') -> Dict[str, Any]:
+    """
+    Recalcula las nóminas marcadas en payroll_dirty (las más antiguas primero)
+
+    Solo se actualizan nóminas existentes y no pagadas, conservando sus
+    bonificaciones y descuentos; las marcas sin nómina (el período aún no se
+    calculó), de nóminas pagadas o de empleados inactivos se descartan.
+    Devuelve las cantidades procesadas y las nóminas recalculadas por período.
+    """
+    from app.logic.payroll_batch import employee_filters, load_and_calculate
+
+    started = time.perf_counter()
+    query = db.session.query(PayrollDirty.employee_id, PayrollDirty.period, PayrollDirty.marked_at)
+    if period:
+        query = query.filter(PayrollDirty.period == period)
+    query = query.order_by(PayrollDirty.marked_at, PayrollDirty.period, PayrollDirty.employee_id)
+    if limit:
+        query = query.limit(limit)
+
+    marks_by_period = defaultdict(dict)
+    for employee_id, mark_period, marked_at in query:
+        marks_by_period[mark_period][employee_id] = marked_at
+
+    recalculated = defaultdict(int)
+    skipped = {'paid': 0, 'missing': 0, 'inactive': 0}
+    for mark_period, marks in sorted(marks_by_period.items()):
+        employee_ids = sorted(marks)
+        for start in range(0, len(employee_ids), RECALC_CHUNK_SIZE):
+            chunk = employee_ids[start:start + RECALC_CHUNK_SIZE]
+            payrolls = {
+                payroll.employee_id: payroll
+                for payroll in Payroll.query.filter(
+                    Payroll.period == mark_period, Payroll.employee_id.in_(chunk)
+                )
+            }
+            pending = [employee_id for employee_id, payroll in payrolls.items() if payroll.status != 'paid']
+            skipped['missing'] += len(chunk) - len(payrolls)
+            skipped['paid'] += len(payrolls) - len(pending)
+            if not pending:
+                continue
+
+            adjustments = {
+                employee_id: {'bonuses': payrolls[employee_id].bonuses or 0,
+                              'deductions': payrolls[employee_id].deductions or 0}
+                for employee_id in pending
+            }
+            batch = load_and_calculate(mark_period, employee_filters(employee_ids=pending), adjustments, engine)
+            for employee in batch['employees']:
+                calculation_result = batch['calculations'][employee.id]
+                payroll = payrolls[employee.id]
+                payroll.base_salary = calculation_result['base_salary']
+                payroll.hours_worked = calculation_result['hours_worked']
+                payroll.overtime_hours = calculation_result['overtime_hours']
+                payroll.overtime_pay = calculation_result['overtime_pay']
+                payroll.calculate_total()
+            recalculated[mark_period] += len(batch['employees'])
+            skipped['inactive'] += len(pending) - len(batch['employees'])
+
+    db.session.flush()
+    _clear_marks({
+        (employee_id, mark_period): marked_at
+        for mark_period, marks in marks_by_period.items()
+        for employee_id, marked_at in marks.items()
+    })
+    db.session.commit()
+
+    return {
+        'recalculated': sum(recalculated.values()),
+        'periods': dict(sorted(recalculated.items())),
+        'skipped': skipped,
+        'remaining': sum(pending_dirty(period).values()),
+        'total_ms': (time.perf_counter() - started) * 1000,
+    }
@@ -0,0 +1,443 @@
+"""
+Trabajos en segundo plano respaldados por la tabla jobs (sin broker externo)
+
+Las peticiones encolan el trabajo (enqueue_job) y responden de inmediato; los
+workers (`flask jobs worker`) lo toman de la tabla y lo ejecutan fuera del
+hilo de la petición:
+
+    - la toma es atómica: SELECT ... FOR UPDATE SKIP LOCKED en PostgreSQL y
+      UPDATE condicional sobre el estado (compare-and-set) en los demás motores,
+      de modo que varios workers nunca ejecutan el mismo trabajo
+    - el handler informa el avance con context.progress(); mientras corre, un
+      hilo actualiza heartbeat_at y los trabajos sin latido por más de
+      JOB_STALE_SECONDS (worker caído) se vuelven a encolar
+    - si el handler falla se reintenta con espera exponencial hasta
+      max_attempts; los errores de validación (ValueError) y las dependencias
+      faltantes (ImportError) no se reintentan; si el handler terminó pero no se
+      pudo guardar el resultado, el trabajo queda fallido sin reintento (los
+      handlers no son necesariamente idempotentes, p. ej. payments.pay)
+
+Los tipos de trabajo se registran con @job_type (ver los handlers al final).
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Intentos de toma cuando otro worker gana la carrera por el mismo trabajo
+CLAIM_RETRIES = 5
+
+
+@dataclass(frozen=True)
+class JobType:
+    """Tipo de trabajo registrado: handler(params, context) -> resultado JSON"""
+    name: str
+    handler: Callable[[Dict[str, Any], 'JobContext'], Any]
+    required: Tuple[str, ...] = ()
+
+
+JOB_TYPES: Dict[str, JobType] = {}
+
+
+def job_type(name: str, required: Tuple[str, ...] = ()):
+    """Registra un handler como tipo de trabajo"""
+    def decorator(handler):
+        JOB_TYPES[name] = JobType(name, handler, tuple(required))
+        return handler
+    return decorator
+
+
+class JobContext:
+    """Acceso del handler a su trabajo: avance y mensaje de estado"""
+
+    def __init__(self, job_id: int, worker: str):
+        self.job_id = job_id
+        self.worker = worker
+
+    def progress(self, percent: float, message: Optional[str] = None) -> None:
+        """
+        Guarda el avance (0-100) en una conexión aparte para que sea visible
+        mientras el trabajo corre; llamarlo entre transacciones del handler
+        """
+        values = {'progress': max(0, min(100, int(percent))), 'heartbeat_at': datetime.utcnow()}
+        if message is not None:
+            values['message'] = message[:255]
+        _update_running(self.job_id, self.worker, values)
+
+
+def _update_running(job_id: int, worker: str, values: Dict[str, Any]) -> None:
+    """Actualiza un trabajo en curso de este worker (sin afectar la sesión)"""
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(
+                update(Job.__table__)
+                .where(Job.id == job_id, Job.status == 'running', Job.worker == worker)
+                .values(**values)
+            )
+    except Exception:
+        # El avance es informativo: un bloqueo momentáneo no debe cortar el trabajo
+        logger.warning('No se pudo actualizar el trabajo %s', job_id, exc_info=True)
+
+
+class _Heartbeat:
+    """Hilo que mantiene heartbeat_at al día mientras corre el handler"""
+
+    def __init__(self, app, job_id: int, worker: str, interval: float):
+        self.app = app
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f'job-heartbeat-{job_id}', daemon=True)
+
+    def _run(self):
+        with self.app.app_context():
+            while not self.stopped.wait(self.interval):
+                _update_running(self.job_id, self.worker, {'heartbeat_at': datetime.utcnow()})
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+
+
+def enqueue_job(name: str, params: Optional[Dict[str, Any]] = None,
+                max_attempts: Optional[int] = None) -> Job:
+    """
+    Encola un trabajo y hace commit; lanza ValueError si el tipo no existe
+    o faltan parámetros requeridos
+    """
+    params = dict(params or {})
+    if name not in JOB_TYPES:
+        raise ValueError(f'Tipo de trabajo no soportado: {name}. Disponibles: {", ".join(sorted(JOB_TYPES))}')
+    missing = [key for key in JOB_TYPES[name].required if params.get(key) in (None, '')]
+    if missing:
+        raise ValueError(f'Faltan parámetros requeridos: {", ".join(missing)}')
+
+    job = Job(
+        job_type=name,
+        params=params,
+        status='queued',
+        max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        run_after=datetime.utcnow(),
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def retry_job(job: Job) -> Job:
+    """Vuelve a encolar un trabajo fallido con un intento adicional"""
+    if job.status != 'failed':
+        raise ValueError('Solo se pueden reintentar trabajos fallidos')
+    job.status = 'queued'
+    job.max_attempts = max(job.max_attempts, job.attempts + 1)
+    job.run_after = datetime.utcnow()
+    job.finished_at = None
+    job.worker = None
+    db.session.commit()
+    return job
+
+
+def claim_job(worker: str) -> Optional[Job]:
+    """Toma el próximo trabajo disponible (el más antiguo) o devuelve None"""
+    table = Job.__table__
+    for _ in range(CLAIM_RETRIES):
+        now = datetime.utcnow()
+        candidate = (
+            select(table.c.id)
+            .where(table.c.status == 'queued', table.c.run_after <= now)
+            .order_by(table.c.id)
+            .limit(1)
+        )
+        if db.session.connection().dialect.name == 'postgresql':
+            # Los trabajos bloqueados por otro worker se saltean en lugar de esperar
+            candidate = candidate.with_for_update(skip_locked=True)
+
+        job_id = db.session.execute(candidate).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+
+        claimed = db.session.execute(
+            update(table)
+            .where(table.c.id == job_id, table.c.status == 'queued')
+            .values(status='running', worker=worker, attempts=table.c.attempts + 1,
+                    progress=0, started_at=now, heartbeat_at=now, error=None)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+    return None
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Vuelve a encolar (o da por fallidos si agotaron los intentos) los trabajos
+    en curso cuyo worker dejó de dar señales; devuelve la cantidad afectada
+    """
+    table = Job.__table__
+    now = datetime.utcnow()
+    stale = [
+        table.c.status == 'running',
+        table.c.heartbeat_at < now - timedelta(seconds=current_app.config['JOB_STALE_SECONDS']),
+    ]
+    requeued = db.session.execute(
+        update(table).where(*stale, table.c.attempts < table.c.max_attempts)
+        .values(status='queued', worker=None, run_after=now, error='Worker sin respuesta')
+    ).rowcount
+    failed = db.session.execute(
+        update(table).where(*stale)
+        .values(status='failed', finished_at=now, error='Worker sin respuesta')
+    ).rowcount
+    db.session.commit()
+    return requeued + failed
+
+
+def run_job(job: Job, worker: str) -> bool:
+    """Ejecuta un trabajo ya tomado y registra el resultado; True si terminó bien"""
+    job_id, name, params = job.id, job.job_type, dict(job.params or {})
+    context = JobContext(job_id, worker)
+    interval = max(1.0, current_app.config['JOB_STALE_SECONDS'] / 3)
+    try:
+        if name not in JOB_TYPES:
+            raise ValueError(f'Tipo de trabajo no soportado: {name}')
+        with _Heartbeat(current_app._get_current_object(), job_id, worker, interval):
+            result = JOB_TYPES[name].handler(params, context)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Falló el trabajo %s (%s)', job_id, name)
+        _record_failure(job_id, e, retriable=not isinstance(e, (ValueError, ImportError)))
+        return False
+
+    try:
+        job = db.session.get(Job, job_id)
+        job.status = 'succeeded'
+        job.progress = 100
+        job.result = result
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        # El handler ya terminó (p. ej. un lote ya pagado): no se reintenta. Se marca
+        # fallido en una conexión aparte para que requeue_stale_jobs no lo vuelva a encolar
+        db.session.rollback()
+        logger.exception('El trabajo %s (%s) terminó pero no se pudo guardar el resultado', job_id, name)
+        _update_running(job_id, worker, {
+            'status': 'failed',
+            'finished_at': datetime.utcnow(),
+            'error': f'El trabajo terminó pero no se pudo guardar el resultado: {type(e).__name__}: {e}',
+        })
+        return False
+    return True
+
+
+def _record_failure(job_id: int, error: Exception, retriable: bool) -> None:
+    job = db.session.get(Job, job_id)
+    now = datetime.utcnow()
+    job.error = f'{type(error).__name__}: {error}'
+    job.worker = None
+    if retriable and job.attempts < job.max_attempts:
+        # Espera exponencial: base, 2x base, 4x base...
+        delay = current_app.config['JOB_RETRY_BACKOFF_SECONDS'] * 2 ** (job.attempts - 1)
+        job.status = 'queued'
+        job.run_after = now + timedelta(seconds=delay)
+        job.message = f'Reintento {job.attempts + 1} de {job.max_attempts} en {delay}s'
+    else:
+        job.status = 'failed'
+        job.finished_at = now
+    db.session.commit()
+
+
+def default_worker_name() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def run_worker(worker: Optional[str] = None, once: bool = False,
+               max_jobs: Optional[int] = None, poll_interval: Optional[float] = None) -> int:
+    """
+    Bucle del worker: toma y ejecuta trabajos hasta max_jobs, o hasta vaciar
+    la cola si once=True; devuelve la cantidad de trabajos ejecutados
+    """
+    worker = worker or default_worker_name()
+    poll_interval = poll_interval if poll_interval is not None else current_app.config['JOB_POLL_INTERVAL']
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        requeue_stale_jobs()
+        job = claim_job(worker)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        logger.info('Worker %s ejecuta el trabajo %s (%s)', worker, job.id, job.job_type)
+        run_job(job, worker)
+        processed += 1
+    return processed
+
+
+def _worker_process(config_name: str, database_uri: str, once: bool, poll_interval: Optional[float]) -> None:
+    """Punto de entrada de cada proceso de `flask jobs worker --processes N`"""
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO)
+    app = create_app(config_name, {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'AUTO_CREATE_SCHEMA': False,
+    })
+    with app.app_context():
+        run_worker(once=once, poll_interval=poll_interval)
+
+
+def run_worker_processes(processes: int, once: bool = False, poll_interval: Optional[float] = None) -> None:
+    """Inicia `processes` workers independientes y espera a que terminen"""
+    context = multiprocessing.get_context('spawn')
+    children = [
+        context.Process(
+            target=_worker_process,
+            args=(current_app.config.get('CONFIG_NAME', 'default'),
+                  current_app.config['SQLALCHEMY_DATABASE_URI'], once, poll_interval),
+            name=f'job-worker-{index}',
+        )
+        for index in range(processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.join()
+
+
+# ==================== TIPOS DE TRABAJO ====================
+
+@job_type('payroll.calculate', required=('period',))
+def _payroll_calculate(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Nómina de un período: en paralelo si se indica workers (y no employee_ids),
+    si no con calculate_period_batch
+    """
+    from app.logic.payroll_batch import ENGINES, calculate_period_batch, parse_adjustments
+
+    engine = params.get('engine', 'decimal')
+    if engine not in ENGINES:
+        raise ValueError(f'engine debe ser uno de: {", ".join(ENGINES)}')
+    adjustments = parse_adjustments(params.get('adjustments'))
+
+    if params.get('workers') and not params.get('employee_ids'):
+        from app.logic.parallel import calculate_period_parallel
+
+        context.progress(0, 'Calculando en paralelo')
+        result = calculate_period_parallel(
+            params['period'],
+            country_code=params.get('country_code'),
+            adjustments=adjustments,
+            engine=engine,
+            workers=int(params['workers']),
+            # El 90 % es el cálculo por particiones; el resto, el guardado
+            progress=lambda done, total: context.progress(
+                90 * done / total, f'Particiones calculadas: {done} de {total}'
+            ),
+        )
+        return {key: result[key] for key in ('period', 'employees', 'created', 'updated', 'skipped', 'workers', 'timing')}
+
+    context.progress(0, 'Calculando')
+    batch = calculate_period_batch(
+        params['period'],
+        country_code=params.get('country_code'),
+        employee_ids=params.get('employee_ids'),
+        adjustments=adjustments,
+        engine=engine,
+    )
+    return {
+        'period': batch['period'],
+        'employees': len(batch['results']),
+        'created': batch['created'],
+        'updated': batch['updated'],
+        'skipped': batch['skipped'],
+        'timing': batch['timing'],
+    }
+
+
+@job_type('payroll.recalculate_dirty')
+def _payroll_recalculate_dirty(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Recálculo incremental de las nóminas marcadas"""
+    from app.logic.incremental import recalculate_dirty
+
+    context.progress(0, 'Recalculando nóminas marcadas')
+    return recalculate_dirty(
+        period=params.get('period'),
+        limit=params.get('limit'),
+        engine=params.get('engine', 'decimal'),
+    )
+
+
+@job_type('summary.rebuild')
+def _summary_rebuild(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Reconstrucción de period_summary (todos los períodos o los indicados)"""
+    from app.logic.summary import rebuild_period_summaries
+
+    context.progress(0, 'Reconstruyendo el resumen')
+    return {'periods': rebuild_period_summaries(params.get('periods'))}
+
+
+@job_type('export.history')
+def _export_history(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Exportación del historial a EXPORT_DIR (el destino no se acepta como
+    parámetro para no escribir fuera de ese directorio)
+    """
+    from app.logic.export import DATASETS, export_dataset
+
+    datasets = params.get('datasets') or list(DATASETS)
+    results = []
+    for index, name in enumerate(datasets):
+        def progress(done, total, index=index, name=name):
+            context.progress(100 * (index + done / total) / len(datasets), f'{name}: {done} de {total} períodos')
+
+        results.append(export_dataset(
+            name,
+            current_app.config['EXPORT_DIR'],
+            fmt=params.get('format', 'parquet'),
+            incremental=not params.get('full'),
+            periods=params.get('periods'),
+            batch_size=current_app.config['EXPORT_BATCH_SIZE'],
+            progress=progress,
+        ))
+    return {'datasets': results}
+
+
+@job_type('payments.pay', required=('period', 'country_code'))
+def _payments_pay(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Lote de pago con el archivo en PAYMENTS_DIR; un reintento no duplica pagos
+    porque el marcado es una sola transacción (las nóminas ya pagadas no se
+    vuelven a incluir)
+    """
+    from app.logic.payments import prepare_batch, write_payment_file
+    from app.utils import parse_date
+
+    payment_date = parse_date(params['payment_date']) if params.get('payment_date') else None
+    batch = prepare_batch(params['period'], params['country_code'], payment_date)
+    # Sin avance intermedio: el marcado es una sola transacción
+    context.progress(0, f'Generando el lote {batch.batch_id}')
+    return write_payment_file(batch, current_app.config['PAYMENTS_DIR'], current_app.config['PAYMENT_CHUNK_SIZE'])
@@ -0,0 +1,253 @@
+"""
+Cálculo de nómina en paralelo con varios procesos para períodos grandes
+
+El proceso principal reparte los empleados activos en rangos de IDs contiguos;
+cada proceso del pool crea su propia aplicación (y conexión a la base), carga
+solo las asistencias de su rango, calcula con las calculadoras existentes y
+devuelve resultados planos. El proceso principal los guarda todos con un único
+upsert por bloques en una sola transacción. Las nóminas ya pagadas no se
+recalculan ni se modifican (se informan en skipped). En la misma transacción
+se quitan las marcas de payroll_dirty de las nóminas recalculadas.
+
+Los procesos se crean con 'spawn' (no heredan conexiones abiertas) y cada uno
+tarda lo que tarda create_app en arrancar, por lo que conviene para períodos
+de miles de empleados; para lotes chicos calculate_period_batch es más rápido.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select, update
+
+from app import db
+from app.models import Employee, Payroll
+from app.logic.incremental import clear_payrolls_dirty
+from app.logic.payroll_batch import ENGINES, employee_filters, load_and_calculate, parse_adjustments
+from app.logic.summary import refresh_period_summaries
+
+# Rangos de IDs por proceso (más de uno para repartir mejor la carga)
+PARTITIONS_PER_WORKER = 4
+
+# Filas por ejecución del upsert
+UPSERT_CHUNK_SIZE = 1000
+
+PAYROLL_FIELDS = ('base_salary', 'hours_worked', 'overtime_hours', 'overtime_pay', 'bonuses', 'deductions')
+
+# Aplicación Flask de cada proceso del pool (se crea en _init_worker)
+_worker_app = None
+
+
+def partition_ids(employee_ids: List[int], partitions: int) -> List[Tuple[int, int]]:
+    """Divide IDs ordenados en rangos (mínimo, máximo) con cantidades similares de empleados"""
+    if not employee_ids:
+        return []
+    partitions = max(1, min(partitions, len(employee_ids)))
+    size, remainder = divmod(len(employee_ids), partitions)
+    ranges = []
+    start = 0
+    for index in range(partitions):
+        end = start + size + (1 if index < remainder else 0)
+        ranges.append((employee_ids[start], employee_ids[end - 1]))
+        start = end
+    return ranges
+
+
+def _init_worker(config_name: str, database_uri: str):
+    global _worker_app
+    from app import create_app
+    _worker_app = create_app(config_name, {
+        'SQLALCHEMY_DATABASE_URI': database_uri,
+        'AUTO_CREATE_SCHEMA': False,
+        'INSTRUMENTATION_ENABLED': False,
+    })
+
+
+def _calculate_partition(period: str, id_range: Tuple[int, int], country_code: Optional[str],
+                         adjustments: Dict[Any, Dict[str, Any]], engine: str) -> Dict[str, Any]:
+    """Calcula (sin guardar) los empleados de un rango de IDs dentro de un proceso del pool"""
+    with _worker_app.app_context():
+        try:
+            filters = employee_filters(country_code) + [Employee.id.between(*id_range)]
+            batch = load_and_calculate(period, filters, adjustments, engine)
+            return {
+                'results': {
+                    employee_id: {field: calculation[field] for field in PAYROLL_FIELDS}
+                    for employee_id, calculation in batch['calculations'].items()
+                },
+                'attendance_count': batch['attendance_count'],
+                'timing': batch['timing'],
+            }
+        finally:
+            db.session.remove()
+
+
+def _upsert_statement():
+    """
+    INSERT ... ON CONFLICT (employee_id, period) DO UPDATE (conserva estado y pagos);
+    no toca las nóminas pagadas aunque se hayan pagado durante el cálculo
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    stmt = dialect_insert(Payroll.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=['employee_id', 'period'],
+        set_={column: stmt.excluded[column] for column in (*PAYROLL_FIELDS, 'total_amount', 'updated_at')},
+        where=Payroll.__table__.c.status != 'paid',
+    )
+
+
+def _upsert_payrolls(rows: List[Dict[str, Any]], existing: Dict[int, int]) -> List[int]:
+    """Guarda las filas y devuelve los employee_id realmente escritos (sin las nóminas pagadas)"""
+    stmt = _upsert_statement()
+    connection = db.session.connection()
+    written = []
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+        if stmt is not None:
+            # RETURNING omite las filas que el WHERE del ON CONFLICT dejó sin tocar
+            written.extend(connection.execute(stmt.returning(Payroll.__table__.c.employee_id), chunk).scalars())
+            continue
+        # Alternativa portable: actualizar las existentes no pagadas (bloqueadas) e insertar el resto
+        chunk_existing = [existing[row['employee_id']] for row in chunk if row['employee_id'] in existing]
+        unpaid = set(connection.execute(
+            select(Payroll.id).where(Payroll.id.in_(chunk_existing), Payroll.status != 'paid').with_for_update()
+        ).scalars()) if chunk_existing else set()
+        updates = [
+            {'payroll_id': existing[row['employee_id']], **{key: value for key, value in row.items()
+                                                    if key not in ('employee_id', 'period', 'status', 'created_at')}}
+            for row in chunk if existing.get(row['employee_id']) in unpaid
+        ]
+        inserts = [row for row in chunk if row['employee_id'] not in existing]
+        written.extend(row['employee_id'] for row in chunk
+                       if row['employee_id'] not in existing or existing[row['employee_id']] in unpaid)
+        if updates:
+            db.session.execute(
+                update(Payroll).where(Payroll.id == bindparam('payroll_id'), Payroll.status != 'paid')
+                .values({key: bindparam(key) for key in updates[0] if key != 'payroll_id'})
+                .execution_options(synchronize_session=False),
+                updates,
+            )
+        if inserts:
+            connection.execute(insert(Payroll.__table__), inserts)
+    return written
+
+
+def calculate_period_parallel(period: str,
+                              country_code: Optional[str] = None,
+                              adjustments: Optional[Dict[Any, Dict[str, Any]]] = None,
+                              engine: str = 'decimal',
+                              workers: Optional[int] = None,
+                              progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Calcula la nómina del período de todos los empleados activos repartiendo el
+    cálculo entre `workers` procesos (por defecto PAYROLL_WORKERS o la cantidad
+    de CPUs) y guarda el resultado con un único upsert
+
+    progress(completadas, total) se llama al terminar cada partición.
+
+    Debe ejecutarse dentro de un contexto de aplicación con una base accesible
+    desde otros procesos (no SQLite en memoria). Devuelve conteos y tiempos,
+    no el detalle de cada empleado.
+    """
+    from flask import current_app
+
+    if engine not in ENGINES:
+        raise ValueError(f'Motor de cálculo no soportado: {engine}')
+    workers = workers or current_app.config.get('PAYROLL_WORKERS') or os.cpu_count() or 1
+    adjustments = parse_adjustments(adjustments)
+    timing = {}
+
+    started = time.perf_counter()
+    # Las marcas de payroll_dirty anteriores al cálculo quedan resueltas con él
+    loaded_at = datetime.utcnow()
+    filters = employee_filters(country_code)
+    existing = {}
+    paid = set()
+    for employee_id, payroll_id, status in db.session.query(
+        Payroll.employee_id, Payroll.id, Payroll.status
+    ).join(Employee).filter(*filters, Payroll.period == period):
+        if status == 'paid':
+            # Una nómina pagada ya coincide con el archivo del banco: no se recalcula
+            paid.add(employee_id)
+        else:
+            existing[employee_id] = payroll_id
+    employee_ids = [employee_id for (employee_id,) in
+                    db.session.query(Employee.id).filter(*filters).order_by(Employee.id)
+                    if employee_id not in paid]
+    ranges = partition_ids(employee_ids, workers * PARTITIONS_PER_WORKER)
+    # Liberar la conexión mientras calculan los procesos
+    db.session.rollback()
+    timing['partition_ms'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    results: Dict[int, Dict[str, Any]] = {}
+    attendance_count = 0
+    config_name = current_app.config.get('CONFIG_NAME', 'default')
+    database_uri = current_app.config['SQLALCHEMY_DATABASE_URI']
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(ranges)) or 1,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(config_name, database_uri),
+    ) as executor:
+        futures = [
+            executor.submit(_calculate_partition, period, id_range, country_code,
+                            {employee_id: value for employee_id, value in adjustments.items()
+                             if id_range[0] <= employee_id <= id_range[1]}, engine)
+            for id_range in ranges
+        ]
+        for done, future in enumerate(futures, 1):
+            partition = future.result()
+            results.update(partition['results'])
+            if partition['attendance_count'] is not None:
+                attendance_count += partition['attendance_count']
+            if progress is not None:
+                progress(done, len(futures))
+    timing['calculate_ms'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    rows = []
+    for employee_id in sorted(results.keys() - paid):
+        values = results[employee_id]
+        rows.append({
+            'employee_id': employee_id,
+            'period': period,
+            **values,
+            # Igual que Payroll.calculate_total
+            'total_amount': values['base_salary'] + values['overtime_pay'] + values['bonuses'] - values['deductions'],
+            'status': 'pending',
+            'created_at': now,
+            'updated_at': now,
+        })
+    written = _upsert_payrolls(rows, existing)
+    clear_payrolls_dirty(period, written, loaded_at)
+    # El upsert no pasa por el ORM: recalcular el resumen del período
+    refresh_period_summaries([period])
+    db.session.commit()
+    timing['persist_ms'] = (time.perf_counter() - started) * 1000
+    timing['total_ms'] = sum(timing.values())
+
+    created = sum(1 for employee_id in written if employee_id not in existing)
+    # Pagadas al cargar y pagadas durante el cálculo (el upsert no las escribió)
+    paid_during = len(rows) - len(written)
+    return {
+        'period': period,
+        'workers': workers,
+        'partitions': len(ranges),
+        'employees': len(written),
+        'attendance_count': attendance_count if engine != 'aggregate' else None,
+        'created': created,
+        'updated': len(written) - created,
+        'skipped': {'paid': len(paid) + paid_during},
+        'timing': timing,
+    }
@@ -0,0 +1,410 @@
+"""
+Lotes de pago: archivo de transferencias bancarias y marcado de nóminas pagadas
+
+Un lote toma las nóminas confirmadas de un período y un país (de empleados con
+cuenta bancaria) en dos pasos:
+
+    - pay_batch marca cada fragmento de PAYMENT_CHUNK_SIZE nóminas como pagado
+      con un único UPDATE (status, payment_date, bank_transfer_id, updated_at),
+      todo en una transacción corta: los bloqueos no duran lo que la descarga
+    - iter_batch_file genera el archivo de transferencias con el formato del
+      banco del país (ancho fijo para GT, CSV para AR y ES) a partir de las
+      nóminas ya pagadas del lote, fragmento por fragmento
+
+Los fragmentos se leen por clave (id > último id), así que cada nómina se lee
+una sola vez y el UPDATE no interfiere con un cursor abierto. Si la descarga se
+corta, el archivo completo se vuelve a generar con el identificador del lote.
+
+bank_transfer_id queda como '<lote>-<id de nómina>', la misma referencia del
+archivo, lo que permite conciliar y volver a generar el archivo de un lote. El
+identificador del lote lleva un sufijo al azar y pay_batch rechaza uno repetido.
+Las cuentas y referencias nunca se recortan: si alguna no cabe en el formato
+del banco (o la cuenta tiene caracteres que no son letras o dígitos) el lote se
+rechaza antes de pagar.
+"""
+import csv
+import io
+import itertools
+import os
+import re
+import secrets
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import String, cast, func, literal, select, update
+
+from app import db
+from app.models import Employee, Payroll
+
+# <país><AAAAMM>-<8 hexadecimales al azar>; los lotes anteriores terminaban en la
+# fecha y hora de creación (AAMMDDhhmmss o AAAAMMDDhhmmss)
+BATCH_ID_PATTERN = re.compile(r'^([A-Z]{2})(\d{4})(\d{2})-([0-9A-F]{8}|\d{12}|\d{14})$')
+
+# Cuentas bancarias (CBU, IBAN, cuentas locales): solo letras y dígitos ASCII
+ACCOUNT_PATTERN = re.compile(r'^[A-Za-z0-9]+$')
+
+
+class PaymentConflict(ValueError):
+    """El lote choca con otro: identificador repetido o nóminas ya pagadas por otro lote"""
+
+
+def _check_account_chars(account: Optional[str]) -> None:
+    if not ACCOUNT_PATTERN.match(account or ''):
+        raise ValueError(f'Cuenta bancaria no válida: {account!r} (solo letras y dígitos)')
+
+
+def _ascii(value: Optional[str]) -> str:
+    """Texto sin acentos ni caracteres fuera de ASCII (los bancos cuentan bytes)"""
+    normalized = unicodedata.normalize('NFKD', value or '')
+    return normalized.encode('ascii', 'ignore').decode('ascii')
+
+
+@dataclass(frozen=True)
+class FixedWidthLayout:
+    """Registros de ancho fijo: encabezado (H), detalle (D) y cierre (T)"""
+    name: str
+    account_width: int = 20
+    amount_width: int = 15
+    name_width: int = 40
+    reference_width: int = 30
+    extension: str = 'txt'
+    mimetype: str = 'text/plain'
+
+    def header(self, batch: 'PaymentBatch') -> str:
+        return f"H{batch.batch_id:<30}{batch.payment_date:%Y%m%d}{batch.country_code}\r\n"
+
+    def check_account(self, account: Optional[str]) -> None:
+        """Una cuenta recortada o sin algunos caracteres enviaría el pago a otra cuenta"""
+        _check_account_chars(account)
+        if len(account) > self.account_width:
+            raise ValueError(f'La cuenta {account} supera los {self.account_width} caracteres del formato {self.name}')
+
+    def _account(self, account: str) -> str:
+        self.check_account(account)
+        return account
+
+    def check_reference(self, reference: str) -> None:
+        """La referencia debe coincidir con bank_transfer_id: no se puede recortar"""
+        if len(reference) > self.reference_width:
+            raise ValueError(
+                f'La referencia {reference} supera los {self.reference_width} caracteres del formato {self.name}'
+            )
+
+    def _reference(self, batch: 'PaymentBatch', payroll_id: int) -> str:
+        reference = batch.reference(payroll_id)
+        self.check_reference(reference)
+        return reference
+
+    def lines(self, rows: Sequence[Any], batch: 'PaymentBatch') -> str:
+        return ''.join(
+            f"D{self._account(row.bank_account):<{self.account_width}}"
+            f"{_cents(row.total_amount):0{self.amount_width}d}"
+            f"{_ascii(row.name).upper()[:self.name_width]:<{self.name_width}}"
+            f"{self._reference(batch, row.id):<{self.reference_width}}\r\n"
+            for row in rows
+        )
+
+    def trailer(self, batch: 'PaymentBatch') -> str:
+        return f"T{batch.count:08d}{_cents(batch.total):017d}\r\n"
+
+
+@dataclass(frozen=True)
+class CsvLayout:
+    """CSV con encabezado de columnas; el separador decimal sigue al país"""
+    name: str
+    columns: Sequence[str]
+    delimiter: str = ','
+    decimal_separator: str = '.'
+    extension: str = 'csv'
+    mimetype: str = 'text/csv'
+
+    def _row(self, values: Sequence[Any]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, delimiter=self.delimiter, lineterminator='\r\n').writerow(values)
+        return buffer.getvalue()
+
+    def _amount(self, value) -> str:
+        return f'{Decimal(str(value)):.2f}'.replace('.', self.decimal_separator)
+
+    def check_account(self, account: Optional[str]) -> None:
+        _check_account_chars(account)
+
+    def check_reference(self, reference: str) -> None:
+        # Sin ancho fijo: cualquier referencia entra
+        pass
+
+    def header(self, batch: 'PaymentBatch') -> str:
+        return self._row(self.columns)
+
+    def lines(self, rows: Sequence[Any], batch: 'PaymentBatch') -> str:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=self.delimiter, lineterminator='\r\n')
+        writer.writerows(
+            (row.bank_account, self._amount(row.total_amount), row.name,
+             batch.reference(row.id), batch.payment_date.isoformat())
+            for row in rows
+        )
+        return buffer.getvalue()
+
+    def trailer(self, batch: 'PaymentBatch') -> str:
+        # Los formatos CSV no llevan registro de cierre
+        return ''
+
+
+BANK_LAYOUTS = {
+    'GT': FixedWidthLayout('ach-gt'),
+    'AR': CsvLayout('cbu-ar', ('cbu', 'importe', 'beneficiario', 'referencia', 'fecha'),
+                    delimiter=';', decimal_separator=','),
+    'ES': CsvLayout('sepa-es', ('iban', 'importe', 'beneficiario', 'concepto', 'fecha')),
+}
+
+
+def _cents(amount) -> int:
+    return int((Decimal(str(amount or 0)) * 100).to_integral_value())
+
+
+@dataclass
+class PaymentBatch:
+    """Un lote de pago en curso (los totales se completan al generar el archivo)"""
+    batch_id: str
+    period: str
+    country_code: str
+    payment_date: date
+    count: int = 0
+    total: Decimal = Decimal('0')
+
+    @property
+    def layout(self):
+        return BANK_LAYOUTS[self.country_code]
+
+    @property
+    def filename(self) -> str:
+        return f'{self.batch_id}.{self.layout.extension}'
+
+    def reference(self, payroll_id: int) -> str:
+        return f'{self.batch_id}-{payroll_id}'
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'batch_id': self.batch_id,
+            'period': self.period,
+            'country_code': self.country_code,
+            'payment_date': self.payment_date.isoformat(),
+            'layout': self.layout.name,
+            'filename': self.filename,
+            'count': self.count,
+            'total': float(self.total),
+        }
+
+
+def _payable_filters(period: str, country_code: str) -> List[Any]:
+    return [
+        Payroll.period == period,
+        Payroll.status == 'confirmed',
+        Employee.country_code == country_code,
+        Employee.bank_account.isnot(None),
+        Employee.bank_account != '',
+    ]
+
+
+def pending_payments(period: str, country_code: str) -> Dict[str, Any]:
+    """Nóminas confirmadas del período y país: a pagar y sin cuenta bancaria"""
+    confirmed = db.session.query(
+        func.count(),
+        func.count(Employee.bank_account).filter(Employee.bank_account != ''),
+        func.sum(Payroll.total_amount).filter(Employee.bank_account != ''),
+    ).select_from(Payroll).join(Employee).filter(
+        Payroll.period == period,
+        Payroll.status == 'confirmed',
+        Employee.country_code == country_code,
+    ).one()
+    return {
+        'payable': confirmed[1] or 0,
+        'missing_account': (confirmed[0] or 0) - (confirmed[1] or 0),
+        'total': float(confirmed[2] or 0),
+    }
+
+
+def prepare_batch(period: str, country_code: str, payment_date: Optional[date] = None) -> PaymentBatch:
+    """
+    Valida los parámetros, las cuentas bancarias y las referencias y crea el
+    lote; ValueError si no hay nada que pagar o alguna nómina no se puede pagar
+    con el formato del banco (se informan sus IDs)
+    """
+    try:
+        datetime.strptime(period or '', '%Y-%m')
+    except ValueError:
+        raise ValueError('El período debe tener el formato YYYY-MM') from None
+    country_code = (country_code or '').upper()
+    if country_code not in BANK_LAYOUTS:
+        raise ValueError(
+            f'No hay formato bancario para el país: {country_code or "-"}. '
+            f'Disponibles: {", ".join(BANK_LAYOUTS)}'
+        )
+
+    pending = pending_payments(period, country_code)
+    if not pending['payable']:
+        raise ValueError(f'No hay nóminas confirmadas con cuenta bancaria en {period} para {country_code}')
+
+    batch = PaymentBatch(
+        # Al azar: dos lotes del mismo período creados en el mismo segundo no comparten identificador
+        batch_id=f"{country_code}{period.replace('-', '')}-{secrets.token_hex(4).upper()}",
+        period=period,
+        country_code=country_code,
+        payment_date=payment_date or datetime.utcnow().date(),
+    )
+
+    # Validar antes de pagar: el archivo no puede recortar cuentas ni referencias
+    layout = batch.layout
+    invalid = []
+    first_error = None
+    max_id = 0
+    rows = db.session.execute(
+        select(Payroll.id, Employee.bank_account).join(Employee).where(*_payable_filters(period, country_code)),
+        execution_options={'yield_per': 1000},
+    )
+    for payroll_id, account in rows:
+        max_id = max(max_id, payroll_id)
+        try:
+            layout.check_account(account)
+        except ValueError as e:
+            invalid.append(payroll_id)
+            first_error = first_error or str(e)
+    if invalid:
+        listed = ', '.join(str(payroll_id) for payroll_id in sorted(invalid)[:20])
+        raise ValueError(
+            f'{len(invalid)} nóminas con cuenta bancaria no válida ({first_error}); '
+            f'IDs de nómina: {listed}{"..." if len(invalid) > 20 else ""}'
+        )
+    # La referencia más larga es la del id más alto
+    layout.check_reference(batch.reference(max_id))
+    return batch
+
+
+def pay_batch(batch: PaymentBatch, chunk_size: int = 1000) -> PaymentBatch:
+    """
+    Marca como pagadas las nóminas del lote en una sola transacción corta y
+    completa sus totales; el archivo se genera después con iter_batch_file
+
+    Cada fragmento se lee con bloqueo y se actualiza con un UPDATE. Si algo
+    falla se revierte todo; PaymentConflict si el identificador ya existe o
+    si otro lote pagó las nóminas antes (no queda nada que pagar).
+    """
+    from app.logic.summary import refresh_period_summaries
+
+    filters = _payable_filters(batch.period, batch.country_code)
+    reference_prefix = literal(f'{batch.batch_id}-', String)
+    last_id = 0
+
+    try:
+        if db.session.query(Payroll.id).filter(Payroll.bank_transfer_id.like(f'{batch.batch_id}-%')).first():
+            raise PaymentConflict(f'Ya existe un lote con el identificador {batch.batch_id}')
+        while True:
+            rows = db.session.execute(
+                select(Payroll.id, Payroll.total_amount, Employee.bank_account)
+                .join(Employee)
+                .where(*filters, Payroll.id > last_id)
+                .order_by(Payroll.id)
+                .limit(chunk_size)
+                .with_for_update(of=Payroll)
+            ).all()
+            if not rows:
+                break
+
+            for row in rows:
+                # La cuenta pudo cambiar después de prepare_batch
+                batch.layout.check_account(row.bank_account)
+            ids = [row.id for row in rows]
+            result = db.session.execute(
+                update(Payroll)
+                .where(Payroll.id.in_(ids), Payroll.status == 'confirmed')
+                .values(
+                    status='paid',
+                    payment_date=batch.payment_date,
+                    bank_transfer_id=reference_prefix + cast(Payroll.id, String),
+                    updated_at=datetime.utcnow(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount != len(ids):
+                raise PaymentConflict('Otra operación modificó las nóminas del lote; vuelva a generarlo')
+
+            batch.count += len(rows)
+            batch.total += sum(Decimal(str(row.total_amount or 0)) for row in rows)
+            last_id = ids[-1]
+
+        if not batch.count:
+            raise PaymentConflict(f'Las nóminas de {batch.period} para {batch.country_code} ya fueron pagadas por otro lote')
+
+        # El UPDATE no pasa por el ORM: recalcular el total pagado del período
+        refresh_period_summaries([batch.period])
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    return batch
+
+
+def iter_batch_file(batch_id: str, chunk_size: int = 1000) -> Iterator[str]:
+    """
+    Genera el archivo de un lote ya pagado (no modifica nada); LookupError
+    si el lote no existe
+    """
+    batch = parse_batch_id(batch_id)
+    rows_query = (
+        select(Payroll.id, Payroll.total_amount, Payroll.payment_date, Employee.name, Employee.bank_account)
+        .join(Employee)
+        .where(Payroll.status == 'paid', Payroll.bank_transfer_id.like(f'{batch_id}-%'))
+        .order_by(Payroll.id)
+    )
+    result = db.session.execute(rows_query, execution_options={'yield_per': chunk_size})
+    partitions = result.partitions()
+    first = next(partitions, None)
+    if first is None:
+        raise LookupError(f'Lote no encontrado: {batch_id}')
+    batch.payment_date = first[0].payment_date
+
+    yield batch.layout.header(batch)
+    for rows in itertools.chain([first], partitions):
+        batch.count += len(rows)
+        batch.total += sum(Decimal(str(row.total_amount or 0)) for row in rows)
+        yield batch.layout.lines(rows, batch)
+    yield batch.layout.trailer(batch)
+
+
+def parse_batch_id(batch_id: str) -> PaymentBatch:
+    """Período y país de un identificador de lote (ValueError si no es válido)"""
+    match = BATCH_ID_PATTERN.match(batch_id or '')
+    if match is None or match.group(1) not in BANK_LAYOUTS:
+        raise ValueError(f'Identificador de lote no válido: {batch_id}')
+    country_code, year, month, _ = match.groups()
+    return PaymentBatch(batch_id=batch_id, period=f'{year}-{month}', country_code=country_code,
+                        payment_date=date.today())
+
+
+def write_payment_file(batch: PaymentBatch, output_dir: str, chunk_size: int = 1000) -> Dict[str, Any]:
+    """
+    Paga el lote y escribe su archivo en output_dir (se escribe con otro
+    nombre y se renombra al terminar); devuelve el resumen del lote
+
+    Si el archivo no se puede escribir el lote ya está pagado: se vuelve a
+    generar con iter_batch_file(batch_id).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pay_batch(batch, chunk_size)
+    path = os.path.join(output_dir, batch.filename)
+    tmp_path = path + '.tmp'
+    try:
+        # newline='': los formatos ya usan \r\n
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            for chunk in iter_batch_file(batch.batch_id, chunk_size):
+                f.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    return {**batch.to_dict(), 'path': path}
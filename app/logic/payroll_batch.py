@@ -0,0 +1,308 @@
+"""
+Cálculo de nómina por lotes para un período completo
+"""
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Dict, List, Any, Optional, Iterable
+
+from sqlalchemy import true
+
+from app import db
+from app.models import Employee, Attendance, Payroll
+from app.logic.aggregation import aggregate_period_hours
+from app.logic.calculators import HoursAggregate, get_calculator
+from app.utils import get_period_dates
+
+# Motores de cálculo disponibles para los lotes
+ENGINES = ('decimal', 'vectorized', 'aggregate')
+
+# Bonificaciones y descuentos se redondean a centavos
+CENT = Decimal('0.01')
+
+
+def employee_filters(country_code: Optional[str] = None,
+                     employee_ids: Optional[Iterable[int]] = None) -> List[Any]:
+    """
+    Construye los filtros de empleados para un cálculo por lotes
+    (solo empleados activos, opcionalmente por país o lista de IDs)
+    """
+    filters = [Employee.is_active == true()]
+    if country_code:
+        filters.append(Employee.country_code == country_code.upper())
+    if employee_ids:
+        filters.append(Employee.id.in_(list(employee_ids)))
+    return filters
+
+
+def parse_adjustments(adjustments: Any) -> Dict[int, Dict[str, Any]]:
+    """
+    Valida los ajustes por empleado ({employee_id: {'bonuses', 'deductions'}}) y
+    devuelve las claves como enteros; lanza ValueError si no son válidos
+    """
+    if not adjustments:
+        return {}
+    if not isinstance(adjustments, dict):
+        raise ValueError('adjustments debe ser un objeto {employee_id: {bonuses, deductions}}')
+    parsed = {}
+    for key, values in adjustments.items():
+        try:
+            employee_id = int(key)
+        except (TypeError, ValueError):
+            raise ValueError(f'adjustments: employee_id no válido: {key}') from None
+        if not isinstance(values, dict):
+            raise ValueError(f'adjustments: los ajustes del empleado {key} deben ser un objeto')
+        for field in ('bonuses', 'deductions'):
+            try:
+                Decimal(str(values.get(field, 0)))
+            except InvalidOperation:
+                raise ValueError(f'adjustments: {field} no válido para el empleado {key}') from None
+        parsed[employee_id] = values
+    return parsed
+
+
+def _adjustment(adjustments: Dict[Any, Dict[str, Any]], employee_id: int, key: str) -> Decimal:
+    """
+    Obtiene una bonificación o descuento para un empleado del lote, redondeado
+    a centavos (como la columna donde se guarda) para que todos los motores
+    calculen con el mismo valor
+    """
+    values = adjustments.get(employee_id) or adjustments.get(str(employee_id)) or {}
+    return Decimal(str(values.get(key, 0))).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def calculation_response(employee: Employee, payroll: Payroll,
+                         calculation_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Prepara la respuesta de una nómina calculada con información adicional según el país
+    """
+    response_data = payroll.to_dict()
+    response_data['summary'] = calculation_result.get('summary', {})
+
+    # Para Argentina, incluir detalles de aportes
+    if employee.country_code == 'AR':
+        response_data['aportes'] = {
+            'jubilacion': float(calculation_result.get('jubilacion', 0)),
+            'obra_social': float(calculation_result.get('obra_social', 0)),
+            'pami': float(calculation_result.get('pami', 0)),
+            'total_aportes': float(calculation_result.get('total_aportes', 0)),
+            'gross_salary': float(calculation_result.get('gross_salary', 0)),
+        }
+
+    return response_data
+
+
+def _calculate_decimal(employees: List[Employee], attendances: List[Attendance], period: str,
+                       adjustments: Dict[Any, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Calcula cada empleado con la calculadora Decimal de su país"""
+    attendances_by_employee = defaultdict(list)
+    for attendance in attendances:
+        attendances_by_employee[attendance.employee_id].append(attendance)
+
+    calculations = {}
+    for employee in employees:
+        calculator = get_calculator(employee)
+        calculations[employee.id] = calculator.calculate_payroll(
+            employee,
+            attendances_by_employee.get(employee.id, []),
+            period,
+            _adjustment(adjustments, employee.id, 'bonuses'),
+            _adjustment(adjustments, employee.id, 'deductions')
+        )
+    return calculations
+
+
+def _calculate_aggregated(employees: List[Employee], hours_by_employee: Dict[int, HoursAggregate],
+                          period: str, adjustments: Dict[Any, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Calcula cada empleado a partir de las horas sumadas en la base de datos"""
+    calculations = {}
+    for employee in employees:
+        calculator = get_calculator(employee)
+        calculations[employee.id] = calculator.calculate_from_aggregate(
+            employee,
+            hours_by_employee.get(employee.id, HoursAggregate()),
+            period,
+            _adjustment(adjustments, employee.id, 'bonuses'),
+            _adjustment(adjustments, employee.id, 'deductions')
+        )
+    return calculations
+
+
+def _calculate_vectorized(employees: List[Employee], attendance_rows: List[Any],
+                          adjustments: Dict[Any, Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+    """Calcula todos los empleados de cada país con el motor columnar"""
+    import numpy as np
+    from app.logic.vectorized import (
+        MONEY_SCALE, build_attendance_columns, calculate_columnar, columnar_results, to_fixed
+    )
+
+    employees_by_country = defaultdict(list)
+    for employee in employees:
+        employees_by_country[(employee.country_code or 'GT').upper()].append(employee)
+
+    calculations = {}
+    for country_code, country_employees in employees_by_country.items():
+        employee_ids = [employee.id for employee in country_employees]
+        columns = build_attendance_columns(attendance_rows, employee_ids)
+        fixed = calculate_columnar(
+            country_code,
+            columns['employee_idx'],
+            columns['centi_hours'],
+            columns['weekday'],
+            columns['is_holiday'],
+            np.array([to_fixed(employee.hourly_rate, MONEY_SCALE) for employee in country_employees]),
+            np.array([to_fixed(_adjustment(adjustments, employee_id, 'bonuses'), MONEY_SCALE)
+                      for employee_id in employee_ids]),
+            np.array([to_fixed(_adjustment(adjustments, employee_id, 'deductions'), MONEY_SCALE)
+                      for employee_id in employee_ids]),
+        )
+        calculations.update(zip(employee_ids, columnar_results(country_code, fixed)))
+    return calculations
+
+
+def load_and_calculate(period: str, filters: List[Any],
+                       adjustments: Optional[Dict[Any, Dict[str, Any]]] = None,
+                       engine: str = 'decimal') -> Dict[str, Any]:
+    """
+    Carga empleados y asistencias del período (una consulta cada uno) y calcula
+    la nómina de cada empleado con el motor indicado, sin guardar nada
+
+    Devuelve los empleados, el resultado de cada uno por ID, la cantidad de
+    asistencias leídas (None con engine='aggregate') y los tiempos de cada fase.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f'Motor de cálculo no soportado: {engine}')
+
+    adjustments = adjustments or {}
+    start_date, end_date = get_period_dates(period)
+    timing = {}
+
+    started = time.perf_counter()
+    employees = Employee.query.filter(*filters).order_by(Employee.id).all()
+
+    period_filters = [
+        *filters,
+        Attendance.date >= start_date,
+        Attendance.date <= end_date,
+        ~Attendance.is_vacation  # Excluir vacaciones
+    ]
+    if engine == 'aggregate':
+        attendances = aggregate_period_hours(period, filters)
+    elif engine == 'vectorized':
+        # El motor columnar solo necesita cuatro columnas, sin objetos ORM
+        attendances = db.session.query(
+            Attendance.employee_id, Attendance.date, Attendance.hours_worked, Attendance.is_holiday
+        ).join(Employee).filter(*period_filters).all()
+    else:
+        attendances = Attendance.query.join(Employee).filter(*period_filters).all()
+    timing['load_ms'] = (time.perf_counter() - started) * 1000
+
+    # Calcular con la estrategia de cada país
+    started = time.perf_counter()
+    if engine == 'aggregate':
+        calculations = _calculate_aggregated(employees, attendances, period, adjustments)
+    elif engine == 'vectorized':
+        calculations = _calculate_vectorized(employees, attendances, adjustments)
+    else:
+        calculations = _calculate_decimal(employees, attendances, period, adjustments)
+    timing['calculate_ms'] = (time.perf_counter() - started) * 1000
+
+    return {
+        'employees': employees,
+        'calculations': calculations,
+        'attendance_count': len(attendances) if engine != 'aggregate' else None,
+        'timing': timing,
+    }
+
+
+def calculate_period_batch(period: str,
+                           country_code: Optional[str] = None,
+                           employee_ids: Optional[Iterable[int]] = None,
+                           adjustments: Optional[Dict[Any, Dict[str, Any]]] = None,
+                           engine: str = 'decimal') -> Dict[str, Any]:
+    """
+    Calcula la nómina de un período para todos los empleados activos
+
+    Carga empleados, asistencias y nóminas existentes con una consulta cada una,
+    agrupa las asistencias por empleado, aplica la calculadora de cada país y
+    guarda todas las nóminas en una sola transacción, junto con la limpieza de
+    sus marcas en payroll_dirty. Las nóminas ya pagadas no se modifican (se
+    informan en skipped). Devuelve la respuesta serializada de
+    cada empleado recalculado y los tiempos de cada fase.
+
+    engine='vectorized' usa el motor columnar de app.logic.vectorized (requiere
+    NumPy) en lugar de las calculadoras Decimal fila por fila; engine='aggregate'
+    suma las horas en la base de datos (app.logic.aggregation) y las calculadoras
+    solo reciben los totales de cada empleado.
+    """
+    from app.logic.incremental import clear_payrolls_dirty
+
+    filters = employee_filters(country_code, employee_ids)
+    # Las marcas de payroll_dirty anteriores a la carga quedan resueltas con este cálculo
+    loaded_at = datetime.utcnow()
+    batch = load_and_calculate(period, filters, adjustments, engine)
+    employees, calculations, timing = batch['employees'], batch['calculations'], batch['timing']
+
+    started = time.perf_counter()
+    existing_payrolls = {
+        payroll.employee_id: payroll
+        for payroll in Payroll.query.join(Employee).filter(*filters, Payroll.period == period).all()
+    }
+    timing['load_ms'] += (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    results = []
+    new_payrolls = []
+    skipped_paid = 0
+    for employee in employees:
+        calculation_result = calculations[employee.id]
+        bonuses = calculation_result['bonuses']
+        deductions = calculation_result['deductions']
+
+        payroll = existing_payrolls.get(employee.id)
+        if payroll is not None and payroll.status == 'paid':
+            # Una nómina pagada ya coincide con el archivo del banco: no se recalcula
+            skipped_paid += 1
+            continue
+        if payroll is None:
+            payroll = Payroll(employee_id=employee.id, period=period, status='pending')
+            new_payrolls.append(payroll)
+
+        payroll.base_salary = calculation_result['base_salary']
+        payroll.hours_worked = calculation_result['hours_worked']
+        payroll.overtime_hours = calculation_result['overtime_hours']
+        payroll.overtime_pay = calculation_result['overtime_pay']
+        payroll.bonuses = bonuses
+        payroll.deductions = deductions
+        payroll.calculate_total()
+
+        results.append((employee, payroll, calculation_result))
+    timing['calculate_ms'] += (time.perf_counter() - started) * 1000
+
+    # Guardar todas las nóminas en una sola transacción
+    started = time.perf_counter()
+    db.session.add_all(new_payrolls)
+    clear_payrolls_dirty(period, [employee.id for employee, _, _ in results], loaded_at)
+    db.session.commit()
+    timing['persist_ms'] = (time.perf_counter() - started) * 1000
+
+    # Recargar en bloque los objetos expirados por el commit (valores ya redondeados
+    # por la base de datos) en lugar de refrescar cada nómina por separado
+    started = time.perf_counter()
+    Employee.query.filter(*filters).all()
+    Payroll.query.join(Employee).filter(*filters, Payroll.period == period).all()
+    data = [calculation_response(*result) for result in results]
+    timing['serialize_ms'] = (time.perf_counter() - started) * 1000
+
+    timing['total_ms'] = sum(timing.values())
+
+    return {
+        'period': period,
+        'results': data,
+        'attendance_count': batch['attendance_count'],
+        'created': len(new_payrolls),
+        'updated': len(results) - len(new_payrolls),
+        'skipped': {'paid': skipped_paid},
+        'timing': timing,
+    }
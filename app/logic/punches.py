@@ -0,0 +1,161 @@
+"""
+Marcaciones de entrada/salida (relojes de asistencia)
+
+Una marcación indica empleado, tipo ('in' o 'out') y fecha/hora. Un lote de
+marcaciones se combina con las asistencias existentes y se escribe con el mismo
+upsert por bloques que la ingesta masiva:
+
+    - 'in' crea la asistencia del día o adelanta su hora de entrada
+    - 'out' fija la hora de salida de la asistencia del día; si no existe y el
+      día anterior quedó abierto (sin salida), cierra ese turno nocturno
+
+Las asistencias guardan la hora local del lugar de trabajo: las marcaciones
+con zona horaria (y las que toman la hora de recepción, en UTC) se convierten
+a la zona del país del empleado (COUNTRY_CONFIG['timezone']).
+"""
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import tuple_
+
+from app import db
+from app.models import Attendance, Employee
+from app.locales.translations import get_country_config
+from app.logic.attendance_bulk import IN_CHUNK_SIZE, upsert_attendance_rows
+
+PUNCH_TYPES = ('in', 'out')
+
+
+def parse_punch(data: Dict[str, Any], now: datetime = None) -> Dict[str, Any]:
+    """
+    Valida una marcación; sin timestamp se usa la hora de recepción (now, en UTC)
+    Lanza ValueError con el motivo si no es válida
+
+    Un timestamp con zona horaria se conserva así y apply_punches lo convierte
+    a la hora local del país del empleado; sin zona ya es hora local.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('La marcación debe ser un objeto')
+    if not data.get('employee_id') or data.get('type') not in PUNCH_TYPES:
+        raise ValueError("Faltan campos requeridos: employee_id, type ('in' u 'out')")
+
+    timestamp = data.get('timestamp')
+    timestamp = datetime.fromisoformat(str(timestamp)) if timestamp else (now or datetime.now(timezone.utc))
+    return {
+        'employee_id': int(data['employee_id']),
+        'type': data['type'],
+        # Las horas se guardan con precisión de segundos
+        'timestamp': timestamp.replace(microsecond=0),
+    }
+
+
+def _employee_zones(employee_ids: List[int]) -> Dict[int, ZoneInfo]:
+    """Zona horaria (la del país) de cada empleado existente, con consultas IN por bloques"""
+    zones = {}
+    for start in range(0, len(employee_ids), IN_CHUNK_SIZE):
+        chunk = employee_ids[start:start + IN_CHUNK_SIZE]
+        for employee_id, country_code in db.session.query(Employee.id, Employee.country_code).filter(
+            Employee.id.in_(chunk)
+        ):
+            zones[employee_id] = _country_zone(country_code or 'GT')
+    return zones
+
+
+@lru_cache(maxsize=None)
+def _country_zone(country_code: str) -> ZoneInfo:
+    return ZoneInfo(get_country_config(country_code)['timezone'])
+
+
+def _local_time(timestamp: datetime, zone: ZoneInfo) -> datetime:
+    """Hora local (sin zona) del lugar de trabajo"""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(zone).replace(tzinfo=None)
+
+
+def _load_rows(keys: List[Tuple[int, date]]) -> Dict[Tuple[int, date], Dict[str, Any]]:
+    """Asistencias existentes de los pares (empleado, fecha) indicados"""
+    columns = (Attendance.employee_id, Attendance.date, Attendance.in_time, Attendance.out_time,
+               Attendance.is_holiday, Attendance.is_vacation, Attendance.notes)
+    rows = {}
+    for start in range(0, len(keys), IN_CHUNK_SIZE):
+        chunk = keys[start:start + IN_CHUNK_SIZE]
+        for row in db.session.query(*columns).filter(
+            tuple_(Attendance.employee_id, Attendance.date).in_(chunk)
+        ):
+            rows[(row.employee_id, row.date)] = dict(row._mapping)
+    return rows
+
+
+def apply_punches(punches: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combina un lote de marcaciones (ya validadas con parse_punch) con las
+    asistencias existentes y las escribe en una sola transacción
+
+    Devuelve la cantidad de asistencias escritas y los errores por marcación
+    (empleado inexistente o salida sin entrada).
+    """
+    errors = []
+    zones = _employee_zones(sorted({punch['employee_id'] for punch in punches}))
+
+    # (hora local, marcación) de los empleados existentes
+    local_punches = []
+    for punch in punches:
+        zone = zones.get(punch['employee_id'])
+        if zone is None:
+            errors.append({'punch': punch, 'error': f"Empleado {punch['employee_id']} no encontrado"})
+            continue
+        local_punches.append((_local_time(punch['timestamp'], zone), punch))
+
+    keys = set()
+    for local, punch in local_punches:
+        keys.add((punch['employee_id'], local.date()))
+        if punch['type'] == 'out':
+            keys.add((punch['employee_id'], local.date() - timedelta(days=1)))
+    rows = _load_rows(sorted(keys))
+
+    touched = set()
+    for local, punch in sorted(local_punches, key=lambda item: item[0]):
+        employee_id = punch['employee_id']
+        day = local.date()
+        punch_time = local.time()
+        key = (employee_id, day)
+        row = rows.get(key)
+
+        if punch['type'] == 'in':
+            if row is None:
+                rows[key] = {
+                    'employee_id': employee_id, 'date': day, 'in_time': punch_time, 'out_time': None,
+                    'is_holiday': False, 'is_vacation': False, 'notes': None,
+                }
+            elif punch_time < row['in_time']:
+                row['in_time'] = punch_time
+            touched.add(key)
+            continue
+
+        if row is None:
+            previous_key = (employee_id, day - timedelta(days=1))
+            previous = rows.get(previous_key)
+            if previous is None or previous['out_time'] is not None:
+                errors.append({'punch': punch, 'error': 'Salida sin entrada registrada'})
+                continue
+            key, row = previous_key, previous
+        row['out_time'] = punch_time
+        touched.add(key)
+
+    now = datetime.utcnow()
+    records = []
+    for key in sorted(touched):
+        row = dict(rows[key])
+        row['hours_worked'] = Attendance.compute_hours(row['date'], row['in_time'], row['out_time'])
+        row['created_at'] = now
+        row['updated_at'] = now
+        records.append(row)
+
+    if records:
+        upsert_attendance_rows(records)
+    db.session.commit()
+
+    return {'written': len(records), 'errors': errors}
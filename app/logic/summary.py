@@ -0,0 +1,283 @@
+"""
+Mantenimiento incremental de la tabla period_summary
+
+Cada flush de la sesión que crea, modifica o elimina asistencias, nóminas o
+empleados suma sus diferencias (deltas) a las filas de resumen de los períodos
+afectados dentro de la misma transacción. Si la fila de un período todavía no
+existe, se calcula completa desde las tablas base (incluyendo el flush actual),
+de modo que no hace falta un backfill previo para que los totales sean correctos.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Any
+
+from sqlalchemy import event, func, inspect, select, true, update
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Employee, Attendance, Payroll, PeriodSummary
+from app.utils import get_period_dates
+
+GLOBAL_PERIOD = PeriodSummary.GLOBAL_PERIOD
+
+SUMMARY_COLUMNS = ('active_employees', 'payroll_count', 'total_paid', 'attendance_count')
+
+# Marca de "recalcular desde las tablas base" cuando no se conoce el valor anterior
+_RECOMPUTE = object()
+
+
+def _attendance_period(attendance_date) -> str:
+    return attendance_date.strftime('%Y-%m')
+
+
+def compute_summary(connection, period: str) -> Dict[str, Any]:
+    """Calcula los contadores de un período (o de '*') desde las tablas base"""
+    if period == GLOBAL_PERIOD:
+        return {
+            'active_employees': connection.execute(
+                select(func.count()).select_from(Employee.__table__).where(Employee.is_active == true())
+            ).scalar() or 0,
+        }
+
+    start_date, end_date = get_period_dates(period)
+    payroll_count, total_paid = connection.execute(
+        select(
+            func.count(),
+            func.sum(Payroll.total_amount).filter(Payroll.status == 'paid')
+        ).where(Payroll.period == period)
+    ).one()
+    attendance_count = connection.execute(
+        select(func.count()).select_from(Attendance.__table__).where(
+            Attendance.date >= start_date, Attendance.date <= end_date
+        )
+    ).scalar()
+    return {
+        'payroll_count': payroll_count or 0,
+        'total_paid': Decimal(str(total_paid or 0)),
+        'attendance_count': attendance_count or 0,
+    }
+
+
+def _dialect_insert(connection):
+    """insert() con soporte de ON CONFLICT (PostgreSQL y SQLite) o None"""
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def _store_computed(connection, period: str, values: Dict[str, Any],
+                    deltas: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Inserta la fila calculada de un período; si otra transacción la insertó
+    antes, aplica los deltas sobre ella (o la reemplaza si no hay deltas)
+    """
+    table = PeriodSummary.__table__
+    row = {'period': period, 'updated_at': datetime.utcnow(), **values}
+    insert = _dialect_insert(connection)
+    if insert is None:
+        connection.execute(table.delete().where(table.c.period == period))
+        connection.execute(table.insert().values(**row))
+        return
+
+    stmt = insert(table).values(**row)
+    if deltas is None:
+        set_ = {column: stmt.excluded[column] for column in row if column != 'period'}
+    else:
+        set_ = {column: table.c[column] + delta for column, delta in deltas.items()}
+        set_['updated_at'] = stmt.excluded.updated_at
+    connection.execute(stmt.on_conflict_do_update(index_elements=['period'], set_=set_))
+
+
+def apply_summary_deltas(connection, deltas: Dict[str, Any]) -> None:
+    """
+    Aplica los deltas de cada período: UPDATE incremental si la fila existe;
+    si no, la calcula completa desde las tablas base
+    """
+    table = PeriodSummary.__table__
+    for period, period_deltas in deltas.items():
+        if period_deltas is _RECOMPUTE:
+            _store_computed(connection, period, compute_summary(connection, period))
+            continue
+        period_deltas = {column: delta for column, delta in period_deltas.items() if delta}
+        if not period_deltas:
+            continue
+        result = connection.execute(
+            update(table).where(table.c.period == period).values(
+                updated_at=datetime.utcnow(),
+                **{column: table.c[column] + delta for column, delta in period_deltas.items()}
+            )
+        )
+        if result.rowcount == 0:
+            _store_computed(connection, period, compute_summary(connection, period), period_deltas)
+
+
+def refresh_period_summaries(periods: Iterable[str]) -> None:
+    """
+    Recalcula por completo los períodos indicados (para escrituras masivas que
+    no pasan por el ORM, como la ingesta de asistencias con ON CONFLICT)
+    """
+    connection = db.session.connection()
+    for period in sorted(set(periods)):
+        _store_computed(connection, period, compute_summary(connection, period))
+
+
+def rebuild_period_summaries(periods: Optional[Iterable[str]] = None) -> int:
+    """
+    Reconstruye la tabla de resumen (todas las filas o solo los períodos
+    indicados) desde las tablas base; devuelve la cantidad de filas escritas
+    """
+    if periods is None:
+        periods = {period for (period,) in db.session.query(Payroll.period).distinct()}
+        first_date, last_date = db.session.query(func.min(Attendance.date), func.max(Attendance.date)).one()
+        if first_date:
+            year, month = first_date.year, first_date.month
+            while (year, month) <= (last_date.year, last_date.month):
+                periods.add(f'{year}-{month:02d}')
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        db.session.query(PeriodSummary).delete()
+        periods.add(GLOBAL_PERIOD)
+
+    periods = set(periods)
+    refresh_period_summaries(periods)
+    db.session.commit()
+    return len(periods)
+
+
+def get_period_summary(period: str) -> Dict[str, Any]:
+    """
+    Lee el resumen del período y los totales globales con una sola consulta;
+    las filas que falten se calculan desde las tablas base sin guardarlas (una
+    lectura no escribe: las crean el listener de flush y `flask summary rebuild`)
+    """
+    rows = {
+        row.period: {column: getattr(row, column) for column in SUMMARY_COLUMNS}
+        for row in PeriodSummary.query.filter(PeriodSummary.period.in_([period, GLOBAL_PERIOD]))
+    }
+    for key in (period, GLOBAL_PERIOD):
+        if key not in rows:
+            rows[key] = compute_summary(db.session.connection(), key)
+
+    return {
+        'active_employees': rows[GLOBAL_PERIOD]['active_employees'],
+        'payroll_count': rows[period]['payroll_count'],
+        'total_paid': rows[period]['total_paid'] or Decimal('0'),
+        'attendance_count': rows[period]['attendance_count'],
+    }
+
+
+# ==================== DELTAS DEL FLUSH ====================
+
+def _old_value(obj, attribute: str):
+    """
+    Valor anterior de un atributo modificado; _RECOMPUTE si no se cargó
+    antes de modificarse (no se puede calcular el delta)
+    """
+    history = inspect(obj).attrs[attribute].history
+    if not history.has_changes():
+        return getattr(obj, attribute)
+    if history.deleted:
+        return history.deleted[0]
+    return _RECOMPUTE
+
+
+def _paid_amount(status, total_amount) -> Decimal:
+    if status != 'paid' or total_amount is None:
+        return Decimal('0')
+    return Decimal(str(total_amount))
+
+
+class _Deltas:
+    """Acumula los deltas por período de un flush"""
+
+    def __init__(self):
+        self.periods = defaultdict(lambda: defaultdict(int))
+
+    def add(self, period: str, column: str, delta) -> None:
+        if self.periods.get(period) is _RECOMPUTE:
+            return
+        self.periods[period][column] += delta
+
+    def recompute(self, *periods: str) -> None:
+        for period in periods:
+            self.periods[period] = _RECOMPUTE
+
+    def attendance(self, attendance_date, sign: int) -> None:
+        if attendance_date is not None:
+            self.add(_attendance_period(attendance_date), 'attendance_count', sign)
+
+    def payroll(self, period, status, total_amount, sign: int) -> None:
+        if period is None:
+            return
+        self.add(period, 'payroll_count', sign)
+        self.add(period, 'total_paid', sign * _paid_amount(status, total_amount))
+
+    def employee(self, is_active, sign: int) -> None:
+        # is_active es True por defecto en la columna
+        if is_active is None or is_active:
+            self.add(GLOBAL_PERIOD, 'active_employees', sign)
+
+
+def _collect_deltas(session: Session) -> _Deltas:
+    deltas = _Deltas()
+
+    for obj in session.new:
+        if isinstance(obj, Attendance):
+            deltas.attendance(obj.date, 1)
+        elif isinstance(obj, Payroll):
+            deltas.payroll(obj.period, obj.status, obj.total_amount, 1)
+        elif isinstance(obj, Employee):
+            deltas.employee(obj.is_active, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Attendance):
+            deltas.attendance(obj.date, -1)
+        elif isinstance(obj, Payroll):
+            deltas.payroll(obj.period, obj.status, obj.total_amount, -1)
+        elif isinstance(obj, Employee):
+            deltas.employee(obj.is_active, -1)
+
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, Attendance):
+            old_date = _old_value(obj, 'date')
+            if old_date is _RECOMPUTE:
+                deltas.recompute(_attendance_period(obj.date))
+            elif _attendance_period(old_date) != _attendance_period(obj.date):
+                deltas.attendance(old_date, -1)
+                deltas.attendance(obj.date, 1)
+        elif isinstance(obj, Payroll):
+            old = [_old_value(obj, attribute) for attribute in ('period', 'status', 'total_amount')]
+            if _RECOMPUTE in old:
+                deltas.recompute(*{obj.period, old[0]} - {_RECOMPUTE})
+            else:
+                deltas.payroll(*old, -1)
+                deltas.payroll(obj.period, obj.status, obj.total_amount, 1)
+        elif isinstance(obj, Employee):
+            old_active = _old_value(obj, 'is_active')
+            if old_active is _RECOMPUTE:
+                deltas.recompute(GLOBAL_PERIOD)
+            elif bool(old_active) != bool(obj.is_active):
+                deltas.employee(old_active, -1)
+                deltas.employee(obj.is_active, 1)
+
+    return deltas
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    """Aplica los deltas del flush en la misma transacción"""
+    deltas = _collect_deltas(session)
+    if deltas.periods:
+        apply_summary_deltas(session.connection(), deltas.periods)
+
+
+def register_summary_listeners() -> None:
+    """Registra el mantenimiento incremental de period_summary (idempotente)"""
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
@@ -0,0 +1,234 @@
+"""
+Motor de cálculo columnar (NumPy) para nóminas por lotes
+
+Calcula horas regulares, horas extras (días hábiles / fines de semana y feriados)
+y aportes de ley de muchos empleados a la vez sobre arreglos de asistencias,
+usando aritmética entera de punto fijo para obtener exactamente los mismos
+resultados que las calculadoras Decimal de app.logic.calculators.
+
+Escalas de punto fijo:
+    - horas: centésimas de hora (8.25 h -> 825)
+    - tarifas, bonificaciones y descuentos: centavos (50.00 -> 5000)
+    - multiplicadores y tasas: centésimas (1.5 -> 150, 0.11 -> 11)
+"""
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.logic.calculators import GuatemalaCalculator, get_country_rules
+
+HOURS_SCALE = 100
+MONEY_SCALE = 100
+FACTOR_SCALE = 100
+
+# Exponentes decimales de cada columna de resultado
+HOURS_EXP = 2
+BASE_SALARY_EXP = 4      # horas * tarifa
+OVERTIME_PAY_EXP = 6     # horas * tarifa * multiplicador
+GROSS_EXP = 6
+APORTES_EXP = 8          # bruto * tasa
+
+
+def to_fixed(value: Any, scale: int) -> int:
+    """
+    Convierte un valor (Decimal, float, int o str) a entero de punto fijo
+    Lanza ValueError si el valor no es representable exactamente en la escala
+    """
+    fixed = Decimal(str(value)) * scale
+    if fixed != fixed.to_integral_value():
+        raise ValueError(f'El valor {value} no es representable con escala {scale}')
+    return int(fixed)
+
+
+def _from_fixed(value: int, exponent: int) -> Decimal:
+    """Convierte un entero de punto fijo a Decimal"""
+    return Decimal(int(value)).scaleb(-exponent)
+
+
+@lru_cache(maxsize=None)
+def _country_rules(country_code: str) -> Dict[str, Any]:
+    """
+    Reglas de punto fijo equivalentes a cada calculadora, derivadas de las
+    reglas precompiladas del país (Guatemala y España usan la jornada y el
+    recargo fijos de GuatemalaCalculator para todas las horas extras)
+    """
+    rules = get_country_rules(country_code)
+    if rules.country_code == 'AR':
+        return {
+            'legal_hours': to_fixed(rules.legal_workday_hours, HOURS_SCALE),
+            'weekday_factor': to_fixed(rules.overtime_weekday_multiplier, FACTOR_SCALE),
+            'weekend_factor': to_fixed(rules.overtime_weekend_multiplier, FACTOR_SCALE),
+            'aportes': {name: to_fixed(rate, FACTOR_SCALE) for name, rate in rules.aportes},
+        }
+    return {
+        'legal_hours': to_fixed(GuatemalaCalculator.REGULAR_HOURS, HOURS_SCALE),
+        'weekday_factor': to_fixed(GuatemalaCalculator.OVERTIME_MULTIPLIER, FACTOR_SCALE),
+        'weekend_factor': to_fixed(GuatemalaCalculator.OVERTIME_MULTIPLIER, FACTOR_SCALE),
+        'aportes': None,
+    }
+
+
+def build_attendance_columns(rows: Sequence[Tuple[int, Any, Any, bool]],
+                             employee_ids: Sequence[int]) -> Dict[str, np.ndarray]:
+    """
+    Construye los arreglos columnares a partir de filas
+    (employee_id, date, hours_worked, is_holiday)
+
+    Los empleados se identifican por su posición en employee_ids; las filas
+    de empleados que no están en la lista se descartan.
+    """
+    positions = {employee_id: index for index, employee_id in enumerate(employee_ids)}
+    employee_idx = []
+    centi_hours = []
+    dates = []
+    holidays = []
+    for employee_id, attendance_date, hours_worked, is_holiday in rows:
+        index = positions.get(employee_id)
+        if index is None:
+            continue
+        employee_idx.append(index)
+        # hours_worked es Numeric(5, 2): el redondeo de float * 100 es exacto
+        centi_hours.append(int(round(float(hours_worked) * HOURS_SCALE)) if hours_worked else 0)
+        dates.append(attendance_date)
+        holidays.append(bool(is_holiday))
+
+    # 1970-01-01 fue jueves (weekday 3)
+    days = np.array(dates, dtype='datetime64[D]').astype(np.int64)
+    return {
+        'employee_idx': np.array(employee_idx, dtype=np.int64),
+        'centi_hours': np.array(centi_hours, dtype=np.int64),
+        'weekday': (days + 3) % 7,
+        'is_holiday': np.array(holidays, dtype=bool),
+    }
+
+
+def calculate_columnar(country_code: str,
+                       employee_idx: np.ndarray,
+                       centi_hours: np.ndarray,
+                       weekday: np.ndarray,
+                       is_holiday: np.ndarray,
+                       centi_rates: np.ndarray,
+                       bonuses: Optional[np.ndarray] = None,
+                       deductions: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Calcula la nómina de todos los empleados de un país en una sola pasada
+
+    employee_idx, centi_hours, weekday (0=lunes) e is_holiday tienen una entrada
+    por asistencia; centi_rates, bonuses y deductions (en centavos) una por
+    empleado. Devuelve arreglos int64 por empleado con los exponentes HOURS_EXP,
+    BASE_SALARY_EXP, OVERTIME_PAY_EXP, GROSS_EXP y APORTES_EXP.
+    """
+    rules = _country_rules((country_code or 'GT').upper())
+    n_employees = len(centi_rates)
+    centi_rates = np.asarray(centi_rates, dtype=np.int64)
+    bonuses = np.zeros(n_employees, dtype=np.int64) if bonuses is None else np.asarray(bonuses, dtype=np.int64)
+    deductions = np.zeros(n_employees, dtype=np.int64) if deductions is None else np.asarray(deductions, dtype=np.int64)
+
+    employee_idx = np.asarray(employee_idx, dtype=np.int64)
+    centi_hours = np.asarray(centi_hours, dtype=np.int64)
+    is_weekend = (np.asarray(weekday) >= 5) | np.asarray(is_holiday, dtype=bool)
+
+    # Horas regulares hasta el límite legal, el resto son horas extras
+    regular = np.minimum(centi_hours, rules['legal_hours'])
+    overtime = centi_hours - regular
+
+    def per_employee(values):
+        totals = np.zeros(n_employees, dtype=np.int64)
+        np.add.at(totals, employee_idx, values)
+        return totals
+
+    total_hours = per_employee(centi_hours)
+    regular_hours = per_employee(regular)
+    overtime_weekday = per_employee(np.where(is_weekend, 0, overtime))
+    overtime_weekend = per_employee(np.where(is_weekend, overtime, 0))
+
+    base_salary = regular_hours * centi_rates
+    overtime_pay = (overtime_weekday * rules['weekday_factor'] +
+                    overtime_weekend * rules['weekend_factor']) * centi_rates
+
+    scale_base = 10 ** (OVERTIME_PAY_EXP - BASE_SALARY_EXP)
+    scale_money = 10 ** (GROSS_EXP - 2)
+    gross_salary = base_salary * scale_base + overtime_pay + bonuses * scale_money
+
+    result = {
+        'total_hours': total_hours,
+        'regular_hours': regular_hours,
+        'overtime_hours_weekday': overtime_weekday,
+        'overtime_hours_weekend': overtime_weekend,
+        'base_salary': base_salary,
+        'overtime_pay': overtime_pay,
+        'gross_salary': gross_salary,
+        'bonuses': bonuses,
+        'deductions': deductions,
+    }
+
+    if rules['aportes']:
+        total_aportes = np.zeros(n_employees, dtype=np.int64)
+        for name, rate in rules['aportes'].items():
+            result[name] = gross_salary * rate
+            total_aportes += result[name]
+        result['total_aportes'] = total_aportes
+        result['total_amount'] = (gross_salary * FACTOR_SCALE - total_aportes -
+                                  deductions * 10 ** (APORTES_EXP - 2))
+    else:
+        result['total_amount'] = gross_salary - deductions * scale_money
+
+    return result
+
+
+def columnar_results(country_code: str, columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Convierte el resultado columnar a la misma estructura (con Decimal) que
+    devuelve calculate_payroll de la calculadora del país
+    """
+    is_argentina = 'total_aportes' in columns
+    results = []
+    for i in range(len(columns['total_hours'])):
+        total_hours = _from_fixed(columns['total_hours'][i], HOURS_EXP)
+        regular_hours = _from_fixed(columns['regular_hours'][i], HOURS_EXP)
+        overtime_weekday = _from_fixed(columns['overtime_hours_weekday'][i], HOURS_EXP)
+        overtime_weekend = _from_fixed(columns['overtime_hours_weekend'][i], HOURS_EXP)
+        overtime_hours = overtime_weekday + overtime_weekend
+
+        result = {
+            'base_salary': _from_fixed(columns['base_salary'][i], BASE_SALARY_EXP),
+            'hours_worked': regular_hours,
+            'overtime_hours': overtime_hours,
+            'overtime_pay': _from_fixed(columns['overtime_pay'][i], OVERTIME_PAY_EXP),
+            'bonuses': _from_fixed(columns['bonuses'][i], 2),
+            'deductions': _from_fixed(columns['deductions'][i], 2),
+        }
+
+        if is_argentina:
+            gross_salary = _from_fixed(columns['gross_salary'][i], GROSS_EXP)
+            total_aportes = _from_fixed(columns['total_aportes'][i], APORTES_EXP)
+            result.update({
+                'gross_salary': gross_salary,
+                'jubilacion': _from_fixed(columns['jubilacion'][i], APORTES_EXP),
+                'obra_social': _from_fixed(columns['obra_social'][i], APORTES_EXP),
+                'pami': _from_fixed(columns['pami'][i], APORTES_EXP),
+                'total_aportes': total_aportes,
+                'total_amount': _from_fixed(columns['total_amount'][i], APORTES_EXP),
+                'summary': {
+                    'total_hours': float(total_hours),
+                    'regular_hours': float(regular_hours),
+                    'overtime_hours_weekday': float(overtime_weekday),
+                    'overtime_hours_weekend': float(overtime_weekend),
+                    'gross_salary': float(gross_salary),
+                    'total_aportes': float(total_aportes),
+                }
+            })
+        else:
+            result.update({
+                'total_amount': _from_fixed(columns['total_amount'][i], GROSS_EXP),
+                'summary': {
+                    'total_hours': float(total_hours),
+                    'regular_hours': float(regular_hours),
+                    'overtime_hours': float(overtime_hours),
+                }
+            })
+
+        results.append(result)
+    return results
@@ -27,6 +27,13 @@ class Employee(db.Model):
     attendances = relationship('Attendance', back_populates='employee', cascade='all, delete-orphan')
     payrolls = relationship('Payroll', back_populates='employee', cascade='all, delete-orphan')
     
+    # Índice parcial de empleados activos (cálculos por lotes por país y conteo de activos)
+    __table_args__ = (
+        db.Index('ix_employees_active_country', 'country_code', 'id',
+                 postgresql_where=db.text('is_active'),
+                 sqlite_where=db.text('is_active = 1')),
+    )
+    
     def to_dict(self):
         """Convierte el objeto a diccionario"""
         return {
@@ -70,23 +77,40 @@ class Attendance(db.Model):
     # Relaciones
     employee = relationship('Employee', back_populates='attendances')
     
-    # Índice único para evitar registros duplicados
-    __table_args__ = (db.UniqueConstraint('employee_id', 'date', name='unique_employee_date'),)
+    __table_args__ = (
+        # Índice único para evitar registros duplicados
+        db.UniqueConstraint('employee_id', 'date', name='unique_employee_date'),
+        # Listado paginado por cursor: ORDER BY date, in_time, id
+        db.Index('ix_attendances_date_in_time_id', 'date', 'in_time', 'id'),
+        # Cálculos del período: rango de fechas agrupado por empleado
+        db.Index('ix_attendances_date_employee', 'date', 'employee_id',
+                 postgresql_include=['hours_worked', 'is_holiday', 'is_vacation']),
+        # Cálculo de un empleado: employee_id + rango de fechas sin vacaciones
+        db.Index('ix_attendances_employee_date_vacation', 'employee_id', 'date', 'is_vacation',
+                 postgresql_include=['hours_worked', 'is_holiday']),
+    )
+    
+    @staticmethod
+    def compute_hours(attendance_date, in_time, out_time):
+        """Calcula las horas trabajadas entre in_time y out_time (None si falta alguna)"""
+        if not (in_time and out_time):
+            return None
+        in_datetime = datetime.combine(attendance_date, in_time)
+        out_datetime = datetime.combine(attendance_date, out_time)
+        if out_datetime < in_datetime:
+            # Si la salida es al día siguiente
+            out_datetime = datetime.combine(
+                date.fromordinal(attendance_date.toordinal() + 1),
+                out_time
+            )
+        delta = out_datetime - in_datetime
+        hours = delta.total_seconds() / 3600
+        return round(hours, 2)
     
     def calculate_hours(self):
         """Calcula las horas trabajadas basándose en in_time y out_time"""
         if self.in_time and self.out_time:
-            in_datetime = datetime.combine(self.date, self.in_time)
-            out_datetime = datetime.combine(self.date, self.out_time)
-            if out_datetime < in_datetime:
-                # Si la salida es al día siguiente
-                out_datetime = datetime.combine(
-                    date.fromordinal(self.date.toordinal() + 1),
-                    self.out_time
-                )
-            delta = out_datetime - in_datetime
-            hours = delta.total_seconds() / 3600
-            self.hours_worked = round(hours, 2)
+            self.hours_worked = self.compute_hours(self.date, self.in_time, self.out_time)
         return self.hours_worked
     
     def to_dict(self):
@@ -134,8 +158,13 @@ class Payroll(db.Model):
     # Relaciones
     employee = relationship('Employee', back_populates='payrolls')
     
-    # Índice único para evitar nóminas duplicadas
-    __table_args__ = (db.UniqueConstraint('employee_id', 'period', name='unique_employee_period'),)
+    __table_args__ = (
+        # Índice único para evitar nóminas duplicadas
+        db.UniqueConstraint('employee_id', 'period', name='unique_employee_period'),
+        # Listados y reportes por período y estado (total pagado sin leer la tabla)
+        db.Index('ix_payrolls_period_status', 'period', 'status',
+                 postgresql_include=['total_amount']),
+    )
     
     def calculate_total(self):
         """Calcula el total de la nómina"""
@@ -172,3 +201,99 @@ class Payroll(db.Model):
     def __repr__(self):
         return f'<Payroll {self.employee_id} - {self.period}>'
 
+
+
+class PeriodSummary(db.Model):
+    """
+    Resumen materializado por período para /api/reports/summary
+    Se mantiene incrementalmente al escribir asistencias, nóminas y empleados
+    (ver app.logic.summary). La fila con period='*' guarda los totales globales.
+    """
+    __tablename__ = 'period_summary'
+    
+    GLOBAL_PERIOD = '*'
+    
+    period = db.Column(db.String(7), primary_key=True)  # Formato: YYYY-MM o '*'
+    active_employees = db.Column(db.Integer, nullable=False, default=0)
+    payroll_count = db.Column(db.Integer, nullable=False, default=0)
+    total_paid = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    attendance_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<PeriodSummary {self.period}>'
+
+
+class PayrollDirty(db.Model):
+    """
+    Pares (empleado, período) cuyas asistencias cambiaron desde el último
+    cálculo de la nómina (ver app.logic.incremental). Sin clave foránea: las
+    marcas de empleados eliminados se descartan al recalcular.
+    """
+    __tablename__ = 'payroll_dirty'
+    
+    employee_id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(7), primary_key=True)  # Formato: YYYY-MM
+    marked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # Recorrido por antigüedad del trabajo de recálculo
+        db.Index('ix_payroll_dirty_marked_at', 'marked_at'),
+    )
+    
+    def __repr__(self):
+        return f'<PayrollDirty {self.employee_id} - {self.period}>'
+
+
+class Job(db.Model):
+    """
+    Trabajo en segundo plano (cálculos, exportaciones, reconstrucciones)
+    Los workers de `flask jobs worker` lo toman de esta tabla (ver app.logic.jobs)
+    """
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), default='queued', nullable=False)  # queued, running, succeeded, failed
+    progress = db.Column(db.Integer, default=0, nullable=False)  # 0-100
+    message = db.Column(db.String(255), nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=3, nullable=False)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    worker = db.Column(db.String(100), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        # Búsqueda del próximo trabajo disponible por los workers
+        db.Index('ix_jobs_status_run_after', 'status', 'run_after', 'id'),
+    )
+    
+    def to_dict(self):
+        """Convierte el objeto a diccionario"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'params': self.params,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'worker': self.worker,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
+    def __repr__(self):
+        return f'<Job {self.id} - {self.job_type} ({self.status})>'
@@ -0,0 +1,294 @@
+"""
+Servicio asíncrono de marcaciones (ASGI) para los picos de cambio de turno
+
+Las marcaciones se validan, se encolan en memoria y se responde 202 de
+inmediato; una única tarea las escribe por lotes en la tabla attendances cuando
+se juntan PUNCH_BATCH_SIZE o cuando la más antigua lleva PUNCH_MAX_LATENCY_MS en
+cola (la latencia hasta la escritura queda acotada por ese valor más el tiempo
+de escritura del lote). Si la cola está llena se responde 503 con Retry-After.
+
+Rutas:
+    POST /punches        una marcación o un arreglo: {"employee_id", "type": "in"|"out", "timestamp"?}
+    GET  /punches/stats  estado de la cola y de las escrituras
+    GET  /health
+
+Ejecutar con un servidor ASGI: uvicorn app.punch_service:app --port 8001 (o
+hypercorn); python -m app.punch_service --port 8001 usa uvicorn.
+
+Si la escritura de un lote falla se reintenta PUNCH_WRITE_RETRIES veces con
+espera exponencial desde PUNCH_RETRY_BACKOFF_MS (mientras tanto la cola crece y,
+llena, se responde 503); si sigue fallando, las marcaciones se agregan al
+archivo PUNCH_DEAD_LETTER_PATH (una por línea, JSON) para volver a aplicarlas
+con flask punches replay.
+
+Las marcaciones en cola se pierden si el proceso termina abruptamente; al
+detenerse normalmente (lifespan shutdown o Ctrl+C) se escriben antes de salir.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tamaño máximo del cuerpo de una petición
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class PunchBuffer:
+    """Cola en memoria con escritura por lotes en un hilo dedicado a la base"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.batch_size = flask_app.config['PUNCH_BATCH_SIZE']
+        self.max_latency = flask_app.config['PUNCH_MAX_LATENCY_MS'] / 1000
+        self.max_queue = flask_app.config['PUNCH_QUEUE_MAX']
+        self.retries = flask_app.config['PUNCH_WRITE_RETRIES']
+        self.retry_backoff = flask_app.config['PUNCH_RETRY_BACKOFF_MS'] / 1000
+        self.dead_letter_path = flask_app.config['PUNCH_DEAD_LETTER_PATH']
+        self.queue: Optional[asyncio.Queue] = None
+        # Un solo hilo: los lotes se escriben en orden y sin competir entre sí
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='punch-writer')
+        self.task: Optional[asyncio.Task] = None
+        self.stats = {
+            'accepted': 0, 'rejected': 0, 'written': 0, 'errors': 0, 'retries': 0,
+            'failed_batches': 0, 'dead_lettered': 0, 'batches': 0, 'last_batch_size': 0, 'last_flush_ms': 0.0, 'max_wait_ms': 0.0,
+        }
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Escribe lo que quede en cola y detiene la tarea"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        pending = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        if pending:
+            await self._flush(pending)
+        self.executor.shutdown(wait=True)
+
+    def submit(self, punches: List[Dict[str, Any]]) -> bool:
+        """Encola todas las marcaciones o ninguna (False si no hay lugar)"""
+        if self.queue.qsize() + len(punches) > self.max_queue:
+            self.stats['rejected'] += len(punches)
+            return False
+        received = time.monotonic()
+        for punch in punches:
+            self.queue.put_nowait((received, punch))
+        self.stats['accepted'] += len(punches)
+        return True
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = batch[0][0] + self.max_latency
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Tomar sin esperar lo que ya esté en cola hasta completar el lote
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[float, Dict[str, Any]]]):
+        start = time.monotonic()
+        punches = [punch for _, punch in batch]
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            try:
+                result = await loop.run_in_executor(self.executor, self._write, punches)
+                break
+            except Exception as e:
+                if attempt < self.retries:
+                    delay = self.retry_backoff * 2 ** attempt
+                    logger.warning('Error al escribir %d marcaciones (intento %d), reintento en %.2fs: %s',
+                                   len(punches), attempt + 1, delay, e)
+                    self.stats['retries'] += 1
+                    await asyncio.sleep(delay)
+                    continue
+                logger.exception('Error al escribir %d marcaciones; se guardan en %s',
+                                 len(punches), self.dead_letter_path)
+                self.stats['failed_batches'] += 1
+                self.stats['errors'] += len(punches)
+                try:
+                    await loop.run_in_executor(self.executor, self._dead_letter, punches, e)
+                except Exception:
+                    logger.critical('No se pudieron guardar %d marcaciones: %s', len(punches), punches)
+                    return
+                self.stats['dead_lettered'] += len(punches)
+                return
+        finished = time.monotonic()
+        self.stats['batches'] += 1
+        self.stats['written'] += result['written']
+        self.stats['errors'] += len(result['errors'])
+        self.stats['last_batch_size'] = len(punches)
+        self.stats['last_flush_ms'] = round((finished - start) * 1000, 3)
+        self.stats['max_wait_ms'] = max(self.stats['max_wait_ms'], round((finished - batch[0][0]) * 1000, 3))
+        for error in result['errors']:
+            logger.warning('Marcación descartada %s: %s', error['punch'], error['error'])
+
+    def _dead_letter(self, punches: List[Dict[str, Any]], error: Exception):
+        """Agrega las marcaciones no escritas al archivo de pendientes"""
+        failed_at = datetime.now(timezone.utc).isoformat()
+        directory = os.path.dirname(self.dead_letter_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+            for punch in punches:
+                f.write(json.dumps({
+                    'failed_at': failed_at,
+                    'error': str(error),
+                    'punch': {**punch, 'timestamp': punch['timestamp'].isoformat()},
+                }) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _write(self, punches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        from app import db
+        from app.logic.punches import apply_punches
+
+        with self.flask_app.app_context():
+            try:
+                return apply_punches(punches)
+            except Exception:
+                db.session.rollback()
+                raise
+
+
+# ==================== APLICACIÓN ASGI ====================
+
+async def _read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError('Cuerpo demasiado grande')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, status: int, data: Dict[str, Any], headers: List[Tuple[bytes, bytes]] = ()):
+    body = json.dumps(data).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class PunchService:
+    """Aplicación ASGI del servicio de marcaciones"""
+
+    def __init__(self, config_name: Optional[str] = None):
+        self.config_name = config_name or os.environ.get('FLASK_ENV', 'development')
+        self.buffer: Optional[PunchBuffer] = None
+
+    async def startup(self):
+        if self.buffer is not None:
+            return
+        from app import create_app
+        self.buffer = PunchBuffer(create_app(self.config_name))
+        self.buffer.start()
+
+    async def shutdown(self):
+        if self.buffer is not None:
+            await self.buffer.stop()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await self.startup()
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await self.shutdown()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+        if self.buffer is None:
+            # Servidores sin lifespan: iniciar al recibir la primera petición
+            await self.startup()
+
+        method, path = scope['method'], scope['path'].rstrip('/')
+        if path == '/punches' and method == 'POST':
+            await self._post_punches(receive, send)
+        elif path == '/punches/stats' and method == 'GET':
+            await _send_json(send, 200, {
+                'success': True,
+                'data': {**self.buffer.stats, 'queued': self.buffer.queue.qsize(),
+                         'batch_size': self.buffer.batch_size,
+                         'max_latency_ms': self.buffer.max_latency * 1000},
+            })
+        elif path == '/health' and method == 'GET':
+            await _send_json(send, 200, {'status': 'healthy', 'service': 'NominaPlus Punch Service'})
+        else:
+            await _send_json(send, 404, {'success': False, 'error': 'Ruta no encontrada'})
+
+    async def _post_punches(self, receive, send):
+        from app.logic.punches import parse_punch
+
+        try:
+            data = json.loads(await _read_body(receive))
+            now = datetime.now(timezone.utc)
+            punches = [parse_punch(item, now) for item in (data if isinstance(data, list) else [data])]
+        except (ValueError, TypeError) as e:
+            await _send_json(send, 400, {'success': False, 'error': str(e)})
+            return
+
+        if not self.buffer.submit(punches):
+            await _send_json(send, 503, {
+                'success': False,
+                'error': 'Cola de marcaciones llena, reintente en unos segundos'
+            }, [(b'retry-after', b'1')])
+            return
+
+        await _send_json(send, 202, {
+            'success': True,
+            'accepted': len(punches),
+            'queued': self.buffer.queue.qsize(),
+            'message': 'Marcaciones recibidas',
+        })
+
+
+app = PunchService()
+
+
+
+def main(argv=None):
+    """Ejecuta el servicio con uvicorn (pip install uvicorn)"""
+    parser = argparse.ArgumentParser(description='Servicio asíncrono de marcaciones')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PUNCH_PORT', 8001)))
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit('El servicio de marcaciones requiere un servidor ASGI: pip install uvicorn') from None
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,71 @@
-from flask import Blueprint, request, jsonify
-from datetime import datetime, date, timedelta
+import itertools
+
+from flask import Blueprint, Response, current_app, request, jsonify, redirect, url_for, stream_with_context
+from datetime import datetime, date, time, timedelta
 from decimal import Decimal
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, tuple_
 
 from app import db
-from app.models import Employee, Attendance, Payroll
-from app.locales.translations import get_translations, get_currency_info, translate
+from app.models import Employee, Attendance, Payroll, Job
+from app.utils import encode_cursor, decode_cursor, parse_date
+from app.streaming import get_stream_mode, stream_query
+from app.http_cache import collection_version, conditional_response
+from app.serializers import employee_serializer, attendance_serializer, payroll_serializer, wants_columnar
+from app.logic.calculation_cache import calculation_cache
 
 api_bp = Blueprint('api', __name__)
 
 
 # ==================== LOCALIZACIÓN ====================
 
-@api_bp.route('/locale/<country_code>', methods=['GET'])
-def get_locale(country_code):
-    """Obtener traducciones y configuración de moneda para un país"""
+@api_bp.route('/locale', methods=['GET'])
+def get_locale_versions():
+    """Obtener la versión y URL vigente del paquete de localización de cada país"""
     try:
-        translations = get_translations(country_code)
-        currency_info = get_currency_info(country_code)
+        from app.locales.bundles import get_bundles
         
         return jsonify({
             'success': True,
             'data': {
-                'translations': translations,
-                'currency': currency_info
+                country_code: {
+                    'version': bundle.version,
+                    'url': url_for('api.get_locale_version', country_code=country_code, version=bundle.version)
+                }
+                for country_code, bundle in get_bundles().items()
             }
         }), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.route('/locale/<country_code>', methods=['GET'])
+def get_locale(country_code):
+    """Obtener traducciones y configuración de moneda para un país"""
+    try:
+        from app.locales.bundles import bundle_response, get_bundle
+        
+        # Respuesta serializada y comprimida una sola vez por proceso
+        return bundle_response(get_bundle(country_code))
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/locale/<country_code>/<version>', methods=['GET'])
+def get_locale_version(country_code, version):
+    """Obtener el paquete de localización de una versión (caché inmutable)"""
+    try:
+        from app.locales.bundles import bundle_response, get_bundle
+        
+        bundle = get_bundle(country_code)
+        if version != bundle.version:
+            # Versión de un despliegue anterior: redirigir a la vigente
+            return redirect(url_for('api.get_locale_version', country_code=country_code, version=bundle.version))
+        return bundle_response(bundle, immutable=True)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 # ==================== EMPLEADOS ====================
 
 @api_bp.route('/employees', methods=['GET'])
@@ -38,17 +73,22 @@ def get_employees():
     """Obtener lista de empleados"""
     try:
         is_active = request.args.get('is_active', type=str)
-        query = Employee.query
+        # Solo las columnas del listado, sin crear objetos del ORM
+        query = employee_serializer.query()
         
         if is_active is not None:
             query = query.filter(Employee.is_active == (is_active.lower() == 'true'))
         
-        employees = query.order_by(Employee.name).all()
-        return jsonify({
-            'success': True,
-            'data': [employee.to_dict() for employee in employees],
-            'count': len(employees)
-        }), 200
+        def build():
+            stream_mode = get_stream_mode()
+            if stream_mode:
+                return stream_query(query.order_by(Employee.name), employee_serializer.to_dict, stream_mode)
+            
+            employees = query.order_by(Employee.name).all()
+            return employee_serializer.response(employees)
+        
+        # 304 sin consultar ni serializar las filas si el listado no cambió
+        return conditional_response(collection_version(query, Employee.updated_at), build)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -154,6 +194,7 @@ def update_employee(employee_id):
         
         employee.updated_at = datetime.utcnow()
         db.session.commit()
+        calculation_cache.invalidate_employees([employee.id])
         
         return jsonify({
             'success': True,
@@ -180,6 +221,7 @@ def delete_employee(employee_id):
         employee.is_active = False
         employee.updated_at = datetime.utcnow()
         db.session.commit()
+        calculation_cache.invalidate_employees([employee.id])
         
         return jsonify({
             'success': True,
@@ -193,15 +235,21 @@ def delete_employee(employee_id):
 
 # ==================== ASISTENCIAS ====================
 
+ATTENDANCES_MAX_LIMIT = 1000
+
+
 @api_bp.route('/attendances', methods=['GET'])
 def get_attendances():
-    """Obtener lista de asistencias"""
+    """Obtener lista de asistencias (paginación por cursor opcional con limit/cursor)"""
     try:
         employee_id = request.args.get('employee_id', type=int)
         start_date = request.args.get('start_date', type=str)
         end_date = request.args.get('end_date', type=str)
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor', type=str)
         
-        query = Attendance.query
+        # Columnas del listado y nombre del empleado en una sola consulta
+        query = attendance_serializer.query()
         
         if employee_id:
             query = query.filter(Attendance.employee_id == employee_id)
@@ -212,13 +260,52 @@ def get_attendances():
         if end_date:
             query = query.filter(Attendance.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
         
-        attendances = query.order_by(Attendance.date.desc(), Attendance.in_time.desc()).all()
+        stream_mode = get_stream_mode()
+        if stream_mode and wants_columnar():
+            return jsonify({'success': False, 'error': 'format=columnar no admite stream'}), 400
+        # Claves una sola vez y arreglos de valores (?format=columnar)
+        respond = attendance_serializer.columnar_response if wants_columnar() else attendance_serializer.response
+        
+        if stream_mode:
+            return stream_query(
+                query.order_by(Attendance.date.desc(), Attendance.in_time.desc(), Attendance.id.desc()),
+                attendance_serializer.to_dict,
+                stream_mode
+            )
         
-        return jsonify({
-            'success': True,
-            'data': [attendance.to_dict() for attendance in attendances],
-            'count': len(attendances)
-        }), 200
+        if limit is None and cursor is None:
+            attendances = query.order_by(Attendance.date.desc(), Attendance.in_time.desc()).all()
+            return respond(attendances)
+        
+        # Paginación por cursor (keyset) sobre (date, in_time, id): el costo de cada
+        # página no depende de su posición, a diferencia de OFFSET
+        limit = min(max(limit or ATTENDANCES_MAX_LIMIT, 1), ATTENDANCES_MAX_LIMIT)
+        if cursor:
+            try:
+                cursor_date, cursor_in_time, cursor_id = decode_cursor(cursor)
+                cursor_values = (
+                    date.fromisoformat(cursor_date),
+                    # Con microsegundos si la hora los tiene: un cursor truncado saltearía filas
+                    time.fromisoformat(cursor_in_time),
+                    int(cursor_id)
+                )
+            except (ValueError, TypeError):
+                return jsonify({'success': False, 'error': 'Cursor inválido'}), 400
+            query = query.filter(
+                tuple_(Attendance.date, Attendance.in_time, Attendance.id) < tuple_(*cursor_values)
+            )
+        
+        attendances = query.order_by(
+            Attendance.date.desc(), Attendance.in_time.desc(), Attendance.id.desc()
+        ).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(attendances) > limit:
+            attendances = attendances[:limit]
+            last = attendances[-1]
+            next_cursor = encode_cursor([last.date, last.in_time, last.id])
+        
+        return respond(attendances, next_cursor=next_cursor)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -274,6 +361,7 @@ def create_attendance():
         
         db.session.add(attendance)
         db.session.commit()
+        calculation_cache.invalidate_employees([attendance.employee_id])
         
         return jsonify({
             'success': True,
@@ -292,6 +380,35 @@ def create_attendance():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.route('/attendances/bulk', methods=['POST'])
+def create_attendances_bulk():
+    """Registrar asistencias en bloque (arreglo JSON, CSV o NDJSON)"""
+    try:
+        from app.logic.attendance_bulk import parse_records, ingest_attendances
+        
+        try:
+            records = parse_records(request.get_data(), request.content_type)
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({
+                'success': False,
+                'error': f'No se pudo interpretar el cuerpo: {e}'
+            }), 400
+        
+        result = ingest_attendances(records)
+        # La carga puede tocar a muchos empleados: vaciar la caché de cálculos
+        calculation_cache.clear()
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': f"{result['upserted']} asistencias registradas, {len(result['errors'])} con errores"
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 @api_bp.route('/attendances/<int:attendance_id>', methods=['PUT'])
 def update_attendance(attendance_id):
     """Actualizar una asistencia"""
@@ -319,6 +436,7 @@ def update_attendance(attendance_id):
         
         attendance.updated_at = datetime.utcnow()
         db.session.commit()
+        calculation_cache.invalidate_employees([attendance.employee_id])
         
         return jsonify({
             'success': True,
@@ -336,8 +454,10 @@ def delete_attendance(attendance_id):
     """Eliminar una asistencia"""
     try:
         attendance = Attendance.query.get_or_404(attendance_id)
+        employee_id = attendance.employee_id
         db.session.delete(attendance)
         db.session.commit()
+        calculation_cache.invalidate_employees([employee_id])
         
         return jsonify({
             'success': True,
@@ -359,7 +479,8 @@ def get_payrolls():
         period = request.args.get('period', type=str)
         status = request.args.get('status', type=str)
         
-        query = Payroll.query
+        # Columnas del listado y nombre del empleado en una sola consulta
+        query = payroll_serializer.query()
         
         if employee_id:
             query = query.filter(Payroll.employee_id == employee_id)
@@ -368,13 +489,26 @@ def get_payrolls():
         if status:
             query = query.filter(Payroll.status == status)
         
-        payrolls = query.order_by(Payroll.period.desc(), Payroll.created_at.desc()).all()
-        
-        return jsonify({
-            'success': True,
-            'data': [payroll.to_dict() for payroll in payrolls],
-            'count': len(payrolls)
-        }), 200
+        stream_mode = get_stream_mode()
+        if stream_mode and wants_columnar():
+            return jsonify({'success': False, 'error': 'format=columnar no admite stream'}), 400
+        
+        def build():
+            if stream_mode:
+                return stream_query(
+                    query.order_by(Payroll.period.desc(), Payroll.created_at.desc()),
+                    payroll_serializer.to_dict,
+                    stream_mode
+                )
+            
+            payrolls = query.order_by(Payroll.period.desc(), Payroll.created_at.desc()).all()
+            # Claves una sola vez y arreglos de valores (?format=columnar)
+            if wants_columnar():
+                return payroll_serializer.columnar_response(payrolls)
+            return payroll_serializer.response(payrolls)
+        
+        # El listado incluye el nombre del empleado: su updated_at también cuenta
+        return conditional_response(collection_version(query, Payroll.updated_at, Employee.updated_at), build)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -512,7 +646,10 @@ def delete_payroll(payroll_id):
 def calculate_payroll():
     """Calcular nómina automáticamente basándose en asistencias (multipaís)"""
     try:
-        from app.logic.calculators import get_calculator
+        from app.logic.aggregation import aggregate_period_hours
+        from app.logic.calculation_cache import attendance_version, calculation_cache, calculation_key
+        from app.logic.calculators import HoursAggregate, get_calculator
+        from app.logic.payroll_batch import calculation_response
         
         data = request.json
         
@@ -534,16 +671,6 @@ def calculate_payroll():
         else:
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         
-        # Obtener asistencias del período
-        attendances = Attendance.query.filter(
-            and_(
-                Attendance.employee_id == data['employee_id'],
-                Attendance.date >= start_date,
-                Attendance.date <= end_date,
-                ~Attendance.is_vacation  # Excluir vacaciones
-            )
-        ).all()
-        
         # Obtener calculadora según el país del empleado
         calculator = get_calculator(employee)
         
@@ -551,13 +678,47 @@ def calculate_payroll():
         bonuses = Decimal(str(data.get('bonuses', 0)))
         deductions = Decimal(str(data.get('deductions', 0)))
         
-        # Calcular usando la calculadora del país
-        calculation_result = calculator.calculate_payroll(
-            attendances, 
-            data['period'],
-            bonuses,
-            deductions
+        # Reutilizar el cálculo si no cambió nada que lo afecte (ver app.logic.calculation_cache)
+        engine = 'aggregate' if data.get('engine') == 'aggregate' else 'decimal'
+        cache_key = calculation_key(
+            employee, data['period'], attendance_version(employee.id, start_date, end_date),
+            engine, bonuses, deductions
         )
+        calculation_result = calculation_cache.get(cache_key)
+        cached = calculation_result is not None
+        
+        if not cached:
+            if engine == 'aggregate':
+                # Sumar las horas en la base de datos en lugar de traer cada asistencia
+                hours = aggregate_period_hours(data['period'], [Employee.id == employee.id])
+                calculation_result = calculator.calculate_from_aggregate(
+                    employee,
+                    hours.get(employee.id, HoursAggregate()),
+                    data['period'],
+                    bonuses,
+                    deductions
+                )
+            else:
+                # Obtener asistencias del período
+                attendances = Attendance.query.filter(
+                    and_(
+                        Attendance.employee_id == data['employee_id'],
+                        Attendance.date >= start_date,
+                        Attendance.date <= end_date,
+                        ~Attendance.is_vacation  # Excluir vacaciones
+                    )
+                ).all()
+                
+                # Calcular usando la calculadora del país
+                calculation_result = calculator.calculate_payroll(
+                    employee,
+                    attendances, 
+                    data['period'],
+                    bonuses,
+                    deductions
+                )
+            
+            calculation_cache.set(cache_key, calculation_result)
         
         # Crear o actualizar nómina
         payroll = Payroll.query.filter_by(
@@ -593,22 +754,12 @@ def calculate_payroll():
         db.session.commit()
         
         # Preparar respuesta con información adicional según el país
-        response_data = payroll.to_dict()
-        response_data['summary'] = calculation_result.get('summary', {})
-        
-        # Para Argentina, incluir detalles de aportes
-        if employee.country_code == 'AR':
-            response_data['aportes'] = {
-                'jubilacion': float(calculation_result.get('jubilacion', 0)),
-                'obra_social': float(calculation_result.get('obra_social', 0)),
-                'pami': float(calculation_result.get('pami', 0)),
-                'total_aportes': float(calculation_result.get('total_aportes', 0)),
-                'gross_salary': float(calculation_result.get('gross_salary', 0)),
-            }
+        response_data = calculation_response(employee, payroll, calculation_result)
         
         return jsonify({
             'success': True,
             'data': response_data,
+            'cached': cached,
             'message': 'Nómina calculada exitosamente',
         }), 200
         
@@ -617,12 +768,302 @@ def calculate_payroll():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@api_bp.route('/payrolls/calculate-batch', methods=['POST'])
+def calculate_payroll_batch():
+    """Calcular la nómina de un período para todos los empleados activos"""
+    try:
+        from app.logic.payroll_batch import ENGINES, calculate_period_batch, parse_adjustments
+        
+        data = request.json
+        
+        if not data.get('period'):
+            return jsonify({
+                'success': False,
+                'error': 'Falta campo requerido: period'
+            }), 400
+        
+        try:
+            adjustments = parse_adjustments(data.get('adjustments'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if data.get('engine', 'decimal') not in ENGINES:
+            return jsonify({
+                'success': False,
+                'error': f'engine debe ser uno de: {", ".join(ENGINES)}'
+            }), 400
+        
+        if data.get('async'):
+            # Ejecutar en un worker de `flask jobs worker` y consultar /api/jobs/<id>
+            from app.logic.jobs import enqueue_job
+            
+            params = {key: data[key] for key in
+                      ('period', 'country_code', 'employee_ids', 'adjustments', 'engine', 'workers')
+                      if data.get(key) is not None}
+            job = enqueue_job('payroll.calculate', params)
+            return jsonify({
+                'success': True,
+                'data': job.to_dict(),
+                'message': 'Cálculo encolado',
+            }), 202
+        
+        batch = calculate_period_batch(
+            data['period'],
+            country_code=data.get('country_code'),
+            employee_ids=data.get('employee_ids'),
+            adjustments=adjustments,
+            engine=data.get('engine', 'decimal')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': batch['results'],
+            'count': len(batch['results']),
+            'created': batch['created'],
+            'updated': batch['updated'],
+            'skipped': batch['skipped'],
+            'attendances': batch['attendance_count'],
+            'timing': batch['timing'],
+            'message': 'Nóminas del período calculadas exitosamente',
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/payrolls/recalculate-dirty', methods=['POST'])
+def recalculate_dirty_payrolls():
+    """Recalcular solo las nóminas cuyas asistencias cambiaron"""
+    try:
+        from app.logic.payroll_batch import ENGINES
+        from app.logic.incremental import recalculate_dirty
+        
+        data = request.get_json(silent=True) or {}
+        
+        if data.get('engine', 'decimal') not in ENGINES:
+            return jsonify({
+                'success': False,
+                'error': f'engine debe ser uno de: {", ".join(ENGINES)}'
+            }), 400
+        
+        result = recalculate_dirty(
+            period=data.get('period'),
+            limit=data.get('limit'),
+            engine=data.get('engine', 'decimal')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': f"{result['recalculated']} nóminas recalculadas, {result['remaining']} pendientes",
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ==================== PAGOS ====================
+
+@api_bp.route('/payments/pending', methods=['GET'])
+def get_pending_payments():
+    """Nóminas confirmadas listas para pagar en un período y país"""
+    try:
+        from app.logic.payments import pending_payments
+        
+        period = request.args.get('period', type=str)
+        country_code = request.args.get('country_code', type=str)
+        if not period or not country_code:
+            return jsonify({
+                'success': False,
+                'error': 'Faltan parámetros requeridos: period, country_code'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'data': pending_payments(period, country_code.upper())
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/payments/batches', methods=['POST'])
+def create_payment_batch():
+    """
+    Pagar las nóminas confirmadas de un período y país: las marca como pagadas
+    en una transacción y responde con el archivo de transferencias del banco
+    (en streaming, sin transacción abierta)
+    """
+    try:
+        from app.logic.payments import PaymentConflict, iter_batch_file, pay_batch, prepare_batch
+        
+        data = request.get_json(silent=True) or {}
+        
+        payment_date = None
+        if data.get('payment_date'):
+            payment_date = parse_date(data['payment_date'])
+            if payment_date is None:
+                return jsonify({'success': False, 'error': 'payment_date debe tener el formato YYYY-MM-DD'}), 400
+        
+        try:
+            batch = prepare_batch(data.get('period'), data.get('country_code'), payment_date)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        try:
+            pay_batch(batch, current_app.config['PAYMENT_CHUNK_SIZE'])
+        except PaymentConflict as e:
+            # Otro lote pagó las nóminas (o usa el mismo identificador): no hay archivo que enviar
+            return jsonify({'success': False, 'error': str(e)}), 409
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Si la descarga se corta, el archivo se vuelve a pedir con X-Payment-Batch-Id
+        response = Response(
+            stream_with_context(iter_batch_file(batch.batch_id, current_app.config['PAYMENT_CHUNK_SIZE'])),
+            mimetype=batch.layout.mimetype
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{batch.filename}"'
+        response.headers['X-Payment-Batch-Id'] = batch.batch_id
+        return response
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/payments/batches/<batch_id>/file', methods=['GET'])
+def get_payment_batch_file(batch_id):
+    """Volver a descargar el archivo de un lote ya pagado"""
+    try:
+        from app.logic.payments import iter_batch_file, parse_batch_id
+        
+        try:
+            batch = parse_batch_id(batch_id)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        chunks = iter_batch_file(batch_id, current_app.config['PAYMENT_CHUNK_SIZE'])
+        try:
+            # El primer fragmento confirma que el lote existe antes de empezar a enviar
+            first = next(chunks)
+        except LookupError as e:
+            return jsonify({'success': False, 'error': str(e)}), 404
+        
+        response = Response(
+            stream_with_context(itertools.chain([first], chunks)),
+            mimetype=batch.layout.mimetype
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{batch.filename}"'
+        return response
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ==================== TRABAJOS ====================
+
+@api_bp.route('/jobs', methods=['GET'])
+def get_jobs():
+    """Obtener lista de trabajos en segundo plano (los más recientes primero)"""
+    try:
+        status = request.args.get('status', type=str)
+        job_type = request.args.get('job_type', type=str)
+        limit = min(request.args.get('limit', 100, type=int), 1000)
+        
+        query = Job.query
+        if status:
+            query = query.filter(Job.status == status)
+        if job_type:
+            query = query.filter(Job.job_type == job_type)
+        jobs = query.order_by(Job.id.desc()).limit(limit).all()
+        
+        return jsonify({
+            'success': True,
+            'data': [job.to_dict() for job in jobs],
+            'count': len(jobs)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Obtener el estado, avance y resultado de un trabajo"""
+    try:
+        job = Job.query.get_or_404(job_id)
+        return jsonify({
+            'success': True,
+            'data': job.to_dict()
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+
+
+@api_bp.route('/jobs', methods=['POST'])
+def create_job():
+    """Encolar un trabajo en segundo plano"""
+    try:
+        from app.logic.jobs import enqueue_job
+        
+        data = request.json
+        
+        if not data.get('job_type'):
+            return jsonify({
+                'success': False,
+                'error': 'Falta campo requerido: job_type'
+            }), 400
+        
+        try:
+            job = enqueue_job(data['job_type'], data.get('params'), data.get('max_attempts'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(),
+            'message': 'Trabajo encolado'
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@api_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+def retry_failed_job(job_id):
+    """Volver a encolar un trabajo fallido"""
+    try:
+        from app.logic.jobs import retry_job
+        
+        job = Job.query.get_or_404(job_id)
+        try:
+            job = retry_job(job)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        return jsonify({
+            'success': True,
+            'data': job.to_dict(),
+            'message': 'Trabajo encolado nuevamente'
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
 # ==================== REPORTES ====================
 
 @api_bp.route('/reports/summary', methods=['GET'])
 def get_summary_report():
     """Obtener resumen general de la empresa"""
     try:
+        from app.logic.summary import get_period_summary
+        
         period = request.args.get('period', type=str)
         
         # Si no se especifica período, usar el mes actual
@@ -630,47 +1071,26 @@ def get_summary_report():
             today = date.today()
             period = f"{today.year}-{today.month:02d}"
         
-        # Estadísticas de empleados
-        total_employees = Employee.query.filter_by(is_active=True).count()
-        
-        # Estadísticas de nóminas
-        payrolls_query = Payroll.query.filter_by(period=period)
-        total_payrolls = payrolls_query.count()
-        total_paid = db.session.query(func.sum(Payroll.total_amount)).filter(
-            and_(Payroll.period == period, Payroll.status == 'paid')
-        ).scalar() or Decimal('0')
-        
-        # Estadísticas de asistencias
-        year, month = map(int, period.split('-'))
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = date(year, month + 1, 1) - timedelta(days=1)
-        
-        total_attendances = Attendance.query.filter(
-            and_(
-                Attendance.date >= start_date,
-                Attendance.date <= end_date
-            )
-        ).count()
+        # Leer el resumen materializado del período (una sola consulta)
+        summary = get_period_summary(period)
         
         return jsonify({
             'success': True,
             'data': {
                 'period': period,
                 'employees': {
-                    'total_active': total_employees
+                    'total_active': summary['active_employees']
                 },
                 'payrolls': {
-                    'total': total_payrolls,
-                    'total_paid': float(total_paid)
+                    'total': summary['payroll_count'],
+                    'total_paid': float(summary['total_paid'])
                 },
                 'attendances': {
-                    'total': total_attendances
+                    'total': summary['attendance_count']
                 }
             }
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -0,0 +1,235 @@
+"""
+Serialización rápida de listados a JSON
+
+Cada serializador consulta solo las columnas que necesita (tuplas, sin crear
+objetos del ORM) y convierte cada fila con una función armada una sola vez por
+modelo, con las claves ya ordenadas y las conversiones resueltas de antemano.
+El tiempo y las filas serializadas se suman a la instrumentación de la petición.
+El resultado es el mismo que to_dict() + jsonify:
+
+    - backend stdlib: bytes idénticos a jsonify (fuera de modo debug)
+    - backend orjson (si está instalado y SERIALIZER_BACKEND lo permite): JSON
+      equivalente; los caracteres no ASCII se escriben en UTF-8 en lugar de \\uXXXX
+
+En modo debug se delega en jsonify para mantener la salida indentada.
+
+?format=columnar (columnar_response) envía cada clave una sola vez con el
+arreglo de sus valores: {"columns": [...], "data": {"clave": [v1, v2, ...]}}.
+"""
+import json
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import Response, current_app, request
+
+from app import db
+from app.instrumentation import track_serialization
+from app.models import Employee, Attendance, Payroll
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+# Conversiones equivalentes a las de to_dict (los valores falsos se devuelven como None)
+def _number(value):
+    return float(value) if value else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _time(value):
+    return value.strftime('%H:%M:%S') if value else None
+
+
+CONVERTERS = {'number': _number, 'iso': _iso, 'time': _time}
+
+
+class ModelSerializer:
+    """
+    Serializador compilado de un modelo
+
+    fields es una lista de (clave, expresión SQL, conversión) donde la conversión
+    es None (valor tal cual) o una de CONVERTERS. Las columnas de la consulta se
+    etiquetan con la clave, por lo que las filas también se leen por atributo.
+    """
+
+    def __init__(self, model, fields: Sequence[Tuple[str, Any, Optional[str]]],
+                 joins: Sequence[Any] = ()):
+        self.model = model
+        self.keys = [key for key, _, _ in fields]
+        self.columns = [column.label(key) for key, column, _ in fields]
+        self.joins = joins
+        # (clave, posición en la fila, conversión) en orden alfabético de clave
+        self.column_converters = sorted(
+            ((key, index, CONVERTERS[converter] if converter else None)
+             for index, (key, _, converter) in enumerate(fields)),
+            key=lambda item: item[0]
+        )
+        self.to_dict = self._compile(self.column_converters)
+
+    @staticmethod
+    def _compile(column_converters) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+        """
+        Arma la función fila -> dict con las claves en orden alfabético (el mismo
+        que sort_keys de jsonify): itemgetter toma los valores de la tupla en ese
+        orden y luego se reemplazan los que llevan conversión
+        """
+        keys = tuple(key for key, _, _ in column_converters)
+        indexes = [index for _, index, _ in column_converters]
+        getter = itemgetter(*indexes) if len(indexes) > 1 else (lambda row: (row[indexes[0]],))
+        converted = tuple((key, index, convert) for key, index, convert in column_converters if convert)
+
+        def to_dict(row):
+            data = dict(zip(keys, getter(row)))
+            for key, index, convert in converted:
+                data[key] = convert(row[index])
+            return data
+
+        return to_dict
+
+    def query(self):
+        """Consulta base con las columnas del serializador (admite filter/order_by)"""
+        query = db.session.query(*self.columns).select_from(self.model)
+        for join in self.joins:
+            query = query.outerjoin(join)
+        return query
+
+    def dumps(self, rows) -> bytes:
+        """Arreglo JSON con las filas serializadas"""
+        with track_serialization(len(rows)):
+            return self._dumps(rows)
+
+    def _dumps(self, rows) -> bytes:
+        data = [self.to_dict(row) for row in rows]
+        if _use_orjson():
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(',', ':')).encode()
+
+    def response(self, rows: List[Any], status: int = 200, **extra) -> Response:
+        """
+        Misma respuesta que jsonify({'success': True, 'data': [...], 'count': N, **extra})
+        """
+        if current_app.debug:
+            # El tiempo de app.json ya lo mide la instrumentación: aquí solo el armado de las filas
+            with track_serialization(len(rows)):
+                data = [self.to_dict(row) for row in rows]
+            response = current_app.json.response({'success': True, 'data': data, 'count': len(rows), **extra})
+            response.status_code = status
+            return response
+
+        envelope = {'count': len(rows), 'data': None, 'success': True, **extra}
+        with track_serialization(len(rows)):
+            parts = []
+            for key in sorted(envelope):
+                if key == 'data':
+                    value = self._dumps(rows)
+                elif _use_orjson():
+                    value = orjson.dumps(envelope[key])
+                else:
+                    value = json.dumps(envelope[key]).encode()
+                parts.append(json.dumps(key).encode() + b':' + value)
+            body = b'{' + b','.join(parts) + b'}\n'
+        return Response(body, status=status, mimetype='application/json')
+
+
+    def to_columns(self, rows) -> Dict[str, List[Any]]:
+        """Un arreglo de valores por clave, con las mismas conversiones que to_dict"""
+        return {
+            key: [convert(row[index]) for row in rows] if convert else [row[index] for row in rows]
+            for key, index, convert in self.column_converters
+        }
+
+    def columnar_response(self, rows: List[Any], status: int = 200, **extra) -> Response:
+        """
+        Formato columnar: {'success': True, 'columns': [...], 'data': {clave: [...]}, 'count': N, **extra}
+        """
+        if current_app.debug:
+            with track_serialization(len(rows)):
+                payload = self._columnar_payload(rows, extra)
+            response = current_app.json.response(payload)
+            response.status_code = status
+            return response
+
+        with track_serialization(len(rows)):
+            payload = self._columnar_payload(rows, extra)
+            if _use_orjson():
+                body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+            else:
+                body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode() + b'\n'
+        return Response(body, status=status, mimetype='application/json')
+
+    def _columnar_payload(self, rows: List[Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'columns': [key for key, _, _ in self.column_converters],
+            'data': self.to_columns(rows),
+            'count': len(rows),
+            **extra
+        }
+
+
+def wants_columnar() -> bool:
+    """La petición pide el formato columnar (?format=columnar)"""
+    return request.args.get('format') == 'columnar'
+
+
+def _use_orjson() -> bool:
+    return orjson is not None and current_app.config.get('SERIALIZER_BACKEND', 'auto') != 'stdlib'
+
+
+employee_serializer = ModelSerializer(Employee, [
+    ('id', Employee.id, None),
+    ('name', Employee.name, None),
+    ('dni', Employee.dni, None),
+    ('cuil', Employee.cuil, None),
+    ('nit', Employee.nit, None),
+    ('country_code', Employee.country_code, None),
+    ('address', Employee.address, None),
+    ('position', Employee.position, None),
+    ('hourly_rate', Employee.hourly_rate, 'number'),
+    ('phone', Employee.phone, None),
+    ('email', Employee.email, None),
+    ('bank_account', Employee.bank_account, None),
+    ('is_active', Employee.is_active, None),
+    ('created_at', Employee.created_at, 'iso'),
+    ('updated_at', Employee.updated_at, 'iso'),
+])
+
+attendance_serializer = ModelSerializer(Attendance, [
+    ('id', Attendance.id, None),
+    ('employee_id', Attendance.employee_id, None),
+    ('employee_name', Employee.name, None),
+    ('date', Attendance.date, 'iso'),
+    ('in_time', Attendance.in_time, 'time'),
+    ('out_time', Attendance.out_time, 'time'),
+    ('hours_worked', Attendance.hours_worked, 'number'),
+    ('is_holiday', Attendance.is_holiday, None),
+    ('is_vacation', Attendance.is_vacation, None),
+    ('notes', Attendance.notes, None),
+    ('created_at', Attendance.created_at, 'iso'),
+    ('updated_at', Attendance.updated_at, 'iso'),
+], joins=[Attendance.employee])
+
+payroll_serializer = ModelSerializer(Payroll, [
+    ('id', Payroll.id, None),
+    ('employee_id', Payroll.employee_id, None),
+    ('employee_name', Employee.name, None),
+    ('period', Payroll.period, None),
+    ('base_salary', Payroll.base_salary, 'number'),
+    ('hours_worked', Payroll.hours_worked, 'number'),
+    ('overtime_hours', Payroll.overtime_hours, 'number'),
+    ('overtime_pay', Payroll.overtime_pay, 'number'),
+    ('bonuses', Payroll.bonuses, 'number'),
+    ('deductions', Payroll.deductions, 'number'),
+    ('total_amount', Payroll.total_amount, 'number'),
+    ('status', Payroll.status, None),
+    ('payment_date', Payroll.payment_date, 'iso'),
+    ('bank_transfer_id', Payroll.bank_transfer_id, None),
+    ('notes', Payroll.notes, None),
+    ('created_at', Payroll.created_at, 'iso'),
+    ('updated_at', Payroll.updated_at, 'iso'),
+], joins=[Payroll.employee])
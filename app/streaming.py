@@ -0,0 +1,72 @@
+"""
+Respuestas en streaming (NDJSON o arreglo JSON por partes) para listados grandes
+"""
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Filas que se cargan por lote desde el cursor del servidor
+STREAM_BATCH_SIZE = 1000
+
+
+def get_stream_mode() -> Optional[str]:
+    """
+    Determina si la petición pide una respuesta en streaming
+
+    ?stream=ndjson o Accept: application/x-ndjson -> 'ndjson'
+    ?stream=1 / ?stream=json                      -> 'json'
+    """
+    stream = (request.args.get('stream') or '').lower()
+    if stream == 'ndjson':
+        return 'ndjson'
+    if stream in ('1', 'true', 'json'):
+        return 'json'
+    if request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        return 'ndjson'
+    return None
+
+
+def _iter_ndjson(rows: Iterator[Any], serialize: Callable[[Any], Dict[str, Any]]) -> Iterator[str]:
+    """Una línea JSON por fila; si falla, una última línea con el error"""
+    dumps = current_app.json.dumps
+    try:
+        for row in rows:
+            yield dumps(serialize(row)) + '\n'
+    except Exception as e:
+        yield dumps({'success': False, 'error': str(e)}) + '\n'
+
+
+def _iter_json_array(rows: Iterator[Any], serialize: Callable[[Any], Dict[str, Any]]) -> Iterator[str]:
+    """
+    Mismo sobre que las respuestas normales ({data, count, success}), con
+    'success' al final para poder informar un error ocurrido a mitad del envío
+    """
+    dumps = current_app.json.dumps
+    count = 0
+    yield '{"data": ['
+    try:
+        for row in rows:
+            yield (',' if count else '') + dumps(serialize(row))
+            count += 1
+    except Exception as e:
+        yield f'], "count": {count}, "success": false, "error": {dumps(str(e))}}}'
+        return
+    yield f'], "count": {count}, "success": true}}'
+
+
+def stream_query(query, serialize: Callable[[Any], Dict[str, Any]], mode: str,
+                 batch_size: int = STREAM_BATCH_SIZE) -> Response:
+    """
+    Envía el resultado de una consulta fila por fila
+
+    La consulta se recorre con yield_per (cursor del lado del servidor), por lo
+    que la memoria usada depende del tamaño del lote y no del total de filas.
+    """
+    rows = iter(query.yield_per(batch_size))
+    if mode == 'ndjson':
+        body, mimetype = _iter_ndjson(rows, serialize), NDJSON_MIMETYPE
+    else:
+        body, mimetype = _iter_json_array(rows, serialize), 'application/json'
+    return Response(stream_with_context(body), mimetype=mimetype)
@@ -1,9 +1,11 @@
 """
 Utilidades y funciones auxiliares para NominaPlus
 """
+import base64
+import json
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 
 def validate_dni(dni: str) -> bool:
@@ -110,3 +112,28 @@ def get_period_dates(period: str) -> Tuple[date, date]:
     
     return start_date, end_date
 
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Codifica los valores de la última fila de una página como cursor opaco
+    (fechas y horas en formato ISO)
+    """
+    raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value
+                      for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decodifica un cursor generado por encode_cursor
+    Lanza ValueError si el cursor no es válido
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding).decode('utf-8'))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Cursor inválido') from e
+    if not isinstance(values, list):
+        raise ValueError('Cursor inválido')
+    return values
@@ -0,0 +1,6 @@
+"""
+Benchmarks de las rutas críticas de NominaPlus (cálculo de nómina, listados,
+ingesta masiva y reportes)
+
+Ejecutar: python -m benchmarks.run --employees 500 --months 3
+"""
@@ -0,0 +1,65 @@
+"""
+Compara dos resultados de benchmarks (por ejemplo, antes y después de un commit)
+
+Ejecutar: python -m benchmarks.compare <antes.json> <después.json> [--threshold 0.10] [--fail]
+
+Con --fail termina con código 1 si algún benchmark empeora más que el umbral
+(en la mediana) o ejecuta más sentencias SQL que antes.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(before, after, threshold):
+    """Filas (nombre, mediana antes, mediana después, razón, SQL antes, SQL después, regresión)"""
+    rows = []
+    for name, result in after['benchmarks'].items():
+        previous = before['benchmarks'].get(name)
+        if previous is None:
+            continue
+        ratio = result['median_ms'] / previous['median_ms'] if previous['median_ms'] else float('inf')
+        regression = ratio > 1 + threshold or result['sql_statements'] > previous['sql_statements']
+        rows.append((name, previous['median_ms'], result['median_ms'], ratio,
+                     previous['sql_statements'], result['sql_statements'], regression))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara dos resultados de benchmarks')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Empeoramiento tolerado (0.10 = 10%%)')
+    parser.add_argument('--fail', action='store_true', help='Terminar con error si hay regresiones')
+    args = parser.parse_args(argv)
+
+    before, after = load(args.before), load(args.after)
+    for label, result in (('antes', before), ('después', after)):
+        meta = result['meta']
+        print(f"{label:>8}: {meta['commit']} {meta['dialect']} {meta['employees']}x{meta['months']} ({meta['timestamp']})")
+    if (before['meta']['dialect'], before['meta']['employees'], before['meta']['months']) != \
+            (after['meta']['dialect'], after['meta']['employees'], after['meta']['months']):
+        print('⚠️  Los resultados usan bases o volúmenes distintos')
+
+    rows = compare(before, after, args.threshold)
+    print(f"\n{'benchmark':<45} {'antes ms':>10} {'después ms':>11} {'razón':>7} {'SQL':>11}")
+    for name, old_ms, new_ms, ratio, old_sql, new_sql, regression in rows:
+        mark = '  ❌' if regression else ''
+        print(f'{name:<45} {old_ms:>10.2f} {new_ms:>11.2f} {ratio:>6.2f}x {old_sql:>5}->{new_sql:<5}{mark}')
+
+    regressions = [row[0] for row in rows if row[-1]]
+    if regressions:
+        print(f'\n{len(regressions)} regresiones: {", ".join(regressions)}')
+        if args.fail:
+            sys.exit(1)
+    else:
+        print('\n✅ Sin regresiones')
+
+
+if __name__ == '__main__':
+    main()
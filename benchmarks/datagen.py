@@ -0,0 +1,127 @@
+"""
+Generador de datos sintéticos para benchmarks
+
+Amplía lo que hace init_sample_data.py a N empleados x M meses, repartidos entre
+Guatemala, Argentina y España, con horas extras, fines de semana trabajados,
+feriados y vacaciones. Los datos son reproducibles (semilla fija) y se insertan
+con INSERT masivos de Core para que generar volúmenes grandes sea rápido.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, List, Any
+
+from sqlalchemy import insert
+
+from app import db
+from app.models import Employee, Attendance
+from app.utils import get_period_dates
+
+COUNTRIES = ('GT', 'AR', 'ES')
+
+POSITIONS = ('Desarrollador Junior', 'Desarrollador Senior', 'Analista', 'Gerente de Proyectos', 'Soporte')
+
+# Días del mes que se marcan como feriado en todos los períodos
+HOLIDAY_DAYS = (1, 15)
+
+INSERT_CHUNK_SIZE = 5000
+
+
+def iter_periods(start_period: str, months: int) -> Iterator[str]:
+    """Períodos YYYY-MM consecutivos a partir de start_period"""
+    year, month = map(int, start_period.split('-'))
+    for _ in range(months):
+        yield f'{year}-{month:02d}'
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def build_employees(n_employees: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """Filas de empleados (el país se reparte en partes iguales)"""
+    now = datetime.utcnow()
+    return [
+        {
+            'name': f'Empleado {i:06d}',
+            'dni': f'BENCH{i:09d}',
+            'position': POSITIONS[i % len(POSITIONS)],
+            'hourly_rate': Decimal(rng.randint(2500, 12000)) / 100,
+            'bank_account': f'{i:010d}',
+            'country_code': COUNTRIES[i % len(COUNTRIES)],
+            'is_active': True,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for i in range(n_employees)
+    ]
+
+
+def build_attendances(employee_ids: List[int], period: str, rng: random.Random) -> Iterator[Dict[str, Any]]:
+    """Asistencias del período: días hábiles, algunos sábados, feriados y vacaciones"""
+    start_date, end_date = get_period_dates(period)
+    now = datetime.utcnow()
+    for employee_id in employee_ids:
+        day = start_date
+        while day <= end_date:
+            weekday = day.weekday()
+            if weekday == 6 or (weekday == 5 and rng.random() > 0.1):
+                day += timedelta(days=1)
+                continue
+            in_time = time(rng.randint(7, 9), rng.choice((0, 15, 30, 45)))
+            out_time = time(rng.randint(15, 20), rng.choice((0, 15, 30, 45)))
+            yield {
+                'employee_id': employee_id,
+                'date': day,
+                'in_time': in_time,
+                'out_time': out_time,
+                'hours_worked': Attendance.compute_hours(day, in_time, out_time),
+                'is_holiday': day.day in HOLIDAY_DAYS,
+                'is_vacation': rng.random() < 0.03,
+                'notes': None,
+                'created_at': now,
+                'updated_at': now,
+            }
+            day += timedelta(days=1)
+
+
+def _insert_chunks(table, rows) -> int:
+    connection = db.session.connection()
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            connection.execute(insert(table), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def generate(n_employees: int, months: int, start_period: str = '2024-01', seed: int = 42) -> Dict[str, Any]:
+    """
+    Inserta n_employees empleados con asistencias para `months` períodos
+    consecutivos; debe ejecutarse dentro de un contexto de aplicación
+    """
+    from app.logic.summary import rebuild_period_summaries
+
+    rng = random.Random(seed)
+    _insert_chunks(Employee.__table__, build_employees(n_employees, rng))
+    employee_ids = [employee_id for (employee_id,) in
+                    db.session.query(Employee.id).filter(Employee.dni.like('BENCH%')).order_by(Employee.id)]
+
+    periods = list(iter_periods(start_period, months))
+    attendance_count = 0
+    for period in periods:
+        attendance_count += _insert_chunks(Attendance.__table__, build_attendances(employee_ids, period, rng))
+    db.session.commit()
+
+    # Los INSERT de Core no pasan por el ORM: reconstruir period_summary
+    rebuild_period_summaries()
+
+    return {
+        'employees': len(employee_ids),
+        'attendances': attendance_count,
+        'periods': periods,
+        'employee_ids': employee_ids,
+    }
@@ -0,0 +1,111 @@
+"""
+Escalabilidad del cálculo de nómina en paralelo según la cantidad de procesos
+
+Ejecutar: python -m benchmarks.parallel --employees 5000 --workers 1 2 4 8
+
+Compara calculate_period_batch (un proceso) con calculate_period_parallel para
+cada cantidad de procesos sobre los mismos datos sintéticos. Sin --database-url
+se usa una base SQLite temporal en disco (los procesos necesitan abrirla).
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.run import RESULTS_DIR, git_commit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Escalabilidad del cálculo de nómina en paralelo')
+    parser.add_argument('--employees', type=int, default=5000)
+    parser.add_argument('--months', type=int, default=1)
+    parser.add_argument('--engine', default='decimal', choices=['decimal', 'vectorized', 'aggregate'])
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--database-url', help='URL de la base (por defecto SQLite temporal)')
+    parser.add_argument('--reset', action='store_true', help='Eliminar y recrear las tablas si la base tiene datos')
+    parser.add_argument('--output', help='Archivo de resultados (por defecto en benchmarks/results/)')
+    args = parser.parse_args(argv)
+
+    temp_dir = None
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        temp_dir = tempfile.mkdtemp(prefix='nominaplus-parallel-')
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(temp_dir, 'parallel.db')
+
+    from app import create_app, db
+    from app.models import Employee
+    from app.logic.payroll_batch import calculate_period_batch
+    from app.logic.parallel import calculate_period_parallel
+    from benchmarks.datagen import generate
+
+    app = create_app('production')
+    results = {}
+    with app.app_context():
+        db.create_all()
+        if db.session.query(Employee.id).first() is not None:
+            if not args.reset:
+                raise SystemExit('La base ya tiene datos; use una base exclusiva para benchmarks o --reset')
+            db.drop_all()
+            db.create_all()
+
+        print(f'Generando {args.employees} empleados x {args.months} meses...')
+        data = generate(args.employees, args.months)
+        period = data['periods'][-1]
+        print(f'✓ {data["attendances"]} asistencias')
+
+        started = time.perf_counter()
+        calculate_period_batch(period, engine=args.engine)
+        baseline_ms = (time.perf_counter() - started) * 1000
+        results['sequential'] = {'total_ms': round(baseline_ms, 3), 'speedup': 1.0}
+        print(f'  {"secuencial (calculate_period_batch)":<40} {baseline_ms:>10.1f} ms')
+
+        for workers in args.workers:
+            started = time.perf_counter()
+            result = calculate_period_parallel(period, engine=args.engine, workers=workers)
+            total_ms = (time.perf_counter() - started) * 1000
+            results[f'workers_{workers}'] = {
+                'workers': workers,
+                'partitions': result['partitions'],
+                'total_ms': round(total_ms, 3),
+                'calculate_ms': round(result['timing']['calculate_ms'], 3),
+                'persist_ms': round(result['timing']['persist_ms'], 3),
+                'speedup': round(baseline_ms / total_ms, 3),
+            }
+            print(f'  {f"{workers} procesos":<40} {total_ms:>10.1f} ms  ({baseline_ms / total_ms:.2f}x)')
+
+        dialect = db.engine.dialect.name
+        db.engine.dispose()
+
+    if temp_dir:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    output = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'commit': git_commit(),
+            'dialect': dialect,
+            'python': sys.version.split()[0],
+            'cpu_count': os.cpu_count(),
+            'employees': data['employees'],
+            'attendances': data['attendances'],
+            'engine': args.engine,
+        },
+        'parallel': results,
+    }
+    path = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{output['meta']['commit']}-parallel-{dialect}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, sort_keys=True)
+    print(f'\n✅ Resultados guardados en {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Mide el tiempo de arranque en frío de la fábrica de la aplicación
+
+Cada muestra es un proceso Python nuevo (como un worker de gunicorn al
+reiniciar) que importa app y ejecuta create_app; se mide por separado el
+tiempo de importación, el de create_app y las sentencias SQL emitidas al
+arrancar, con y sin AUTO_CREATE_SCHEMA.
+
+Ejecutar: python -m benchmarks.startup [--runs 10] [--database-url URL]
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.run import RESULTS_DIR, ROOT_DIR, git_commit
+
+# Código del proceso hijo: imprime una línea JSON con sus mediciones
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+import app as app_package
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+imported = time.perf_counter()
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.append(1))
+application = app_package.create_app('production')
+created = time.perf_counter()
+heavy = ['alembic', 'flask_migrate', 'numpy', 'app.logic.calculators', 'app.locales.translations']
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'total_ms': (created - start) * 1000,
+    'sql_statements': len(statements),
+    'loaded_modules': [name for name in heavy if name in sys.modules],
+}))
+'''
+
+
+def sample(database_url: str, auto_create_schema: bool) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url,
+               AUTO_CREATE_SCHEMA='true' if auto_create_schema else 'false')
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=ROOT_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples) -> dict:
+    result = {}
+    for key in ('import_ms', 'create_app_ms', 'total_ms'):
+        values = sorted(item[key] for item in samples)
+        result[key] = {
+            'min': round(values[0], 3),
+            'median': round(statistics.median(values), 3),
+            'max': round(values[-1], 3),
+        }
+    result['sql_statements'] = samples[-1]['sql_statements']
+    result['loaded_modules'] = samples[-1]['loaded_modules']
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de create_app')
+    parser.add_argument('--runs', type=int, default=10, help='Procesos por escenario')
+    parser.add_argument('--database-url', help='URL de la base (por defecto SQLite temporal)')
+    parser.add_argument('--output', help='Archivo de resultados (por defecto en benchmarks/results/)')
+    args = parser.parse_args(argv)
+
+    temp_dir = None
+    database_url = args.database_url
+    if not database_url:
+        temp_dir = tempfile.mkdtemp(prefix='nominaplus-startup-')
+        database_url = 'sqlite:///' + os.path.join(temp_dir, 'startup.db')
+
+    # Un primer arranque crea el esquema y compila los .pyc
+    sample(database_url, auto_create_schema=True)
+
+    results = {}
+    for name, auto_create_schema in (('auto_create_schema', True), ('lazy', False)):
+        samples = [sample(database_url, auto_create_schema) for _ in range(args.runs)]
+        results[name] = summarize(samples)
+        print(f"  {name:<20} total {results[name]['total_ms']['median']:>8.1f} ms  "
+              f"(import {results[name]['import_ms']['median']:.1f} ms, "
+              f"create_app {results[name]['create_app_ms']['median']:.1f} ms, "
+              f"{results[name]['sql_statements']} SQL)")
+
+    if temp_dir:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    dialect = database_url.split(':', 1)[0].split('+', 1)[0]
+    result = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'commit': git_commit(),
+            'dialect': dialect,
+            'python': sys.version.split()[0],
+            'runs': args.runs,
+        },
+        'startup': results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{result['meta']['commit']}-startup-{dialect}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print(f'\n✅ Resultados guardados en {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,32 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def engine_options(database_uri):
+    """
+    Opciones del pool de conexiones desde variables de entorno
+
+    Solo se aplican a bases con servidor (PostgreSQL); SQLite usa los valores
+    por defecto de Flask-SQLAlchemy. DB_STATEMENT_TIMEOUT_MS=0 no limita.
+    """
+    if not database_uri or database_uri.startswith('sqlite'):
+        return {}
+    
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', '20')),
+        # Reciclar antes de que el proxy o el servidor cierren conexiones inactivas
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', '1800')),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '30')),
+        # Verificar la conexión al tomarla del pool (evita errores por conexiones caídas)
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true',
+    }
+    
+    statement_timeout = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', '0'))
+    if statement_timeout and database_uri.startswith('postgres'):
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
 class Config:
     """Configuración base de la aplicación"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(32)
@@ -14,6 +40,7 @@ class Config:
     else:
         # Fallback a SQLite si no se especifica DATABASE_URL
         SQLALCHEMY_DATABASE_URI = 'sqlite:///nominaplus.db'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     
@@ -21,6 +48,59 @@ class Config:
     APP_NAME = os.environ.get('APP_NAME', 'NominaPlus')
     APP_VERSION = os.environ.get('APP_VERSION', '1.0.0')
     
+    # Crear las tablas al iniciar la aplicación (en producción usar `flask init-db`)
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', 'True').lower() == 'true'
+    
+    # Instrumentación por petición (Server-Timing, /metrics y perfiles de peticiones lentas)
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'False').lower() == 'true'
+    INSTRUMENTATION_SLOW_MS = float(os.environ.get('INSTRUMENTATION_SLOW_MS', '500'))
+    INSTRUMENTATION_PROFILE_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_PROFILE_SAMPLE_RATE', '0'))
+    INSTRUMENTATION_PROFILE_DIR = os.environ.get('INSTRUMENTATION_PROFILE_DIR', 'profiles')
+    
+    # Segundos que navegadores y proxies pueden reutilizar /api/locale sin revalidar
+    LOCALE_CACHE_MAX_AGE = int(os.environ.get('LOCALE_CACHE_MAX_AGE', '86400'))
+    
+    # Compresión de respuestas (app/compression.py): tamaño mínimo en bytes y nivel de cada algoritmo
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+    COMPRESSION_ZSTD_LEVEL = int(os.environ.get('COMPRESSION_ZSTD_LEVEL', '3'))
+    
+    # Serialización de listados: 'auto' usa orjson si está instalado, 'stdlib' fuerza json
+    SERIALIZER_BACKEND = os.environ.get('SERIALIZER_BACKEND', 'auto')
+    
+    # Procesos para el cálculo de nómina en paralelo (0 = cantidad de CPUs)
+    PAYROLL_WORKERS = int(os.environ.get('PAYROLL_WORKERS', '0'))
+    
+    # Cálculos de nómina individuales en caché por proceso (0 = desactivada)
+    PAYROLL_CACHE_SIZE = int(os.environ.get('PAYROLL_CACHE_SIZE', '1024'))
+    
+    # Servicio de marcaciones (app/punch_service.py): tamaño de lote, latencia máxima en cola y capacidad
+    PUNCH_BATCH_SIZE = int(os.environ.get('PUNCH_BATCH_SIZE', '500'))
+    PUNCH_MAX_LATENCY_MS = int(os.environ.get('PUNCH_MAX_LATENCY_MS', '200'))
+    PUNCH_QUEUE_MAX = int(os.environ.get('PUNCH_QUEUE_MAX', '50000'))
+    # Reintentos de un lote que no se pudo escribir, espera base entre reintentos y
+    # archivo donde se guardan las marcaciones que siguen fallando
+    PUNCH_WRITE_RETRIES = int(os.environ.get('PUNCH_WRITE_RETRIES', '3'))
+    PUNCH_RETRY_BACKOFF_MS = int(os.environ.get('PUNCH_RETRY_BACKOFF_MS', '500'))
+    PUNCH_DEAD_LETTER_PATH = os.environ.get('PUNCH_DEAD_LETTER_PATH', 'punches_failed.jsonl')
+    
+    # Exportación del historial a Parquet/Arrow (app/logic/export.py): destino y filas por lote
+    EXPORT_DIR = os.environ.get('EXPORT_DIR', 'exports')
+    EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '50000'))
+    
+    # Lotes de pago (app/logic/payments.py): nóminas por UPDATE y destino de los archivos del CLI/trabajos
+    PAYMENT_CHUNK_SIZE = int(os.environ.get('PAYMENT_CHUNK_SIZE', '1000'))
+    PAYMENTS_DIR = os.environ.get('PAYMENTS_DIR', 'payments')
+    
+    # Trabajos en segundo plano (app/logic/jobs.py): espera entre consultas del worker,
+    # reintentos, espera base entre reintentos y segundos sin latido para dar un trabajo por perdido
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '1.0'))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+    JOB_RETRY_BACKOFF_SECONDS = int(os.environ.get('JOB_RETRY_BACKOFF_SECONDS', '30'))
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', '900'))
+    
     # Configuración de CORS
     CORS_ORIGINS = ['*']  # En producción, especificar dominios permitidos
 
@@ -36,12 +116,14 @@ class ProductionConfig(Config):
     DEBUG = False
     FLASK_ENV = 'production'
     SQLALCHEMY_ECHO = False
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', 'False').lower() == 'true'
 
 
 class TestingConfig(Config):
     """Configuración para testing"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
 
 
 # Mapeo de configuraciones
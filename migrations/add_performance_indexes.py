@@ -0,0 +1,64 @@
+"""
+Script de migración para agregar los índices compuestos y parciales de las consultas frecuentes
+Ejecutar: python migrations/add_performance_indexes.py
+
+tests/test_indexes.py verifica con EXPLAIN QUERY PLAN que las consultas frecuentes los usan.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.models import Employee, Attendance, Payroll
+
+# Índices declarados en app/models.py que agrega esta migración
+INDEXES = {
+    'employees': ['ix_employees_active_country'],
+    'attendances': [
+        'ix_attendances_date_in_time_id',
+        'ix_attendances_date_employee',
+        'ix_attendances_employee_date_vacation',
+    ],
+    'payrolls': ['ix_payrolls_period_status'],
+}
+
+MODELS = {'employees': Employee, 'attendances': Attendance, 'payrolls': Payroll}
+
+
+def migrate():
+    """Crea los índices que falten"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            inspector = db.inspect(db.engine)
+            
+            for table_name, index_names in INDEXES.items():
+                existing = {index['name'] for index in inspector.get_indexes(table_name)}
+                table = MODELS[table_name].__table__
+                for index in table.indexes:
+                    if index.name not in index_names:
+                        continue
+                    if index.name in existing:
+                        print(f"✓ Índice {index.name} ya existe")
+                        continue
+                    print(f"Creando índice {index.name}...")
+                    index.create(bind=db.engine)
+                    print(f"✓ Índice {index.name} creado")
+            
+            if db.engine.dialect.name == 'postgresql':
+                with db.engine.begin() as connection:
+                    for table_name in INDEXES:
+                        connection.execute(text(f'ANALYZE {table_name}'))
+            
+            print("\n✅ Migración completada exitosamente")
+            
+        except Exception as e:
+            print(f"❌ Error en la migración: {e}")
+            raise
+
+if __name__ == '__main__':
+    migrate()
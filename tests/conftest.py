@@ -0,0 +1,85 @@
+"""
+Fixtures comunes: aplicación con la configuración de testing (SQLite en memoria)
+"""
+import itertools
+import os
+import sys
+from datetime import time
+from decimal import Decimal
+
+import pytest
+
+# `pytest` desde cualquier directorio: el paquete app está en la raíz del repositorio
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db  # noqa: E402
+from app.models import Attendance, Employee, Payroll  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """Base SQLite en archivo: los procesos del cálculo en paralelo abren su propia conexión"""
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'nomina.db'}"})
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def seed_employees(request):
+    """
+    Fábrica de empleados con asistencias y nómina opcional; devuelve sus IDs
+
+        seed_employees(2, days=[date(2024, 3, 4)], payroll={'total_amount': Decimal('550.00')})
+
+    country_code puede ser una tupla (se reparte en orden entre los empleados),
+    attendance cambia los valores de cada asistencia y payroll crea la nómina
+    del período (base_salary igual a total_amount si no se indica). Con
+    parametrize(..., indirect=True) el parámetro fija los valores por omisión.
+    """
+    defaults = getattr(request, 'param', {})
+    numbers = itertools.count(1)
+
+    def seed(count=1, *, days=(), attendance=None, payroll=None, period='2024-03', prefix='Empleado',
+             **employee_fields):
+        employee_fields = {'position': 'Operario', 'hourly_rate': Decimal('10.00'), **defaults, **employee_fields}
+        countries = employee_fields.pop('country_code', 'GT')
+        if isinstance(countries, str):
+            countries = (countries,)
+        attendance_fields = {'in_time': time(8, 0), 'out_time': time(16, 0), 'hours_worked': Decimal('8.00'),
+                             **(attendance or {})}
+
+        ids = []
+        for index in range(count):
+            number = next(numbers)
+            employee = Employee(name=f'{prefix} {number}', dni=f'{prefix[:3].upper()}{number:08d}',
+                                country_code=countries[index % len(countries)], **employee_fields)
+            db.session.add(employee)
+            db.session.flush()
+            for day in days:
+                db.session.add(Attendance(employee_id=employee.id, date=day, **attendance_fields))
+            if payroll is not None:
+                values = {'base_salary': payroll.get('total_amount', Decimal('0.00')), **payroll}
+                db.session.add(Payroll(employee_id=employee.id, period=period, **values))
+            ids.append(employee.id)
+        db.session.commit()
+        return ids
+
+    return seed
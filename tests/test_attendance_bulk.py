@@ -0,0 +1,23 @@
+"""
+Carga en bloque de asistencias: mismos formatos de fecha y hora que el alta individual
+"""
+import pytest
+
+from app.models import Attendance
+
+
+@pytest.mark.parametrize('in_time', ['08:00:00.500000', '08:00:00+02:00', '08:00'])
+def test_rejects_times_the_single_record_api_rejects(app, client, seed_employees, in_time):
+    employee_id, = seed_employees()
+
+    response = client.post('/api/attendances/bulk', json=[
+        {'employee_id': employee_id, 'date': '2024-03-04', 'in_time': in_time, 'out_time': '16:00:00'},
+        {'employee_id': employee_id, 'date': '2024-03-05', 'in_time': '08:00:00', 'out_time': '16:00:00'},
+    ])
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['upserted'] == 1
+    assert [error['index'] for error in data['errors']] == [0]
+    assert 'HH:MM:SS' in data['errors'][0]['error']
+    assert [row.in_time.microsecond for row in Attendance.query] == [0]
@@ -0,0 +1,34 @@
+"""
+El cálculo del período completo quita las marcas de payroll_dirty que resuelve
+"""
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.logic.parallel import calculate_period_parallel
+from app.logic.payroll_batch import calculate_period_batch
+from app.models import Attendance, PayrollDirty
+
+
+def _marks():
+    return sorted((mark.employee_id, mark.period) for mark in PayrollDirty.query)
+
+
+@pytest.mark.parametrize('calculate', [
+    lambda: calculate_period_batch('2024-03'),
+    lambda: calculate_period_parallel('2024-03', workers=1),
+], ids=['batch', 'parallel'])
+def test_full_recalculation_clears_dirty_marks(file_app, seed_employees, calculate):
+    first, second = seed_employees(2, days=[date(2024, 3, 4), date(2024, 3, 5)])
+    # Una asistencia de otro período del mismo empleado: su marca no se toca
+    db.session.add(Attendance(employee_id=first, date=date(2024, 4, 1), in_time=time(8, 0),
+                              out_time=time(16, 0), hours_worked=Decimal('8.00')))
+    db.session.commit()
+    assert _marks() == [(first, '2024-03'), (first, '2024-04'), (second, '2024-03')]
+
+    calculate()
+
+    db.session.remove()
+    assert _marks() == [(first, '2024-04')]
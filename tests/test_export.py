@@ -0,0 +1,26 @@
+"""
+Exportación del historial: las particiones por período se leen como un único conjunto
+"""
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.logic.export import export_dataset
+from app.models import Payroll
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def test_partitioned_payrolls_read_back_as_one_table(app, tmp_path, seed_employees):
+    employee_id, = seed_employees(payroll={'total_amount': Decimal('100.00')}, period='2024-01')
+    db.session.add(Payroll(employee_id=employee_id, period='2024-02', base_salary=Decimal('100.00'),
+                           total_amount=Decimal('100.00')))
+    db.session.commit()
+
+    result = export_dataset('payrolls', str(tmp_path))
+
+    assert result['exported'] == ['2024-01', '2024-02']
+    table = pq.read_table(tmp_path / 'payrolls')
+    assert sorted(table.column('period').to_pylist()) == ['2024-01', '2024-02']
+    assert export_dataset('payrolls', str(tmp_path))['skipped'] == 2
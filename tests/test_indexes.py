@@ -0,0 +1,48 @@
+"""
+Las consultas frecuentes usan sus índices (EXPLAIN QUERY PLAN en SQLite)
+"""
+import re
+from datetime import date, time
+
+import pytest
+from sqlalchemy import text, true, tuple_
+
+from app import db
+from app.models import Attendance, Employee, Payroll
+
+START_DATE, END_DATE = date(2024, 1, 1), date(2024, 1, 31)
+
+# Nombre exacto del índice en "USING [COVERING] INDEX <nombre>"
+INDEX_PATTERN = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+HOT_QUERIES = {
+    'ix_attendances_date_in_time_id': lambda: db.session.query(Attendance.id).filter(
+        tuple_(Attendance.date, Attendance.in_time, Attendance.id) < tuple_(END_DATE, time(8, 0), 1000)
+    ).order_by(Attendance.date.desc(), Attendance.in_time.desc(), Attendance.id.desc()).limit(100),
+    'ix_attendances_employee_date_vacation': lambda: db.session.query(
+        Attendance.hours_worked, Attendance.is_holiday
+    ).filter(
+        Attendance.employee_id == 1, Attendance.date >= START_DATE, Attendance.date <= END_DATE,
+        ~Attendance.is_vacation
+    ),
+    'ix_attendances_date': lambda: db.session.query(db.func.count()).select_from(Attendance).filter(
+        Attendance.date >= START_DATE, Attendance.date <= END_DATE
+    ),
+    'ix_payrolls_period_status': lambda: db.session.query(db.func.sum(Payroll.total_amount)).filter(
+        Payroll.period == '2024-01', Payroll.status == 'paid'
+    ),
+    'ix_employees_active_country': lambda: db.session.query(Employee.id).filter(
+        Employee.is_active == true(), Employee.country_code == 'AR'
+    ),
+}
+
+
+def _plan_indexes(query) -> set:
+    sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).fetchall()
+    return {name for row in rows for name in INDEX_PATTERN.findall(row[-1])}
+
+
+@pytest.mark.parametrize('expected_index', sorted(HOT_QUERIES))
+def test_hot_query_uses_its_index(app, expected_index):
+    assert expected_index in _plan_indexes(HOT_QUERIES[expected_index]())
@@ -0,0 +1,33 @@
+"""
+Trabajos en segundo plano: un handler que terminó no se vuelve a ejecutar
+"""
+from app import db
+from app.logic.jobs import JOB_TYPES, claim_job, enqueue_job, job_type, requeue_stale_jobs, run_job
+from app.models import Job
+
+
+def test_result_that_cannot_be_stored_fails_without_requeue(file_app):
+    calls = []
+
+    @job_type('tests.unserializable')
+    def _unserializable(params, context):
+        calls.append(params)
+        # No es JSON: el commit del resultado falla después de que el handler terminó
+        return {'value': object()}
+
+    try:
+        job_id = enqueue_job('tests.unserializable').id
+        job = claim_job('worker-1')
+
+        assert run_job(job, 'worker-1') is False
+
+        file_app.config['JOB_STALE_SECONDS'] = 0
+        assert requeue_stale_jobs() == 0
+        db.session.remove()
+        job = db.session.get(Job, job_id)
+        assert job.status == 'failed'
+        assert job.error.startswith('El trabajo terminó pero no se pudo guardar el resultado')
+        assert claim_job('worker-2') is None
+        assert len(calls) == 1
+    finally:
+        JOB_TYPES.pop('tests.unserializable')
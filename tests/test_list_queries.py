@@ -0,0 +1,55 @@
+"""
+Cantidad de sentencias SQL por listado: constante sin importar la cantidad de filas
+"""
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app import db
+
+
+def _seed(seed_employees, employees: int, days: int, prefix: str):
+    seed_employees(
+        employees,
+        days=[date(2024, 3, 1) + timedelta(days=offset) for offset in range(days)],
+        attendance={'out_time': time(17, 0), 'hours_worked': Decimal('9.00')},
+        payroll={'total_amount': Decimal('1000.00')},
+        prefix=prefix,
+        hourly_rate=Decimal('40.00'),
+        country_code=('GT', 'AR', 'ES'),
+    )
+
+
+def _statements(client, url: str) -> int:
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # Sesión nueva como en una petición real (sin objetos en el mapa de identidad)
+    db.session.remove()
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize('url', [
+    '/api/attendances?limit=1000',
+    '/api/attendances?start_date=2024-03-01&end_date=2024-03-31',
+    '/api/payrolls',
+    '/api/payrolls?period=2024-03',
+])
+def test_list_statement_count_does_not_grow_with_rows(app, client, seed_employees, url):
+    _seed(seed_employees, employees=3, days=2, prefix='SMALL')
+    small = _statements(client, url)
+
+    _seed(seed_employees, employees=40, days=10, prefix='LARGE')
+    large = _statements(client, url)
+
+    assert large == small
@@ -0,0 +1,22 @@
+"""
+Paginación por cursor de asistencias: recorre todas las filas sin saltear ninguna
+"""
+from datetime import date, time
+
+from app.models import Attendance
+
+
+def test_cursor_keeps_microseconds(app, client, seed_employees):
+    seed_employees(3, days=[date(2024, 3, 4)], attendance={'in_time': time(8, 0, 0, 500000)})
+
+    seen, cursor = [], None
+    while True:
+        response = client.get('/api/attendances?limit=1' + (f'&cursor={cursor}' if cursor else ''))
+        assert response.status_code == 200
+        body = response.get_json()
+        seen += [row['id'] for row in body['data']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert sorted(seen) == [row.id for row in Attendance.query.order_by(Attendance.id)]
@@ -0,0 +1,81 @@
+"""
+Recálculo de un período completo: las nóminas pagadas no se modifican
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.logic.parallel import calculate_period_parallel
+from app.logic.payroll_batch import calculate_period_batch
+from app.models import Payroll, PayrollDirty
+
+
+def _seed(seed_employees):
+    """Dos empleados con asistencias en el período; el primero ya tiene la nómina pagada"""
+    paid_employee, = seed_employees(days=[date(2024, 3, 4)], payroll={
+        'total_amount': Decimal('550.00'), 'status': 'paid', 'bank_transfer_id': 'GT202403-20240401000000-1',
+    })
+    other, = seed_employees(days=[date(2024, 3, 4)])
+    return [paid_employee, other], Payroll.query.filter_by(employee_id=paid_employee).one().id
+
+
+def _assert_paid_unchanged(paid_id):
+    db.session.expire_all()
+    paid = db.session.get(Payroll, paid_id)
+    assert (paid.total_amount, paid.status) == (Decimal('550.00'), 'paid')
+
+
+def test_batch_skips_paid_payrolls(app, seed_employees):
+    employees, paid_id = _seed(seed_employees)
+
+    result = calculate_period_batch('2024-03')
+
+    assert result['skipped'] == {'paid': 1}
+    assert [item['employee_id'] for item in result['results']] == [employees[1]]
+    _assert_paid_unchanged(paid_id)
+
+
+def test_parallel_skips_paid_payrolls(file_app, seed_employees):
+    employees, paid_id = _seed(seed_employees)
+
+    result = calculate_period_parallel('2024-03', workers=1)
+
+    assert result['skipped'] == {'paid': 1}
+    assert (result['employees'], result['created']) == (1, 1)
+    _assert_paid_unchanged(paid_id)
+    assert Payroll.query.filter_by(employee_id=employees[1]).one().status == 'pending'
+
+
+@pytest.mark.parametrize('portable', [False, True], ids=['on_conflict', 'portable'])
+def test_parallel_does_not_count_payrolls_paid_during_the_calculation(file_app, seed_employees, monkeypatch, portable):
+    if portable:
+        # Motores sin ON CONFLICT: UPDATE de las existentes no pagadas e INSERT del resto
+        monkeypatch.setattr('app.logic.parallel._upsert_statement', lambda: None)
+    employees, paid_id = _seed(seed_employees)
+    db.session.execute(update(Payroll).where(Payroll.id == paid_id).values(status='confirmed'))
+    db.session.commit()
+
+    def pay_while_calculating(done, total):
+        # Otro proceso paga la nómina mientras calculan los procesos del pool
+        db.session.execute(update(Payroll).where(Payroll.id == paid_id).values(status='paid'))
+        db.session.commit()
+
+    result = calculate_period_parallel('2024-03', workers=1, progress=pay_while_calculating)
+
+    assert result['skipped'] == {'paid': 1}
+    assert (result['employees'], result['created'], result['updated']) == (1, 1, 0)
+    _assert_paid_unchanged(paid_id)
+    # La marca de la nómina no escrita sigue pendiente
+    assert [mark.employee_id for mark in PayrollDirty.query] == [employees[0]]
+
+
+def test_non_numeric_adjustment_key_is_rejected(app, client):
+    response = client.post('/api/payrolls/calculate-batch', json={
+        'period': '2024-03', 'adjustments': {'abc': {'bonuses': '10.00'}},
+    })
+
+    assert response.status_code == 400
+    assert 'employee_id no válido' in response.get_json()['error']
@@ -0,0 +1,95 @@
+"""
+Lotes de pago: marcado en una transacción y archivo generado desde las nóminas pagadas
+"""
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.logic.payments import PaymentConflict, pay_batch, prepare_batch
+from app.models import Employee, Payroll
+
+# Todos los empleados de estas pruebas tienen cuenta bancaria
+pytestmark = pytest.mark.parametrize('seed_employees', [{'bank_account': '0001234567'}], indirect=True)
+
+
+def _seed(seed_employees, payroll_id=None):
+    seed_employees(payroll={
+        'id': payroll_id, 'total_amount': Decimal('550.00'), 'status': 'confirmed',
+    })
+
+
+def test_batch_file_matches_bank_transfer_ids(app, client, seed_employees):
+    _seed(seed_employees)
+
+    response = client.post('/api/payments/batches', json={'period': '2024-03', 'country_code': 'GT',
+                                                          'payment_date': '2024-04-01'})
+
+    assert response.status_code == 200
+    batch_id = response.headers['X-Payment-Batch-Id']
+    lines = response.get_data(as_text=True).split('\r\n')
+    assert lines[0].startswith(f'H{batch_id}')
+    assert lines[2] == f'T{1:08d}{55000:017d}'
+    payroll = Payroll.query.one()
+    assert payroll.status == 'paid'
+    assert lines[1].rstrip().endswith(payroll.bank_transfer_id)
+    # El mismo archivo se vuelve a descargar con el identificador del lote
+    assert client.get(f'/api/payments/batches/{batch_id}/file').get_data(as_text=True) == '\r\n'.join(lines)
+
+
+def test_reference_too_long_is_rejected_before_paying(app, client, seed_employees):
+    # GT202403-XXXXXXXX-<id>: 18 caracteres más el id
+    _seed(seed_employees, payroll_id=1234567890123)
+
+    response = client.post('/api/payments/batches', json={'period': '2024-03', 'country_code': 'GT'})
+
+    assert response.status_code == 400
+    assert 'supera los 30 caracteres' in response.get_json()['error']
+    assert Payroll.query.one().status == 'confirmed'
+
+
+@pytest.mark.parametrize('account', ['0001-234 567', '123456789012345678901', 'CUENTA_Ñ'])
+def test_invalid_account_is_rejected_before_paying(app, client, seed_employees, account):
+    _seed(seed_employees)
+    Employee.query.one().bank_account = account
+    db.session.commit()
+
+    response = client.post('/api/payments/batches', json={'period': '2024-03', 'country_code': 'GT'})
+
+    assert response.status_code == 400
+    error = response.get_json()['error']
+    assert 'cuenta bancaria no válida' in error and str(Payroll.query.one().id) in error
+    assert Payroll.query.one().status == 'confirmed'
+
+
+def test_batches_in_the_same_second_get_different_ids(app, seed_employees):
+    _seed(seed_employees)
+
+    first, second = prepare_batch('2024-03', 'GT'), prepare_batch('2024-03', 'GT')
+
+    assert first.batch_id != second.batch_id
+
+
+def test_duplicate_batch_id_is_rejected(app, seed_employees):
+    _seed(seed_employees)
+    first = pay_batch(prepare_batch('2024-03', 'GT'))
+    _seed(seed_employees)
+    second = prepare_batch('2024-03', 'GT')
+    second.batch_id = first.batch_id
+
+    with pytest.raises(PaymentConflict, match='Ya existe un lote'):
+        pay_batch(second)
+    assert Payroll.query.filter_by(status='confirmed').count() == 1
+
+
+def test_batch_already_paid_by_another_returns_409(app, client, seed_employees, monkeypatch):
+    _seed(seed_employees)
+    # Otro lote paga las nóminas entre la validación y el marcado
+    stale = prepare_batch('2024-03', 'GT')
+    pay_batch(prepare_batch('2024-03', 'GT'))
+    monkeypatch.setattr('app.logic.payments.prepare_batch', lambda *args: stale)
+
+    response = client.post('/api/payments/batches', json={'period': '2024-03', 'country_code': 'GT'})
+
+    assert response.status_code == 409
+    assert 'ya fueron pagadas' in response.get_json()['error']
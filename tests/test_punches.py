@@ -0,0 +1,54 @@
+"""
+Marcaciones: conversión a la hora local del país y lotes que no se pueden escribir
+"""
+import asyncio
+import json
+from datetime import date, datetime, time, timezone
+
+from app.logic.punches import apply_punches, parse_punch
+from app.models import Attendance
+from app.punch_service import PunchBuffer
+
+
+def test_aware_timestamps_are_converted_to_the_employee_zone(app, seed_employees):
+    employee_id, = seed_employees(country_code='ES')
+
+    # 07:00 UTC en enero es 08:00 en Madrid; 16:30-06:00 son 23:30 en Madrid
+    result = apply_punches([
+        parse_punch({'employee_id': employee_id, 'type': 'in', 'timestamp': '2024-01-15T07:00:00+00:00'}),
+        parse_punch({'employee_id': employee_id, 'type': 'out', 'timestamp': '2024-01-15T16:30:00-06:00'}),
+    ])
+
+    assert result == {'written': 1, 'errors': []}
+    attendance = Attendance.query.one()
+    assert attendance.date == date(2024, 1, 15)
+    assert (attendance.in_time, attendance.out_time) == (time(8, 0), time(23, 30))
+
+
+def test_default_timestamp_uses_utc_clock():
+    punch = parse_punch({'employee_id': 1, 'type': 'in'})
+    assert punch['timestamp'].utcoffset().total_seconds() == 0
+
+
+def test_failed_batch_is_retried_and_dead_lettered(app, tmp_path):
+    app.config.update(PUNCH_WRITE_RETRIES=2, PUNCH_RETRY_BACKOFF_MS=1,
+                      PUNCH_DEAD_LETTER_PATH=str(tmp_path / 'failed.jsonl'))
+    buffer = PunchBuffer(app)
+    calls = []
+
+    def failing_write(punches):
+        calls.append(len(punches))
+        raise RuntimeError('base no disponible')
+
+    buffer._write = failing_write
+    punch = parse_punch({'employee_id': 1, 'type': 'in'}, datetime(2024, 1, 15, 14, 0, tzinfo=timezone.utc))
+    asyncio.run(buffer._flush([(0.0, punch)]))
+    buffer.executor.shutdown()
+
+    assert calls == [1, 1, 1]
+    assert buffer.stats['retries'] == 2
+    assert buffer.stats['dead_lettered'] == 1
+    [line] = (tmp_path / 'failed.jsonl').read_text().splitlines()
+    stored = json.loads(line)
+    assert stored['error'] == 'base no disponible'
+    assert parse_punch(stored['punch']) == punch
@@ -0,0 +1,86 @@
+"""
+Compatibilidad de app.serializers con to_dict() + jsonify
+"""
+import json
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+from flask import jsonify
+
+import app.serializers as serializers
+from app import db
+from app.models import Attendance, Employee, Payroll
+from app.serializers import attendance_serializer, employee_serializer, payroll_serializer
+
+CASES = [
+    (employee_serializer, Employee, Employee.id),
+    (attendance_serializer, Attendance, Attendance.id),
+    (payroll_serializer, Payroll, Payroll.id),
+]
+
+
+@pytest.fixture
+def records(app):
+    """Filas con nulos, ceros, Decimal, fechas, horas y texto no ASCII"""
+    complete = Employee(name='José Ñúñez', dni='DNI00000001', cuil='20-12345678-3', nit='1234567-8',
+                        country_code='AR', address='Calle 1 "A"', position='Contador',
+                        hourly_rate=Decimal('123.45'), phone='555-0101', email='jose@example.com',
+                        bank_account='0000003100010000000001')
+    minimal = Employee(name='Ana', dni='DNI00000002', position='Operaria', hourly_rate=Decimal('0.00'),
+                       is_active=False)
+    db.session.add_all([complete, minimal])
+    db.session.flush()
+
+    db.session.add_all([
+        Attendance(employee_id=complete.id, date=date(2024, 3, 1), in_time=time(8, 0), out_time=time(17, 30),
+                   hours_worked=Decimal('9.50'), is_holiday=True, notes='Feriado: año nuevo'),
+        Attendance(employee_id=minimal.id, date=date(2024, 3, 2), in_time=time(22, 15)),
+        Payroll(employee_id=complete.id, period='2024-03', base_salary=Decimal('1234.56'),
+                hours_worked=Decimal('160.00'), overtime_hours=Decimal('4.25'), overtime_pay=Decimal('78.90'),
+                bonuses=Decimal('100.00'), deductions=Decimal('15.50'), total_amount=Decimal('1397.96'),
+                status='paid', payment_date=date(2024, 4, 1), bank_transfer_id='TRX-1', notes='Pagada'),
+        Payroll(employee_id=minimal.id, period='2024-03', base_salary=Decimal('0.00'),
+                total_amount=Decimal('0.00')),
+    ])
+    db.session.commit()
+
+
+def _expected_body(model, order_by, **extra) -> bytes:
+    items = [item.to_dict() for item in model.query.order_by(order_by)]
+    return jsonify({'success': True, 'data': items, 'count': len(items), **extra}).get_data()
+
+
+@pytest.mark.parametrize('serializer, model, order_by', CASES)
+def test_stdlib_backend_matches_jsonify_byte_for_byte(app, records, serializer, model, order_by):
+    app.config['SERIALIZER_BACKEND'] = 'stdlib'
+    with app.test_request_context():
+        rows = serializer.query().order_by(order_by).all()
+        body = serializer.response(rows, has_more=False).get_data()
+        assert body == _expected_body(model, order_by, has_more=False)
+
+
+@pytest.mark.parametrize('serializer, model, order_by', CASES)
+def test_without_orjson_matches_jsonify_byte_for_byte(app, records, monkeypatch, serializer, model, order_by):
+    monkeypatch.setattr(serializers, 'orjson', None)
+    with app.test_request_context():
+        rows = serializer.query().order_by(order_by).all()
+        assert serializer.response(rows).get_data() == _expected_body(model, order_by)
+
+
+@pytest.mark.parametrize('serializer, model, order_by', CASES)
+def test_orjson_backend_is_equivalent_json(app, records, serializer, model, order_by):
+    pytest.importorskip('orjson')
+    app.config['SERIALIZER_BACKEND'] = 'auto'
+    with app.test_request_context():
+        rows = serializer.query().order_by(order_by).all()
+        body = serializer.response(rows).get_data()
+        assert json.loads(body) == json.loads(_expected_body(model, order_by))
+
+
+@pytest.mark.parametrize('serializer, model, order_by', CASES)
+def test_to_dict_matches_model_to_dict(app, records, serializer, model, order_by):
+    rows = serializer.query().order_by(order_by).all()
+    expected = [item.to_dict() for item in model.query.order_by(order_by)]
+    assert [serializer.to_dict(row) for row in rows] == expected
+    assert [list(serializer.to_dict(row)) for row in rows] == [sorted(item) for item in expected]
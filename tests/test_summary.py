@@ -0,0 +1,23 @@
+"""
+Reporte resumen leído de period_summary
+"""
+from decimal import Decimal
+
+from app import db
+from app.models import PeriodSummary
+
+
+def test_summary_for_period_without_row_is_computed_without_writing(app, client, seed_employees):
+    seed_employees(payroll={'total_amount': Decimal('100.00'), 'status': 'paid'})
+    # Simular datos cargados sin pasar por el ORM (sin filas de resumen)
+    PeriodSummary.query.delete()
+    db.session.commit()
+
+    response = client.get('/api/reports/summary?period=2024-03')
+
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['employees']['total_active'] == 1
+    assert data['payrolls'] == {'total': 1, 'total_paid': 100.0}
+    db.session.remove()
+    assert PeriodSummary.query.count() == 0
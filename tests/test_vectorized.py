@@ -0,0 +1,113 @@
+"""
+Paridad del motor columnar (app.logic.vectorized) y de la suma de horas en SQL
+(app.logic.aggregation) con las calculadoras Decimal fila por fila
+"""
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import db
+from app.models import Attendance, Employee
+from app.logic.payroll_batch import employee_filters, load_and_calculate
+
+PERIOD = '2024-03'
+COMPARED_FIELDS = ('base_salary', 'hours_worked', 'overtime_hours', 'overtime_pay', 'bonuses', 'deductions',
+                   'total_amount')
+ARGENTINA_FIELDS = ('gross_salary', 'jubilacion', 'obra_social', 'pami', 'total_aportes')
+
+
+def _seed_random_period(rng: random.Random, employees: int = 24):
+    """
+    Empleados de GT, AR y ES con jornadas al azar: fines de semana, feriados,
+    vacaciones, días sin horas y empleados sin ninguna hora en el período
+    """
+    adjustments = {}
+    for index in range(employees):
+        employee = Employee(
+            name=f'Empleado {index}',
+            dni=f'DNI{index:08d}',
+            position='Operario',
+            hourly_rate=Decimal(rng.randint(1500, 9999)) / 100,
+            country_code=('GT', 'AR', 'ES')[index % 3],
+        )
+        db.session.add(employee)
+        db.session.flush()
+
+        if index % 4 == 0:
+            adjustments[str(employee.id)] = {
+                'bonuses': str(Decimal(rng.randint(0, 50000)) / 100),
+                'deductions': str(Decimal(rng.randint(0, 20000)) / 100),
+            }
+        if index % 8 == 7:
+            # Empleado sin horas en el período
+            continue
+
+        day = date(2024, 3, 1)
+        while day.month == 3:
+            if rng.random() < 0.85:
+                hours = Decimal(rng.randint(0, 1400)) / 100 if rng.random() < 0.9 else Decimal('0')
+                db.session.add(Attendance(
+                    employee_id=employee.id,
+                    date=day,
+                    in_time=time(8, 0),
+                    hours_worked=hours,
+                    is_holiday=rng.random() < 0.1,
+                    is_vacation=rng.random() < 0.05,
+                ))
+            day += timedelta(days=1)
+    db.session.commit()
+    return adjustments
+
+
+@pytest.mark.parametrize('engine', ['vectorized', 'aggregate'])
+@pytest.mark.parametrize('seed', [1, 7, 2024])
+def test_engine_matches_decimal_calculators(app, seed, engine):
+    adjustments = _seed_random_period(random.Random(seed))
+    filters = employee_filters()
+
+    expected = load_and_calculate(PERIOD, filters, adjustments, 'decimal')['calculations']
+    actual = load_and_calculate(PERIOD, filters, adjustments, engine)['calculations']
+
+    assert set(actual) == set(expected)
+    for employee in Employee.query.all():
+        fields = COMPARED_FIELDS + (ARGENTINA_FIELDS if employee.country_code == 'AR' else ())
+        for field in fields:
+            assert actual[employee.id][field] == expected[employee.id][field], (employee.country_code, field)
+        assert actual[employee.id]['summary'] == expected[employee.id]['summary']
+
+
+def test_employee_without_hours_only_gets_adjustments(app):
+    employee = Employee(name='Sin horas', dni='DNI00000001', position='Operario',
+                        hourly_rate=Decimal('50.00'), country_code='GT')
+    db.session.add(employee)
+    db.session.commit()
+
+    adjustments = {str(employee.id): {'bonuses': '100.00', 'deductions': '25.50'}}
+    result = load_and_calculate(PERIOD, employee_filters(), adjustments, 'vectorized')['calculations'][employee.id]
+
+    assert result['hours_worked'] == 0
+    assert result['total_amount'] == Decimal('74.50')
+
+
+@pytest.mark.parametrize('engine', ['decimal', 'vectorized'])
+def test_adjustments_are_rounded_to_cents(app, client, engine):
+    employee = Employee(name='Ajustes', dni='DNI00000002', position='Operario',
+                        hourly_rate=Decimal('40.00'), country_code='AR')
+    db.session.add(employee)
+    db.session.flush()
+    db.session.add(Attendance(employee_id=employee.id, date=date(2024, 3, 4), in_time=time(8, 0),
+                              hours_worked=Decimal('9.50')))
+    db.session.commit()
+
+    response = client.post('/api/payrolls/calculate-batch', json={
+        'period': PERIOD,
+        'engine': engine,
+        'adjustments': {str(employee.id): {'bonuses': '10.005', 'deductions': '0.015'}},
+    })
+
+    assert response.status_code == 200, response.get_json()
+    payroll = response.get_json()['data'][0]
+    assert payroll['bonuses'] == 10.01
+    assert payroll['deductions'] == 0.02